@@ -4,8 +4,20 @@ AI Module for Upwork Notification System
 Provides AI-powered functionality for job processing and communication
 """
 
-# Import available modules
-from .local_ai import LocalAIProvider
-from .openai import OpenAIProvider
+# Providers are imported on first attribute access (PEP 562),
+# so importing the package never pulls in torch / transformers or openai
+_PROVIDERS = {
+    'LocalAIProvider': '.local_ai',
+    'OpenAIProvider': '.openai',
+}
 
-__all__ = ['LocalAIProvider', 'OpenAIProvider']
\ No newline at end of file
+__all__ = ['LocalAIProvider', 'OpenAIProvider']
+
+
+def __getattr__(name):
+    if name in _PROVIDERS:
+        import importlib
+        provider = getattr(importlib.import_module(_PROVIDERS[name], __name__), name)
+        globals()[name] = provider
+        return provider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
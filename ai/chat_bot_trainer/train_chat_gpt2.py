@@ -3,12 +3,12 @@ GPT-2 Chat Model Training Script - Optimized Version
 Trains GPT-2 model on processed JSON chat data
 """
 import os
+import sys
 import json
 import torch
 from datetime import datetime
 from transformers import (
     GPT2LMHeadModel, 
-    GPT2Tokenizer, 
     DataCollatorForLanguageModeling,
     Trainer, 
     TrainingArguments
@@ -16,6 +16,10 @@ from transformers import (
 from torch.utils.data import Dataset
 import logging
 
+# project root for the shared fast tokenizer helpers (scripts/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from scripts.fast_tokenizers import load_gpt2_tokenizer, batch_encode
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
@@ -103,11 +107,11 @@ class JSONChatDataset(Dataset):
         return training_file 
     # function that builds tokenized examples from conversations that are inside data
     #1. loops through self.data inside conversations key and extracts formatted_training_text
-    #2. tokenizes text with truncation and max length
+    #2. tokenizes all texts in one batch call with truncation and max length
     #3. appends input ids to examples for model to read
     def _build_examples(self):
-        # placeholder for examples
-        examples = []
+        # placeholder for texts
+        texts = []
         # loops through self.data dictionary conversations
         for convo in self.conversations:
             # inside conversations look for formatted_training_text field
@@ -117,15 +121,16 @@ class JSONChatDataset(Dataset):
             print(f"📝 Processing conversation {convo['id']}: {convo['exchange_count']} exchanges")
             # print preview of formatted training text
             print(f"   Preview: {text[:150]}...")
-            # tokenize text with truncation and max length
-            tokens = self.tokenizer(
-                text,
-                truncation=True,
-                max_length=self.block_size,
-                return_tensors="pt"
-            )
-            # append input ids to examples for model to read
-            examples.append(tokens["input_ids"].squeeze())
+            texts.append(text)
+        # tokenize all texts with truncation and max length (no padding, lengths differ)
+        tokens = batch_encode(
+            self.tokenizer,
+            texts,
+            truncation=True,
+            max_length=self.block_size
+        )
+        # input ids per text as tensors for model to read
+        examples = [torch.tensor(ids) for ids in tokens["input_ids"]]
         # log created examples
         print(f"🎯 Created {len(examples)} tokenized training examples")
         return examples
@@ -166,7 +171,7 @@ class ChatGPT2Trainer:
         """Loads tokenizer and model, adds special tokens."""
         print(f"🤖 Loading model: {self.model_name}")
         # Load tokenizer from pretrained model
-        self.tokenizer = GPT2Tokenizer.from_pretrained(self.model_name)
+        self.tokenizer = load_gpt2_tokenizer(self.model_name)
         # add special tokens to tokenizer
         added = self.tokenizer.add_special_tokens({"additional_special_tokens": special_tokens})
         # set pad token to eos token
@@ -277,7 +282,7 @@ def main(json_path=None):
             print(f"📄 Using provided file: {json_path}")
 
         # Step 1: Prepare tokenizer
-        tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
+        tokenizer = load_gpt2_tokenizer("gpt2")
 
         # Step 2: Build dataset (auto-finds file if json_path=None)
         dataset = JSONChatDataset(tokenizer, json_path)
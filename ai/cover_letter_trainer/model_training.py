@@ -4,6 +4,8 @@ AI Model Training Module
 Provides functionality for training custom AI models for cover letter generation
 """
 
+import os
+import sys
 import json
 import logging
 import torch
@@ -11,13 +13,16 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 from transformers import (
     GPT2LMHeadModel,
-    GPT2Tokenizer,
     Trainer,
     TrainingArguments,
     DataCollatorForLanguageModeling
 )
 from datasets import Dataset
 
+# project root for the shared fast tokenizer helpers (scripts/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from scripts.fast_tokenizers import load_gpt2_tokenizer
+
 logger = logging.getLogger(__name__)
 
 # class to hold functions that will train custom models
@@ -94,14 +99,10 @@ class CoverLetterTrainer:
             # logging info
             logger.info(f"Loading base model: {self.base_model}")
             # setup tokenizer from transformers
-            self.tokenizer = GPT2Tokenizer.from_pretrained(self.base_model)
+            self.tokenizer = load_gpt2_tokenizer(self.base_model)
             # setup model from transformers
             self.model = GPT2LMHeadModel.from_pretrained(self.base_model)
 
-            # Add padding token
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
-
             # Move model to device
             self.model.to(self.device)
             # log success
@@ -281,7 +282,7 @@ class CoverLetterTrainer:
 
             # Load the trained model
             model = GPT2LMHeadModel.from_pretrained(model_path)
-            tokenizer = GPT2Tokenizer.from_pretrained(model_path)
+            tokenizer = load_gpt2_tokenizer(model_path)
             model.to(self.device)
             model.eval()
 
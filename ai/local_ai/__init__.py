@@ -9,8 +9,6 @@ import logging
 from pathlib import Path
 from typing import Dict, Optional, Any
 import os
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
-import torch
 
 # variable to hold loading libraries
 logger = logging.getLogger(__name__)
@@ -57,6 +55,10 @@ class LocalAIProvider:
     # ======= 🧱🤖 function to load model ======
     def _load_model(self):
         try:
+            # torch / transformers are imported only when the model is really loaded
+            import torch
+            from scripts.model_quantization import quantization_enabled
+            from scripts.model_registry import get_registry
             # from config get model name
             model_name = self.config.get('model_name', 'gpt2')
             # from config get cache dir
@@ -64,31 +66,20 @@ class LocalAIProvider:
             # log info
             logger.info(f"Loading GPT-2 model: {model_name}")
 
-            # ==========🧊 Load tokenizer ======
-            self.tokenizer = GPT2Tokenizer.from_pretrained(
-                model_name, # tokenizer for model that is used
-                cache_dir=cache_dir, # cache directory for model
-                padding_side='left' # set padding to left
-            )
-
-            # if no pad token fallback to eos token
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
+            # Move to CPU (for weaker systems)
+            self.device = torch.device('cpu')
 
-            # Load model
-            self.model = GPT2LMHeadModel.from_pretrained(
+            # ==========🧊 Load tokenizer and model ======
+            # shared with the other GPT-2 generators of this process through the model registry
+            # (left padding, pad token, eval mode), INT8 dynamic-quantized if "quantized" is set
+            # in config (or MODEL_QUANTIZED=1), weights are saved next to a local model as model_int8.pt
+            self.model, self.tokenizer = get_registry().get_gpt2(
                 model_name, # model name from config
+                quantized=quantization_enabled(self.config.get('quantized')),
+                device=self.device,
                 cache_dir=cache_dir # cache directory for model
             )
 
-            # Set to evaluation mode
-            self.model.eval()
-
-            # Move to CPU (for weaker systems)
-            self.device = torch.device('cpu')
-            # Move model to the device
-            self.model.to(self.device)
-
             # Log successful model loading
             logger.info(f"GPT-2 model loaded successfully on {self.device}")
         # log error if loading fails
@@ -98,6 +89,14 @@ class LocalAIProvider:
             self.tokenizer = None
     # ======= 🧱🤖 function to load model ======
 
+    # ======= 🗑️🤖 give model back to the shared registry ======
+    def unload_model(self):
+        if self.model is not None:
+            from scripts.model_registry import get_registry
+            get_registry().release(self.model)
+            self.model = None
+            self.tokenizer = None
+
     # ======= ✍️🤖prompt to generate cover letter ======
     def generate_cover_letter(self, job_data: Dict[str, Any]) -> str:
         # function that returns a bool after checking if self.model and self.tokenizer are loaded
@@ -0,0 +1,287 @@
+"""
+Phase Classifier Distillation
+Trains a compact student from the fine-tuned phase_classifier_v1 (teacher) with
+soft-label knowledge distillation on the training data plus augmented contexts.
+The student is saved as a regular phase model directory (config.json, weights,
+tokenizer, metadata.json), so PhaseDetector loads it unchanged
+"""
+import os
+import sys
+import json
+import copy
+import random
+import argparse
+import time
+
+import torch
+import torch.nn.functional as F
+from torch.optim import AdamW
+from transformers import BertModel
+from sklearn.model_selection import train_test_split
+
+# Set UTF-8 encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# trainer helpers (same folder) and inference PhaseDetector (scripts/)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from train_phase_classifier import PHASE_LABELS, PHASE_TO_ID, PhaseClassifier, load_training_data, save_model
+from scripts.phase_detector import PhaseDetector
+from scripts.fast_tokenizers import load_bert_tokenizer
+
+# same data and split as train_phase_classifier.py so held-out numbers are comparable
+DATA_FILE = os.path.join(os.path.dirname(__file__), "training_data", "phase_training_data.json")
+TEACHER_DIR = os.path.join(os.path.dirname(__file__), 'trained_models', 'phase_classifier_v1')
+SAVE_DIR = os.path.join(os.path.dirname(__file__), 'trained_models', 'phase_classifier_distilled_v1')
+TEST_SIZE = 0.15
+RANDOM_STATE = 42
+MAX_LENGTH = 256
+
+# teacher layers copied into the student, evenly spaced and always keeping first and last
+# (4 of 12 -> 0, 4, 7, 11)
+def select_teacher_layers(teacher_layers, student_layers):
+    if student_layers == 1:
+        return [teacher_layers - 1]
+    return [round(i * (teacher_layers - 1) / (student_layers - 1)) for i in range(student_layers)]
+
+# build student PhaseClassifier
+# 1. 'teacher': teacher config with fewer encoder layers, embeddings / selected layers /
+#    pooler / classifier copied from the teacher (no download, same tokenizer)
+# 2. otherwise a small pre-trained BERT from the hub (e.g. huawei-noah/TinyBERT_General_4L_312D,
+#    google/bert_uncased_L-4_H-256_A-4) with a fresh classifier head and its own tokenizer
+def build_student(teacher_model, teacher_tokenizer, student_init, num_layers):
+    if student_init == 'teacher':
+        config = copy.deepcopy(teacher_model.bert.config)
+        config.num_hidden_layers = num_layers
+        student = PhaseClassifier(n_classes=len(PHASE_LABELS), config=config)
+        student.bert.embeddings.load_state_dict(teacher_model.bert.embeddings.state_dict())
+        layer_ids = select_teacher_layers(len(teacher_model.bert.encoder.layer), num_layers)
+        for student_layer, teacher_id in zip(student.bert.encoder.layer, layer_ids):
+            student_layer.load_state_dict(teacher_model.bert.encoder.layer[teacher_id].state_dict())
+        student.bert.pooler.load_state_dict(teacher_model.bert.pooler.state_dict())
+        student.classifier.load_state_dict(teacher_model.classifier.state_dict())
+        print(f"[INFO] Student: {num_layers} layers copied from teacher layers {layer_ids}")
+        return student, teacher_tokenizer, {'student_init': 'teacher', 'teacher_layers': layer_ids}
+
+    pretrained = BertModel.from_pretrained(student_init)
+    student = PhaseClassifier(n_classes=len(PHASE_LABELS), config=pretrained.config)
+    student.bert.load_state_dict(pretrained.state_dict())
+    print(f"[INFO] Student: {student_init}")
+    return student, load_bert_tokenizer(student_init), {'student_init': student_init}
+
+# augment one context, conversation lines are kept (speaker prefixes drive the phase)
+# 1. word dropout inside lines
+# 2. swap of two neighbouring words
+# 3. keep only the last lines of longer conversations
+# 4. lower-casing / punctuation stripping
+def augment_context(context, rng):
+    lines = [line for line in context.split('\n') if line.strip()]
+    if len(lines) > 2 and rng.random() < 0.3:
+        lines = lines[-rng.randint(2, len(lines) - 1):]
+
+    augmented = []
+    for line in lines:
+        speaker, sep, text = line.partition(':')
+        if not sep:
+            speaker, text = '', line
+        words = text.split()
+        if len(words) > 3:
+            words = [w for w in words if rng.random() > 0.1] or words
+        if len(words) > 3 and rng.random() < 0.3:
+            i = rng.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+        text = ' '.join(words)
+        if rng.random() < 0.2:
+            text = text.lower()
+        if rng.random() < 0.2:
+            text = text.rstrip('.!?')
+        augmented.append(f"{speaker}: {text}" if sep else text)
+    return '\n'.join(augmented)
+
+# teacher logits for all texts, dynamic padding per batch
+def teacher_logits(teacher, texts, batch_size):
+    model = teacher.model.eval()
+    logits = []
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            encoding = teacher.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                         max_length=MAX_LENGTH, return_tensors='pt')
+            logits.append(model(encoding['input_ids'].to(teacher.device),
+                                encoding['attention_mask'].to(teacher.device)).float().cpu())
+    return torch.cat(logits)
+
+# knowledge distillation loss
+# 1. KL divergence between student and teacher distributions softened by temperature,
+#    scaled by T^2 so gradients keep their size
+# 2. cross entropy on hard labels (-1 = augmented text, teacher only)
+# 3. alpha weights soft against hard part
+def distillation_loss(student_logits, teacher_logits_batch, labels, temperature, alpha):
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.softmax(teacher_logits_batch / temperature, dim=-1),
+        reduction='batchmean'
+    ) * temperature ** 2
+    labelled = labels >= 0
+    if not labelled.any():
+        return soft
+    hard = F.cross_entropy(student_logits[labelled], labels[labelled])
+    return alpha * soft + (1 - alpha) * hard
+
+# train student
+# 1. texts = train contexts + augmentations, soft targets from the teacher computed once
+# 2. shuffle every epoch, pad each batch to its longest text
+# 3. AdamW on the distillation loss
+def train_student(student, tokenizer, texts, soft_targets, labels, args, device):
+    student = student.to(device)
+    optimizer = AdamW(student.parameters(), lr=args.learning_rate)
+    indices = list(range(len(texts)))
+    rng = random.Random(RANDOM_STATE)
+
+    for epoch in range(args.epochs):
+        student.train()
+        rng.shuffle(indices)
+        total_loss = 0.0
+        for start in range(0, len(indices), args.batch_size):
+            batch = indices[start:start + args.batch_size]
+            encoding = tokenizer([texts[i] for i in batch], padding=True, truncation=True,
+                                 max_length=MAX_LENGTH, return_tensors='pt')
+            optimizer.zero_grad()
+            logits = student(encoding['input_ids'].to(device), encoding['attention_mask'].to(device))
+            loss = distillation_loss(logits, soft_targets[batch].to(device), labels[batch].to(device),
+                                     args.temperature, args.alpha)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch)
+        print(f"Epoch {epoch + 1}/{args.epochs} - KD loss: {total_loss / len(texts):.4f}")
+    return student.eval()
+
+# held-out accuracy of the in-memory student (percent, as in metadata.json)
+def student_accuracy(student, tokenizer, contexts, phases, device):
+    encoding = tokenizer(contexts, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors='pt')
+    with torch.no_grad():
+        predicted = student(encoding['input_ids'].to(device), encoding['attention_mask'].to(device)).argmax(dim=-1)
+    correct = sum(int(p) == PHASE_TO_ID[phase] for p, phase in zip(predicted.cpu(), phases))
+    return round(100 * correct / len(phases), 1)
+
+# held-out comparison of teacher and student PhaseDetectors
+# accuracy, agreement with teacher, per-context latency, parameters and weight file size
+def compare_detectors(teacher, student, contexts, phases):
+    def run(detector):
+        detector.predict(contexts[0])
+        predicted, latencies = [], []
+        for context in contexts:
+            started = time.perf_counter()
+            predicted.append(detector.predict(context)['phase'])
+            latencies.append((time.perf_counter() - started) * 1000)
+        return predicted, latencies
+
+    def weights_mb(detector):
+        for name in ('phase_classifier.safetensors', 'phase_classifier.pth'):
+            path = os.path.join(detector.model_dir, name)
+            if os.path.exists(path):
+                return round(os.path.getsize(path) / (1024 * 1024), 1)
+        return None
+
+    report = {'heldout_samples': len(contexts)}
+    teacher_phases = None
+    for name, detector in (('teacher', teacher), ('student', student)):
+        predicted, latencies = run(detector)
+        ordered = sorted(latencies)
+        report[name] = {
+            'accuracy': round(100 * sum(p == l for p, l in zip(predicted, phases)) / len(phases), 1),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 2),
+            'parameters_m': round(sum(p.numel() for p in detector.model.parameters()) / 1e6, 1),
+            'weights_mb': weights_mb(detector)
+        }
+        if teacher_phases is None:
+            teacher_phases = predicted
+        else:
+            report['student']['agreement_with_teacher'] = round(
+                100 * sum(a == b for a, b in zip(predicted, teacher_phases)) / len(phases), 1)
+    report['speedup'] = round(report['teacher']['mean_ms'] / report['student']['mean_ms'], 2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Distill the phase classifier into a compact student')
+    parser.add_argument('--teacher-dir', default=TEACHER_DIR, help='Fine-tuned teacher model directory')
+    parser.add_argument('--save-dir', default=SAVE_DIR, help='Output directory of the student')
+    parser.add_argument('--student-init', default='teacher',
+                        help="'teacher' (copy teacher layers) or a small BERT from the hub (default: teacher)")
+    parser.add_argument('--layers', type=int, default=4, help="Student layers for --student-init teacher (default: 4)")
+    parser.add_argument('--augmentations', type=int, default=10, help='Augmented copies per train context (default: 10)')
+    parser.add_argument('--temperature', type=float, default=2.0, help='Distillation temperature (default: 2.0)')
+    parser.add_argument('--alpha', type=float, default=0.7, help='Weight of soft teacher loss (default: 0.7)')
+    parser.add_argument('--epochs', type=int, default=10, help='Epochs (default: 10)')
+    parser.add_argument('--batch-size', type=int, default=16, help='Batch size (default: 16)')
+    parser.add_argument('--learning-rate', type=float, default=5e-5, help='Learning rate (default: 5e-5)')
+    parser.add_argument('--benchmark-only', action='store_true', help='Only compare an existing student with the teacher')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("PHASE CLASSIFIER DISTILLATION")
+    print("=" * 60)
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    print(f"[INFO] Using device: {device}")
+
+    contexts, phases = load_training_data(DATA_FILE)
+    train_contexts, test_contexts, train_phases, test_phases = train_test_split(
+        contexts, phases, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=phases
+    )
+
+    teacher = PhaseDetector(args.teacher_dir, quantized=False)
+    if not teacher.is_trained_model:
+        raise RuntimeError(f"No trained teacher in {args.teacher_dir}, run train_phase_classifier.py first")
+    if args.benchmark_only:
+        student_detector = PhaseDetector(args.save_dir, quantized=False)
+        print(json.dumps(compare_detectors(teacher, student_detector, test_contexts, test_phases), indent=2))
+        return
+
+    # train contexts keep their labels, augmentations are labelled by the teacher only
+    rng = random.Random(RANDOM_STATE)
+    texts = list(train_contexts)
+    labels = [PHASE_TO_ID[phase] for phase in train_phases]
+    for context in train_contexts:
+        for _ in range(args.augmentations):
+            texts.append(augment_context(context, rng))
+            labels.append(-1)
+    print(f"[INFO] Distillation set: {len(train_contexts)} contexts + {len(texts) - len(train_contexts)} augmentations")
+
+    soft_targets = teacher_logits(teacher, texts, args.batch_size)
+    student, tokenizer, init_info = build_student(teacher.model, teacher.tokenizer, args.student_init, args.layers)
+    student = train_student(student, tokenizer, texts, soft_targets, torch.tensor(labels), args, device)
+
+    metadata = {
+        'accuracy': student_accuracy(student, tokenizer, test_contexts, test_phases, device),
+        'training_samples': len(train_contexts),
+        'augmented_samples': len(texts) - len(train_contexts),
+        'test_samples': len(test_contexts),
+        'epochs': args.epochs,
+        'batch_size': args.batch_size,
+        'learning_rate': args.learning_rate,
+        'temperature': args.temperature,
+        'alpha': args.alpha,
+        'distilled_from': os.path.basename(os.path.normpath(args.teacher_dir)),
+        'model_type': f"distilled-bert-{student.bert.config.num_hidden_layers}l-{student.bert.config.hidden_size}h",
+        **init_info
+    }
+    save_model(student.to('cpu'), tokenizer, args.save_dir, metadata)
+
+    # reload through PhaseDetector, checks the directory is drop-in and measures it
+    student_detector = PhaseDetector(args.save_dir, quantized=False)
+    report = compare_detectors(teacher, student_detector, test_contexts, test_phases)
+    metadata_path = os.path.join(args.save_dir, 'metadata.json')
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    saved['distillation_report'] = report
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(saved, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps(report, indent=2))
+    print(f"[OK] Student saved to {args.save_dir}")
+    print(f"[INFO] Use it with PHASE_MODEL_DIR={args.save_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Fast Phase Classifier Training
+Trains a TF-IDF + logistic regression phase model next to the BERT classifier.
+The cascade serves its prediction when confidence passes the calibrated threshold
+and escalates to BERT otherwise
+"""
+import os
+import sys
+import json
+import pickle
+import argparse
+from datetime import datetime
+
+import numpy as np
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split, cross_val_predict, StratifiedKFold
+from sklearn.pipeline import make_pipeline
+
+# Set UTF-8 encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# same data, split and output folder as train_phase_classifier.py
+DATA_FILE = os.path.join(os.path.dirname(__file__), "training_data", "phase_training_data.json")
+SAVE_DIR = os.path.join(os.path.dirname(__file__), 'trained_models', 'phase_classifier_v1')
+TEST_SIZE = 0.15
+RANDOM_STATE = 42
+# file names read by scripts/cascade_phase_detector.py
+FAST_MODEL_FILE = 'fast_phase_classifier.pkl'
+FAST_METADATA_FILE = 'fast_phase_metadata.json'
+
+# build TF-IDF (words 1-2 grams) + logistic regression pipeline
+def build_pipeline():
+    return make_pipeline(
+        TfidfVectorizer(lowercase=True, ngram_range=(1, 2), sublinear_tf=True, min_df=1),
+        LogisticRegression(C=10.0, max_iter=2000, class_weight='balanced')
+    )
+
+# calibrate confidence threshold on out-of-fold predictions of the train split
+# 1. every train example is predicted by a model that did not see it
+# 2. try each observed confidence as threshold, highest first
+# 3. keep the lowest threshold whose served predictions still reach target precision
+# 4. threshold above 1 means the fast path never serves (always escalate)
+def calibrate_threshold(contexts, phases, target_precision, folds):
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    probabilities = cross_val_predict(build_pipeline(), contexts, phases, cv=cv, method='predict_proba')
+    classes = np.array(sorted(set(phases)))
+    confidence = probabilities.max(axis=1)
+    correct = classes[probabilities.argmax(axis=1)] == np.array(phases)
+
+    threshold, coverage, precision = 1.01, 0.0, None
+    for candidate in sorted(set(confidence.tolist()), reverse=True):
+        served = confidence >= candidate
+        served_precision = correct[served].mean()
+        if served_precision >= target_precision:
+            threshold, coverage, precision = candidate, served.mean(), served_precision
+    return threshold, coverage, precision
+
+# held-out report: fast path share and accuracy of served predictions
+def evaluate_heldout(pipeline, threshold, contexts, phases):
+    probabilities = pipeline.predict_proba(contexts)
+    confidence = probabilities.max(axis=1)
+    predicted = pipeline.classes_[probabilities.argmax(axis=1)]
+    served = confidence >= threshold
+    correct = predicted == np.array(phases)
+    return {
+        'heldout_samples': len(contexts),
+        'heldout_accuracy': round(float(correct.mean()), 4),
+        'heldout_fast_fraction': round(float(served.mean()), 4),
+        'heldout_fast_accuracy': round(float(correct[served].mean()), 4) if served.any() else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Train TF-IDF fast path for the phase cascade')
+    parser.add_argument('--target-precision', type=float, default=0.95,
+                        help='Required accuracy of fast path predictions (default: 0.95)')
+    parser.add_argument('--folds', type=int, default=3, help='Cross-validation folds for calibration (default: 3)')
+    parser.add_argument('--save-dir', default=SAVE_DIR, help='Folder of the BERT phase classifier')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FAST PHASE CLASSIFIER TRAINING (TF-IDF + LOGISTIC REGRESSION)")
+    print("=" * 60)
+
+    with open(DATA_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    contexts = [item['context'] for item in data]
+    phases = [item['phase'] for item in data]
+    print(f"[OK] Loaded {len(contexts)} training examples")
+
+    # identical split to the BERT trainer so held-out numbers are comparable
+    train_contexts, test_contexts, train_phases, test_phases = train_test_split(
+        contexts, phases, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=phases
+    )
+
+    threshold, coverage, precision = calibrate_threshold(train_contexts, train_phases, args.target_precision, args.folds)
+    print(f"[INFO] Calibrated threshold: {threshold:.3f} (cv coverage {coverage:.1%})")
+
+    pipeline = build_pipeline().fit(train_contexts, train_phases)
+    report = evaluate_heldout(pipeline, threshold, test_contexts, test_phases)
+
+    os.makedirs(args.save_dir, exist_ok=True)
+    with open(os.path.join(args.save_dir, FAST_MODEL_FILE), 'wb') as f:
+        pickle.dump(pipeline, f)
+
+    metadata = {
+        'threshold': round(float(threshold), 4),
+        'target_precision': args.target_precision,
+        'cv_folds': args.folds,
+        'cv_fast_fraction': round(float(coverage), 4),
+        'cv_fast_precision': round(float(precision), 4) if precision is not None else None,
+        **report,
+        'test_size': TEST_SIZE,
+        'random_state': RANDOM_STATE,
+        'training_samples': len(train_contexts),
+        'sklearn_version': sklearn.__version__,
+        'trained_at': datetime.now().isoformat()
+    }
+    with open(os.path.join(args.save_dir, FAST_METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+
+    print(json.dumps(metadata, indent=2))
+    print(f"[OK] Fast classifier saved to {args.save_dir}")
+
+if __name__ == "__main__":
+    main()
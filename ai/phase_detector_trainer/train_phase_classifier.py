@@ -7,7 +7,7 @@ import torch
 import torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
 from torch.optim import AdamW
-from transformers import BertTokenizer, BertModel
+from transformers import BertModel
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
 import numpy as np
@@ -19,6 +19,11 @@ import sys
 if sys.platform == "win32":
     sys.stdout.reconfigure(encoding='utf-8')
 
+# project root for the shared fast tokenizer and artifact helpers (scripts/)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from scripts.fast_tokenizers import load_bert_tokenizer, batch_encode
+from scripts.derived_artifacts import PHASE_PTH_FILES, record_artifact_source
+
 # Phase label that will be used for classification
 PHASE_LABELS = [
     'initial_response',
@@ -38,36 +43,35 @@ ID_TO_PHASE = {idx: phase for phase, idx in PHASE_TO_ID.items()}
 class PhaseDataset(Dataset):
     """Dataset for conversation phase classification"""
     # initialize dataset with contexts, phases, tokenizer, and max length
+    # all contexts are tokenized once here in one batch call of the fast tokenizer
     def __init__(self, contexts, phases, tokenizer, max_length=256):
         self.contexts = contexts # this will be input for text for training model
         self.phases = phases # this will be offered output for model answers
         self.tokenizer = tokenizer
         self.max_length = max_length
-    # return length of dataset
-    def __len__(self):
-        return len(self.contexts)
-    # seting up looper for model training
-    # 1. get one context argument from contexts list
-    # 2. get corresponding phase label
-    # 3. tokenize context using tokenizer
-    # 4. loop return dictionary of input ids, attention mask, and label
-    def __getitem__(self, idx):
-        context = str(self.contexts[idx]) # get one context argument
-        phase = self.phases[idx] # get phase corresponding to argument
-        # tokenize context
-        encoding = self.tokenizer.encode_plus(
-            context,
+        self.encodings = batch_encode(
+            tokenizer,
+            contexts,
             add_special_tokens=True,
-            max_length=self.max_length,
+            max_length=max_length,
             padding='max_length',
             truncation=True,
             return_attention_mask=True,
             return_tensors='pt'
         )
+    # return length of dataset
+    def __len__(self):
+        return len(self.contexts)
+    # seting up looper for model training
+    # 1. get corresponding phase label
+    # 2. take the context row from the encodings made in __init__
+    # 3. loop return dictionary of input ids, attention mask, and label
+    def __getitem__(self, idx):
+        phase = self.phases[idx] # get phase corresponding to argument
         # return dictionary of input ids, attention mask, and label
         return {
-            'input_ids': encoding['input_ids'].flatten(),
-            'attention_mask': encoding['attention_mask'].flatten(),
+            'input_ids': self.encodings['input_ids'][idx],
+            'attention_mask': self.encodings['attention_mask'][idx],
             'label': torch.tensor(PHASE_TO_ID[phase], dtype=torch.long)
         }
 
@@ -79,9 +83,13 @@ class PhaseClassifier(nn.Module):
     # 2. dropout layer
     # 3. linear classifier layer it classifies embeings of BERT into n_classes
             # which are in this case 8 phase labels
-    def __init__(self, n_classes=8, dropout=0.3):
+    # config builds the architecture only, without loading base BERT weights
+    def __init__(self, n_classes=8, dropout=0.3, config=None):
         super(PhaseClassifier, self).__init__()
-        self.bert = BertModel.from_pretrained('bert-base-uncased')
+        if config is not None:
+            self.bert = BertModel(config)
+        else:
+            self.bert = BertModel.from_pretrained('bert-base-uncased')
         self.dropout = nn.Dropout(dropout)
         self.classifier = nn.Linear(self.bert.config.hidden_size, n_classes)
     # forward it to model and return output
@@ -283,6 +291,17 @@ def save_model(model, tokenizer, save_dir, metadata=None):
     
     # Save model inside save_dir by the name phase_classifier.pth
     torch.save(model.state_dict(), os.path.join(save_dir, 'phase_classifier.pth'))
+    # same weights as safetensors (memory-mapped at inference) and BERT config,
+    # so PhaseDetector builds the model without downloading bert-base-uncased
+    # (recorded as made from this .pth, PhaseDetector falls back to the .pth once they differ)
+    model.bert.config.save_pretrained(save_dir)
+    try:
+        from safetensors.torch import save_file
+        safetensors_path = os.path.join(save_dir, 'phase_classifier.safetensors')
+        save_file({k: v.contiguous() for k, v in model.state_dict().items()}, safetensors_path)
+        record_artifact_source(safetensors_path, save_dir, PHASE_PTH_FILES)
+    except ImportError:
+        print("[WARN] safetensors not installed, only phase_classifier.pth saved")
     
     # Save tokenizer
     tokenizer.save_pretrained(save_dir)
@@ -295,7 +314,7 @@ def save_model(model, tokenizer, save_dir, metadata=None):
         'phase_labels': PHASE_LABELS,
         'phase_to_id': PHASE_TO_ID,
         'id_to_phase': ID_TO_PHASE,
-        'model_type': 'bert-base-uncased',
+        'model_type': metadata.get('model_type', 'bert-base-uncased'),
         'n_classes': len(PHASE_LABELS),
         'trained_at': datetime.now().isoformat()
     })
@@ -344,7 +363,7 @@ def main():
     
     # Initialize tokenizer
     print(f"\n[INFO] Loading BERT tokenizer...")
-    tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+    tokenizer = load_bert_tokenizer('bert-base-uncased')
     
     # Create datasets
     # train dataset
@@ -7,7 +7,10 @@ import sys
 import json
 import torch
 from datetime import datetime
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.model_registry import get_registry
 
 class TrainedChatTester:
     """Test the trained chat model"""
@@ -27,12 +30,8 @@ class TrainedChatTester:
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(f"Trained model not found at: {self.model_path}")
         
-        # Load tokenizer and model
-        self.tokenizer = GPT2Tokenizer.from_pretrained(self.model_path)
-        self.model = GPT2LMHeadModel.from_pretrained(self.model_path)
-        
-        self.model.to(self.device)
-        self.model.eval()
+        # Shared tokenizer and model from the model registry (on device, eval mode)
+        self.model, self.tokenizer = get_registry().get_gpt2(self.model_path, device=self.device)
         
         print(f"✅ Model loaded successfully on {self.device}")
         print(f"📊 Vocab size: {len(self.tokenizer)}")
@@ -17,6 +17,7 @@ if sys.platform == "win32":
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from data.chat_database_manager import ChatDatabase
+from scripts.model_client import get_model_server_url
 
 class ChatDashboardGenerator:
     def __init__(self):
@@ -560,6 +561,8 @@ class ChatDashboardGenerator:
                 
                 <div class="section">
                     <h2>🧠 AI Response Suggestions</h2>
+                    <button class="refresh-button" style="position: static; margin-bottom: 15px; color: #333;" onclick="streamAiResponse('latest')">⚡ Stream AI Response</button>
+                    {self.generate_stream_panel_html()}
                     {ai_suggestions_html}
                 </div>
             </div>
@@ -567,6 +570,8 @@ class ChatDashboardGenerator:
     </div>
     
     <script>
+        {self.generate_stream_script()}
+        
         function refreshDashboard() {{
             document.getElementById('loading').style.display = 'block';
             setTimeout(() => {{
@@ -592,10 +597,10 @@ class ChatDashboardGenerator:
             }});
         }}
         
-        // Auto-refresh every 30 seconds
+        // Auto-refresh every 30 seconds (not while an AI response is streaming)
         setInterval(() => {{
-            if (!document.getElementById('loading').style.display || 
-                document.getElementById('loading').style.display === 'none') {{
+            if (!window.aiStreaming && (!document.getElementById('loading').style.display || 
+                document.getElementById('loading').style.display === 'none')) {{
                 refreshDashboard();
             }}
         }}, 30000);
@@ -919,6 +924,58 @@ class ChatDashboardGenerator:
             'timestamp': datetime.now().isoformat()
         }
 
+    def generate_stream_panel_html(self):
+        """Live AI response panel filled over Server-Sent Events from the model server"""
+        return """
+            <div class="ai-stream-panel" id="ai-stream-panel" style="display: none; background: #fff; border: 2px solid #FF9800; border-radius: 12px; padding: 15px; margin-bottom: 20px;">
+                <strong id="ai-stream-status">⚡ Generating...</strong>
+                <p id="ai-stream-output" style="margin-top: 10px; white-space: pre-wrap; line-height: 1.5;"></p>
+            </div>"""
+
+    def generate_stream_script(self):
+        """JavaScript that streams an AI response from /chat-stream of the model server"""
+        # plain string, inserted into the f-string templates so braces stay single
+        script = """
+        // Live AI response from the model server (scripts/model_server.py), tokens arrive as they are generated
+        const MODEL_SERVER_URL = '__MODEL_SERVER_URL__';
+        window.aiStreaming = false;
+        function streamAiResponse(sessionId) {
+            if (window.aiStreaming) return;
+            window.aiStreaming = true;
+            const panel = document.getElementById('ai-stream-panel');
+            const status = document.getElementById('ai-stream-status');
+            const output = document.getElementById('ai-stream-output');
+            panel.style.display = 'block';
+            status.textContent = '⚡ Generating...';
+            output.textContent = '';
+            const source = new EventSource(MODEL_SERVER_URL + '/chat-stream?session_id=' + encodeURIComponent(sessionId || 'latest'));
+            const finish = (message) => {
+                source.close();
+                window.aiStreaming = false;
+                status.textContent = message;
+            };
+            source.addEventListener('meta', (e) => {
+                const meta = JSON.parse(e.data);
+                status.textContent = '⚡ ' + meta.phase + ' (' + Math.round(meta.confidence * 100) + '%) - generating...';
+            });
+            source.addEventListener('token', (e) => {
+                output.textContent += JSON.parse(e.data).text;
+            });
+            source.addEventListener('done', (e) => {
+                const done = JSON.parse(e.data);
+                output.textContent = done.response;
+                output.onclick = () => copyResponse(done.response);
+                finish('✅ AI response (first words after ' + done.first_token_ms + ' ms) - click to copy');
+            });
+            source.addEventListener('failed', (e) => {
+                finish('❌ ' + JSON.parse(e.data).error);
+            });
+            source.onerror = () => {
+                if (window.aiStreaming) finish('❌ Model server not reachable at ' + MODEL_SERVER_URL + ' (run_scripts/run_model_server.ps1)');
+            };
+        }"""
+        return script.replace('__MODEL_SERVER_URL__', get_model_server_url())
+
     def create_enhanced_dashboard_html(self, enhanced_data: dict) -> str:
         """Create enhanced HTML dashboard with session stats and active chat"""
         
@@ -1258,6 +1315,7 @@ class ChatDashboardGenerator:
             <h1 class="title">📱 AI Chat</h1>
             
             <button class="continue-btn" onclick="continueWorkflow()">🔄 Continue Workflow</button>
+            <button class="continue-btn stream-btn" onclick="streamAiResponse('{active_chat.get('session_id', 'latest') if active_chat else 'latest'}')" style="background: linear-gradient(135deg, #FF9800 0%, #F57C00 100%);">⚡ Stream AI Response</button>
             
             <div class="stat-card">
                 <span class="stat-number">{session_stats['active_sessions_count']}</span>
@@ -1277,11 +1335,14 @@ class ChatDashboardGenerator:
         
         <div class="main-content">
             {chat_display}
+            {self.generate_stream_panel_html()}
             {ai_suggestions_html}
         </div>
     </div>
     
     <script>
+        {self.generate_stream_script()}
+        
         // Auto-scroll to bottom of chat
         const messagesContainer = document.querySelector('.messages-container');
         if (messagesContainer) {{
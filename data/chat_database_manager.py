@@ -5,8 +5,8 @@ Manages chat sessions, messages, and AI responses
 import sqlite3
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 
 class ChatDatabase:
     def __init__(self, db_path: str = "chat_data.db"):
@@ -54,6 +54,83 @@ class ChatDatabase:
             )
         ''')
         
+        # speeds up per-session MAX(message_order) and ordered reads
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_chat_messages_session_order
+            ON chat_messages (session_id, message_order)
+        ''')
+        
+        # Last message seen per session, so incremental parsing can stop there
+        # (hash of the message and the ones before it, position of its element in that scrape)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chat_watermarks (
+                session_id TEXT PRIMARY KEY,
+                last_message_hash TEXT NOT NULL,
+                last_message_order INTEGER DEFAULT 0,
+                last_message_position INTEGER,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES chat_sessions (session_id)
+            )
+        ''')
+        
+        # databases created before the scrape position was stored need it added
+        cursor.execute('PRAGMA table_info(chat_watermarks)')
+        watermark_columns = [col[1] for col in cursor.fetchall()]
+        if 'last_message_position' not in watermark_columns:
+            cursor.execute('ALTER TABLE chat_watermarks ADD COLUMN last_message_position INTEGER')
+        
+        # Chat HTML files already ingested, so batch mode only picks up new scrapes
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS processed_chat_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                file_size INTEGER,
+                file_mtime REAL,
+                session_id TEXT,
+                status TEXT,
+                processed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (file_path, file_hash)
+            )
+        ''')
+        
+        # Phase predictions keyed by exact context hash and model version,
+        # so an unchanged conversation skips the phase model entirely
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS phase_cache (
+                context_hash TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                phase TEXT NOT NULL,
+                confidence REAL,
+                probabilities TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (context_hash, model_version)
+            )
+        ''')
+        
+        # Incremental phase tracking: HMM belief per session and the last message it has seen
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS phase_tracker_state (
+                session_id TEXT PRIMARY KEY,
+                model_version TEXT NOT NULL,
+                last_message_order INTEGER NOT NULL,
+                belief TEXT NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES chat_sessions (session_id)
+            )
+        ''')
+        
+        # Phase probabilities of single client messages, scored once per model version
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS message_phase_scores (
+                message_id TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                probabilities TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (message_id, model_version)
+            )
+        ''')
+        
         # Raw chat HTML data
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS raw_chat_data (
@@ -79,14 +156,35 @@ class ChatDatabase:
                 model_version TEXT,
                 generated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                 used BOOLEAN DEFAULT FALSE,
+                context_hash TEXT,  -- response cache key: context hash, phase and generation mode
+                phase TEXT,
+                mode TEXT,
+                cache_hits INTEGER DEFAULT 0,  -- times this batch of suggestions was served from cache
                 FOREIGN KEY (session_id) REFERENCES chat_sessions (session_id)
             )
         ''')
+        # databases created before the response cache need the key columns added
+        cursor.execute('PRAGMA table_info(gpt2_responses)')
+        response_columns = [col[1] for col in cursor.fetchall()]
+        for column, column_type in (('context_hash', 'TEXT'), ('phase', 'TEXT'), ('mode', 'TEXT'),
+                                    ('cache_hits', 'INTEGER DEFAULT 0')):
+            if column not in response_columns:
+                cursor.execute(f'ALTER TABLE gpt2_responses ADD COLUMN {column} {column_type}')
+        
+        # response cache lookups by session and key, newest batch first
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gpt2_responses_cache
+            ON gpt2_responses (session_id, context_hash, phase, mode, model_version, generated_at)
+        ''')
         
         conn.commit()
         conn.close()
         print("[OK] Chat database initialized")
     
+    def get_connection(self) -> sqlite3.Connection:
+        """Open a connection to the chat database (caller closes it)"""
+        return sqlite3.connect(self.db_path)
+    
     def save_raw_chat_html(self, session_id: str, html_content: str, page_url: str) -> int:
         """Save raw chat HTML"""
         conn = sqlite3.connect(self.db_path)
@@ -270,6 +368,233 @@ class ChatDatabase:
         
         return response_id
     
+    def get_cached_responses(self, session_id: str, context_hash: str, phase: str, mode: str,
+                             model_version: str, max_age_seconds: float) -> Optional[List[str]]:
+        """Get the newest suggestions stored for a response cache key within max_age_seconds, counting the hit"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        key = (session_id, context_hash, phase, mode, model_version)
+        cursor.execute('''
+            SELECT id, generated_response
+            FROM gpt2_responses
+            WHERE session_id = ? AND context_hash = ? AND phase = ? AND mode = ? AND model_version = ?
+              AND generated_at = (
+                  SELECT MAX(generated_at) FROM gpt2_responses
+                  WHERE session_id = ? AND context_hash = ? AND phase = ? AND mode = ? AND model_version = ?
+              )
+              AND generated_at >= ?
+            ORDER BY id
+        ''', key + key + (datetime.now() - timedelta(seconds=max_age_seconds),))
+        
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany('UPDATE gpt2_responses SET cache_hits = cache_hits + 1 WHERE id = ?',
+                               [(row[0],) for row in rows])
+            conn.commit()
+        conn.close()
+        
+        return [row[1] for row in rows] if rows else None
+    
+    def save_cached_responses(self, session_id: str, context_hash: str, phase: str, mode: str,
+                              model_version: str, responses: List[str], context: List[Dict]) -> None:
+        """Store one batch of generated suggestions under a response cache key in one transaction"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        now = datetime.now()
+        cursor.executemany('''
+            INSERT INTO gpt2_responses
+            (session_id, context_messages, generated_response, response_type, model_version,
+             generated_at, context_hash, phase, mode)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(session_id, json.dumps(context), response, 'suggestion', model_version,
+               now, context_hash, phase, mode) for response in responses])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_response_cache_stats(self) -> Dict:
+        """Generated batches and cache hits over all cached suggestions"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM (
+                SELECT MAX(cache_hits) AS hits
+                FROM gpt2_responses
+                WHERE context_hash IS NOT NULL
+                GROUP BY session_id, context_hash, phase, mode, model_version, generated_at
+            )
+        ''')
+        generations, hits = cursor.fetchone()
+        conn.close()
+        
+        return {
+            'generations': generations,
+            'hits': hits,
+            'hit_rate': round(hits / (hits + generations), 4) if hits + generations else 0.0
+        }
+    
+    def get_session_watermark(self, session_id: str) -> Optional[Dict]:
+        """Get the last processed message hash, order and scrape position for a session"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT last_message_hash, last_message_order, last_message_position, updated_at
+            FROM chat_watermarks
+            WHERE session_id = ?
+        ''', (session_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row:
+            return {
+                'last_message_hash': row[0],
+                'last_message_order': row[1],
+                'last_message_position': row[2],
+                'updated_at': row[3]
+            }
+        return None
+    
+    def get_platform_watermarks(self, platform: str) -> Dict[str, Tuple[str, str, Optional[int]]]:
+        """Map each watermark hash on a platform to its (session_id, participant_name, scrape position)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT w.last_message_hash, s.session_id, s.participant_name, w.last_message_position
+            FROM chat_watermarks w
+            JOIN chat_sessions s ON s.session_id = w.session_id
+            WHERE s.chat_platform = ?
+            ORDER BY s.last_activity ASC
+        ''', (platform,))
+        
+        # most recently active session wins when two share a watermark
+        watermarks = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+        conn.close()
+        return watermarks
+    
+    def save_session_watermark(self, session_id: str, last_message_hash: str,
+                               last_message_position: Optional[int] = None) -> None:
+        """Move a session's watermark to its newest stored message"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO chat_watermarks (session_id, last_message_hash, last_message_order,
+                                         last_message_position, updated_at)
+            VALUES (?, ?, (SELECT COALESCE(MAX(message_order), 0) FROM chat_messages WHERE session_id = ?), ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                last_message_hash = excluded.last_message_hash,
+                last_message_order = excluded.last_message_order,
+                last_message_position = excluded.last_message_position,
+                updated_at = excluded.updated_at
+        ''', (session_id, last_message_hash, session_id, last_message_position, datetime.now()))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_cached_phase(self, context_hash: str, model_version: str) -> Optional[Dict]:
+        """Get a stored phase prediction for a context hash and model version"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT phase, confidence, probabilities
+            FROM phase_cache
+            WHERE context_hash = ? AND model_version = ?
+        ''', (context_hash, model_version))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row:
+            return {
+                'phase': row[0],
+                'confidence': row[1],
+                'all_probabilities': json.loads(row[2]) if row[2] else None
+            }
+        return None
+    
+    def save_cached_phase(self, context_hash: str, model_version: str, phase: str,
+                          confidence: float, probabilities: Optional[Dict] = None) -> None:
+        """Store a phase prediction for a context hash and model version"""
+        self.save_cached_phases([(context_hash, model_version, phase, confidence, probabilities)])
+    
+    def save_cached_phases(self, entries: List[tuple]) -> None:
+        """Store (context_hash, model_version, phase, confidence, probabilities) entries in one transaction"""
+        if not entries:
+            return
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        now = datetime.now()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO phase_cache
+            (context_hash, model_version, phase, confidence, probabilities, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(context_hash, model_version, phase, confidence,
+               json.dumps(probabilities) if probabilities else None, now)
+              for context_hash, model_version, phase, confidence, probabilities in entries])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_processed_chat_files(self) -> Dict[str, Dict]:
+        """Get latest fingerprint of every processed chat file, keyed by path"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT file_path, file_hash, file_size, file_mtime
+            FROM processed_chat_files
+            ORDER BY id ASC
+        ''')
+        
+        processed = {}
+        for row in cursor.fetchall():
+            processed[row[0]] = {
+                'file_hash': row[1],
+                'file_size': row[2],
+                'file_mtime': row[3]
+            }
+        
+        conn.close()
+        return processed
+    
+    def is_chat_file_processed(self, file_path: str, file_hash: str) -> bool:
+        """Check if this exact file content was already processed"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT 1 FROM processed_chat_files
+            WHERE file_path = ? AND file_hash = ?
+            LIMIT 1
+        ''', (file_path, file_hash))
+        
+        found = cursor.fetchone() is not None
+        conn.close()
+        return found
+    
+    def mark_chat_file_processed(self, file_path: str, file_hash: str, file_size: int,
+                                 file_mtime: float, session_id: Optional[str], status: str) -> None:
+        """Record that a chat file was processed (status: processed, empty or error)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO processed_chat_files
+            (file_path, file_hash, file_size, file_mtime, session_id, status, processed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (file_path, file_hash, file_size, file_mtime, session_id, status, datetime.now()))
+        
+        conn.commit()
+        conn.close()
+    
     def get_dashboard_data(self) -> Dict:
         """Get data for chat dashboard"""
         conn = sqlite3.connect(self.db_path)
@@ -377,6 +702,209 @@ class ChatDatabase:
             print(f"[DB ERROR] Failed to update phase: {e}")
             return False
     
+    def get_sessions_pending_phase(self, limit: int = 10) -> List[Dict]:
+        """Get active sessions with messages newer than their phase, with recent messages, in one query"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        # scraped_at is UTC (CURRENT_TIMESTAMP), phase_updated_at is local time (datetime.now());
+        # both compare at second precision, so same-second messages count as new (re-check hits the phase cache)
+        # messages per session in the same order as get_recent_messages
+        cursor.execute('''
+            WITH pending AS (
+                SELECT s.session_id
+                FROM chat_sessions s
+                WHERE s.status = 'active'
+                  AND EXISTS (
+                      SELECT 1 FROM chat_messages m
+                      WHERE m.session_id = s.session_id
+                        AND (s.phase_updated_at IS NULL
+                             OR datetime(m.scraped_at) >= datetime(s.phase_updated_at, 'utc'))
+                  )
+            ),
+            ranked AS (
+                SELECT m.session_id, m.message_text, m.sender, m.timestamp, m.sender_type,
+                       ROW_NUMBER() OVER (PARTITION BY m.session_id ORDER BY m.timestamp DESC) AS rn
+                FROM chat_messages m
+                JOIN pending p ON p.session_id = m.session_id
+            )
+            SELECT session_id, message_text, sender, timestamp, sender_type
+            FROM ranked
+            WHERE rn <= ?
+            ORDER BY session_id, rn DESC
+        ''', (limit,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        sessions = {}
+        for row in rows:
+            sessions.setdefault(row[0], []).append({
+                'text': row[1],
+                'sender': row[2],
+                'timestamp': row[3],
+                'sender_type': row[4]
+            })
+        
+        return [{'session_id': session_id, 'messages': messages} for session_id, messages in sessions.items()]
+    
+    def update_session_phases(self, updates: List[tuple]) -> int:
+        """Update (session_id, phase, confidence) for many sessions in one transaction"""
+        if not updates:
+            return 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            now = datetime.now()
+            cursor.executemany('''
+                UPDATE chat_sessions 
+                SET phase = ?, phase_confidence = ?, phase_updated_at = ?
+                WHERE session_id = ?
+            ''', [(phase, confidence, now, session_id) for session_id, phase, confidence in updates])
+            updated = cursor.rowcount
+            conn.commit()
+            print(f"[DB] Updated phase of {updated} sessions")
+            return updated
+        except Exception as e:
+            conn.rollback()
+            print(f"[DB ERROR] Failed to update phases: {e}")
+            return 0
+        finally:
+            conn.close()
+    
+    def get_phase_tracker_state(self, session_id: str) -> Optional[Dict]:
+        """Get stored phase tracker belief of a session"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT model_version, last_message_order, belief
+            FROM phase_tracker_state
+            WHERE session_id = ?
+        ''', (session_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row:
+            return {
+                'model_version': row[0],
+                'last_message_order': row[1],
+                'belief': json.loads(row[2])
+            }
+        return None
+    
+    def get_messages_for_tracking(self, session_id: str, after_order: Optional[int] = None,
+                                  limit: int = 10) -> List[Dict]:
+        """Get messages in order: last `limit` messages, or from after_order on (that message included as context)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        if after_order is None:
+            cursor.execute('''
+                SELECT message_id, message_order, message_text, sender, sender_type
+                FROM chat_messages
+                WHERE session_id = ?
+                ORDER BY message_order DESC
+                LIMIT ?
+            ''', (session_id, limit))
+            rows = list(reversed(cursor.fetchall()))
+        else:
+            cursor.execute('''
+                SELECT message_id, message_order, message_text, sender, sender_type
+                FROM chat_messages
+                WHERE session_id = ? AND message_order >= ?
+                ORDER BY message_order
+            ''', (session_id, after_order))
+            rows = cursor.fetchall()
+        conn.close()
+        
+        return [{
+            'message_id': row[0],
+            'order': row[1],
+            'text': row[2],
+            'sender': row[3],
+            'sender_type': row[4]
+        } for row in rows]
+    
+    def get_message_phase_scores(self, message_ids: List[str], model_version: str) -> Dict[str, Dict]:
+        """Get stored phase probabilities of messages, keyed by message_id"""
+        if not message_ids:
+            return {}
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        placeholders = ','.join('?' * len(message_ids))
+        cursor.execute(f'''
+            SELECT message_id, probabilities
+            FROM message_phase_scores
+            WHERE model_version = ? AND message_id IN ({placeholders})
+        ''', (model_version, *message_ids))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return {row[0]: json.loads(row[1]) for row in rows}
+    
+    def get_message_phase_sequences(self, model_version: str) -> List[List[Dict]]:
+        """Get scored message probabilities per session in message order (for fitting transitions)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT m.session_id, s.probabilities
+            FROM message_phase_scores s
+            JOIN chat_messages m ON m.message_id = s.message_id
+            WHERE s.model_version = ?
+            ORDER BY m.session_id, m.message_order
+        ''', (model_version,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        sequences = {}
+        for row in rows:
+            sequences.setdefault(row[0], []).append(json.loads(row[1]))
+        return list(sequences.values())
+    
+    def save_phase_tracking(self, session_id: str, model_version: str, last_message_order: int,
+                            belief: Dict, phase: str, confidence: float,
+                            message_scores: Optional[Dict[str, Dict]] = None) -> bool:
+        """Store new message scores, tracker belief and session phase in one transaction"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            now = datetime.now()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO message_phase_scores
+                (message_id, model_version, probabilities, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', [(message_id, model_version, json.dumps(probabilities), now)
+                  for message_id, probabilities in (message_scores or {}).items()])
+            cursor.execute('''
+                INSERT OR REPLACE INTO phase_tracker_state
+                (session_id, model_version, last_message_order, belief, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (session_id, model_version, last_message_order, json.dumps(belief), now))
+            cursor.execute('''
+                UPDATE chat_sessions 
+                SET phase = ?, phase_confidence = ?, phase_updated_at = ?
+                WHERE session_id = ?
+            ''', (phase, confidence, now, session_id))
+            updated = cursor.rowcount > 0
+            conn.commit()
+            if updated:
+                print(f"[DB] Updated session {session_id} with tracked phase: {phase} ({confidence:.1%})")
+            else:
+                print(f"[DB WARN] Session {session_id} not found for phase update")
+            return updated
+        except Exception as e:
+            conn.rollback()
+            print(f"[DB ERROR] Failed to save phase tracking: {e}")
+            return False
+        finally:
+            conn.close()
+    
     def get_session_with_phase(self, session_id: str) -> Optional[Dict]:
         """Get session including detected phase"""
         conn = sqlite3.connect(self.db_path)
@@ -83,9 +83,44 @@ class JobDatabase:
                 skills TEXT,  -- JSON array of skills
                 description TEXT,
                 parsed_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                parser_version TEXT,  -- data_parser version that produced the row
                 FOREIGN KEY (scrape_id) REFERENCES scraped_data (id)
             )
         ''')
+        # databases created before parser versioning need the column added
+        cursor.execute('PRAGMA table_info(jobs)')
+        job_columns = [col[1] for col in cursor.fetchall()]
+        if 'parser_version' not in job_columns:
+            cursor.execute('ALTER TABLE jobs ADD COLUMN parser_version TEXT')
+
+        # ============== reparse checkpoints =================
+        # Table for resumable re-parse runs over scraped_data
+        # 1. parser_version: parser version the run is applying
+        # 2. last_scrape_id: highest scraped_data id whose jobs are committed
+        # 3. jobs_upserted: running total of jobs written by the run
+        # 4. updated_timestamp: when the checkpoint last moved
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reparse_checkpoints (
+                parser_version TEXT PRIMARY KEY,
+                last_scrape_id INTEGER NOT NULL DEFAULT 0,
+                jobs_upserted INTEGER DEFAULT 0,
+                updated_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Table for scrapes a reparse run failed on, retried before the run resumes
+        # 1. parser_version + scrape_id: failed page for that parser version
+        # 2. error: last parse error
+        # 3. attempts: how many runs failed on it
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reparse_failures (
+                parser_version TEXT NOT NULL,
+                scrape_id INTEGER NOT NULL,
+                error TEXT,
+                attempts INTEGER DEFAULT 1,
+                updated_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (parser_version, scrape_id)
+            )
+        ''')
         # ============== proposal data =================
         # Table for parsed proposal data
         # 1. scrape_id: foreign key to scraped_data
@@ -272,6 +307,26 @@ class JobDatabase:
         conn.close()
         return cover_letter_id
     
+    def add_cover_letters(self, entries: List[tuple]) -> List[int]:
+        """Add (job_id, ai_provider, cover_letter_text, notes) cover letters in one transaction"""
+        if not entries:
+            return []
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cover_letter_ids = []
+            for job_id, ai_provider, cover_letter_text, notes in entries:
+                cursor.execute('''INSERT INTO cover_letters (job_id, ai_provider, cover_letter_text, notes)
+                                 VALUES (?, ?, ?, ?)''', (job_id, ai_provider, cover_letter_text, notes))
+                cover_letter_ids.append(cursor.lastrowid)
+            conn.commit()
+            return cover_letter_ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
     def get_cover_letters_for_job(self, job_id: int) -> List[Dict]:
         """Get all cover letters for a specific job"""
         conn = sqlite3.connect(self.db_path)
@@ -615,6 +670,153 @@ class JobDatabase:
                 continue
         return jobs_added
     
+    # ======================== ♻️🪣 functions for versioned re-parse ========================
+    # upsert jobs re-parsed from one scraped_data row and move the checkpoint
+    # 1. rows written under an older, unstable job_uid (see _adopt_legacy_job) take the new uid
+    # 2. insert each job or update the existing row with the same job_uid
+    # 3. tag every row with the parser version that produced it
+    # 4. record a failed page for retry (error set) or clear it once it parses
+    # 5. advance the checkpoint in the same transaction so a crash never skips a scrape
+    def upsert_reparsed_jobs(self, scrape_id: int, jobs: List[Dict], parser_version: str,
+                             error: Optional[str] = None) -> int:
+        """Upsert re-parsed jobs for one scrape and advance the reparse checkpoint"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        jobs_upserted = 0
+        for job_data in jobs:
+            if not job_data.get('job_uid') or not job_data.get('title'):
+                continue
+            job_info = job_data.get('job_info', {})
+            self._adopt_legacy_job(cursor, job_data)
+            cursor.execute('''
+                INSERT INTO jobs (scrape_id, job_uid, job_title, job_url, posted_time,
+                                  job_type, experience_level, budget, hourly_rate_min, hourly_rate_max,
+                                  duration, skills, description, parser_version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_uid) DO UPDATE SET
+                    scrape_id = excluded.scrape_id,
+                    job_title = excluded.job_title,
+                    job_url = excluded.job_url,
+                    posted_time = excluded.posted_time,
+                    job_type = excluded.job_type,
+                    experience_level = excluded.experience_level,
+                    budget = excluded.budget,
+                    hourly_rate_min = excluded.hourly_rate_min,
+                    hourly_rate_max = excluded.hourly_rate_max,
+                    duration = excluded.duration,
+                    skills = excluded.skills,
+                    description = excluded.description,
+                    parser_version = excluded.parser_version
+            ''', (
+                scrape_id,
+                job_data.get('job_uid'),
+                job_data.get('title'),
+                job_data.get('url'),
+                job_data.get('posted_time'),
+                job_info.get('type'),
+                job_info.get('experience_level'),
+                job_info.get('budget'),
+                job_info.get('hourly_rate_min'),
+                job_info.get('hourly_rate_max'),
+                job_info.get('duration'),
+                json.dumps(job_data.get('skills', [])),
+                job_data.get('description'),
+                parser_version
+            ))
+            jobs_upserted += 1
+
+        if error:
+            cursor.execute('''
+                INSERT INTO reparse_failures (parser_version, scrape_id, error, attempts, updated_timestamp)
+                VALUES (?, ?, ?, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT(parser_version, scrape_id) DO UPDATE SET
+                    error = excluded.error,
+                    attempts = attempts + 1,
+                    updated_timestamp = CURRENT_TIMESTAMP
+            ''', (parser_version, scrape_id, error))
+        else:
+            cursor.execute('DELETE FROM reparse_failures WHERE parser_version = ? AND scrape_id = ?',
+                           (parser_version, scrape_id))
+
+        cursor.execute('''
+            INSERT INTO reparse_checkpoints (parser_version, last_scrape_id, jobs_upserted, updated_timestamp)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(parser_version) DO UPDATE SET
+                last_scrape_id = MAX(last_scrape_id, excluded.last_scrape_id),
+                jobs_upserted = jobs_upserted + excluded.jobs_upserted,
+                updated_timestamp = CURRENT_TIMESTAMP
+        ''', (parser_version, scrape_id, jobs_upserted))
+
+        conn.commit()
+        conn.close()
+        return jobs_upserted
+
+    # give an existing row from an older parse the job's new uid so the upsert updates it
+    # 1. only for derived uids (db_{scrape_id}_N): older runs stored the same job as
+    #    db_{timestamp}_{i}_{j}, generic_N or python_org_{timestamp}_N, often with scrape_id 1
+    # 2. match on title + url, the fields a parser fix is least likely to change
+    # 3. skip when a row with the new uid already exists (the upsert updates that one)
+    def _adopt_legacy_job(self, cursor, job_data: Dict):
+        job_uid = job_data['job_uid']
+        if not job_uid.startswith('db_'):
+            return
+        cursor.execute('SELECT 1 FROM jobs WHERE job_uid = ?', (job_uid,))
+        if cursor.fetchone():
+            return
+        cursor.execute('''
+            SELECT id FROM jobs
+            WHERE (job_uid GLOB 'db_*_*_*_*' OR job_uid GLOB 'generic_*' OR job_uid GLOB 'python_org_*')
+              AND job_title = ? AND COALESCE(job_url, '') = ?
+            ORDER BY id ASC
+            LIMIT 1
+        ''', (job_data.get('title'), job_data.get('url') or ''))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute('UPDATE jobs SET job_uid = ? WHERE id = ?', (job_uid, row[0]))
+
+    def get_reparse_failures(self, parser_version: str) -> List[int]:
+        """Get scraped_data ids a reparse run failed on and has not parsed since"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT scrape_id FROM reparse_failures WHERE parser_version = ? ORDER BY scrape_id',
+                       (parser_version,))
+        scrape_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return scrape_ids
+
+    def clear_reparse_failures(self, parser_version: str, scrape_ids: List[int]) -> int:
+        """Forget failed pages that no longer need a retry (row deleted or no HTML left)"""
+        if not scrape_ids:
+            return 0
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('DELETE FROM reparse_failures WHERE parser_version = ? AND scrape_id = ?',
+                           [(parser_version, scrape_id) for scrape_id in scrape_ids])
+        cleared = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return cleared
+
+    def get_reparse_checkpoint(self, parser_version: str) -> int:
+        """Get the last scraped_data id committed by a reparse run (0 if none)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT last_scrape_id FROM reparse_checkpoints WHERE parser_version = ?',
+                       (parser_version,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else 0
+
+    def reset_reparse_checkpoint(self, parser_version: str):
+        """Forget reparse progress so the next run starts from the oldest scrape"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM reparse_checkpoints WHERE parser_version = ?', (parser_version,))
+        cursor.execute('DELETE FROM reparse_failures WHERE parser_version = ?', (parser_version,))
+        conn.commit()
+        conn.close()
+
     # ======================== 🛸➕🪣 function to export data to JSON ========================
     def export_to_json(self, output_file: str):
         """Export all data to JSON file"""
@@ -4,7 +4,9 @@
 
 param(
     [string]$SessionId = "latest",
-    [string]$Output = "json"
+    [string]$Output = "json",
+    [switch]$AllActive,
+    [switch]$Incremental
 )
 
 # Get current directory and Python executable from venv
@@ -24,6 +26,14 @@ Write-Host ""
 
 # Build command with full path
 $command = "$pythonExe `"$scriptPath`" --session `"$SessionId`" --output `"$Output`""
+# every active session with new messages in one batch
+if ($AllActive) {
+    $command += " --all-active"
+}
+# score only new client messages, HMM-smoothed session phase
+if ($Incremental) {
+    $command += " --incremental"
+}
 
 Write-Host "Command: $command" -ForegroundColor Green
 Write-Host ""
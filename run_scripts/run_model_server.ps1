@@ -0,0 +1,25 @@
+# PowerShell Script: Resident Model Server
+# Loads BERT phase detector, chat GPT-2 and cover letter GPT-2 once
+# Phase detector, response generator and cover letter scripts call it instead of loading models
+
+param(
+    [int]$Port = 8765,
+    [string]$Preload = "phase,chat,cover_letter"
+)
+
+# Get project root and Python executable from venv
+$projectRoot = Split-Path $PSScriptRoot -Parent
+$venvPython = Join-Path $projectRoot "venv\Scripts\python.exe"
+$pythonExe = if (Test-Path $venvPython) { $venvPython } else { "python" }
+$scriptPath = Join-Path $projectRoot "scripts\model_server.py"
+
+Write-Host "============================================" -ForegroundColor Cyan
+Write-Host "RESIDENT MODEL SERVER" -ForegroundColor Cyan
+Write-Host "============================================" -ForegroundColor Cyan
+Write-Host "Port: $Port" -ForegroundColor Yellow
+Write-Host "Preload: $Preload" -ForegroundColor Yellow
+Write-Host "Script Path: $scriptPath" -ForegroundColor Yellow
+Write-Host ""
+
+# Runs until stopped with Ctrl+C
+& $pythonExe $scriptPath --port $Port --preload $Preload
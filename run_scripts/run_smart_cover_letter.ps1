@@ -1,3 +1,9 @@
+# -Batch N / -AllPending work through the backlog with one model load
+param(
+    [int]$Batch = 0,
+    [switch]$AllPending
+)
+
 $projectRoot = Split-Path $PSScriptRoot -Parent
 # Smart Cover Letter Generator
 # ===========================
@@ -22,7 +28,14 @@ try {
     }
     
     # Run the smart cover letter generator from current directory
-    $result = python scripts\smart_cover_letter_generator.py
+    $arguments = @()
+    if ($AllPending) {
+        $arguments += "--all-pending"
+    }
+    elseif ($Batch -gt 0) {
+        $arguments += "--batch", $Batch
+    }
+    $result = python scripts\smart_cover_letter_generator.py @arguments
     
     # LASTEXITCODE check and output based on result
     if ($LASTEXITCODE -eq 0) {
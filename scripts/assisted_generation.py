@@ -0,0 +1,82 @@
+"""
+Assisted Generation
+Optional draft model for GPT-2 assisted (speculative) decoding: the draft proposes a few
+tokens, the main model checks them in one forward pass and keeps the ones it agrees with,
+so greedy output stays the main model's while it runs fewer sequential forward passes
+"""
+import os
+import copy
+
+# layers of the main model kept by "layers" without a count
+DEFAULT_DRAFT_LAYERS = 2
+
+# assistant spec per generator, explicit argument wins over the environment variable
+# "distilgpt2" (or any GPT-2 path / hub name with the same vocabulary) loads a separate draft,
+# "layers:N" copies N evenly spaced layers of the main model, empty / None turns it off
+def assistant_spec(flag=None, env_name='CHAT_ASSISTANT_MODEL'):
+    if flag is not None:
+        return flag or None
+    return os.environ.get(env_name) or None
+
+# main model layers kept in the draft, evenly spaced and always keeping first and last
+# (2 of 12 -> 0, 11, 4 of 12 -> 0, 4, 7, 11)
+def select_draft_layers(main_layers, draft_layers):
+    if draft_layers == 1:
+        return [main_layers - 1]
+    return [round(i * (main_layers - 1) / (draft_layers - 1)) for i in range(draft_layers)]
+
+# draft from the main model: same embeddings and head (shared, not copied), copied final norm
+# and selected transformer blocks, works for fp32 and INT8 models
+# the main model is only read - it can be generating in another thread (model server)
+# 1. empty skeleton with n_layer=N on the meta device (no weights allocated)
+# 2. put the main model's embeddings / head and copies of the selected blocks into it
+# 3. renumber the copied blocks' attention layer_idx 0..N-1, the draft's KV cache is
+#    indexed by it (copies of main layers 0 and 11 would otherwise write slots 0 and 11)
+def trimmed_layer_copy(model, num_layers):
+    import torch
+    import torch.nn as nn
+    transformer = model.transformer
+    layer_ids = select_draft_layers(len(transformer.h), num_layers)
+    config = copy.deepcopy(model.config)
+    config.n_layer = num_layers
+    with torch.device('meta'):
+        draft = type(model)(config)
+    draft.transformer.wte = transformer.wte
+    draft.transformer.wpe = transformer.wpe
+    draft.transformer.h = nn.ModuleList(copy.deepcopy(transformer.h[i]) for i in layer_ids)
+    for new_idx, block in enumerate(draft.transformer.h):
+        if hasattr(block.attn, 'layer_idx'):
+            block.attn.layer_idx = new_idx
+    draft.transformer.ln_f = copy.deepcopy(transformer.ln_f)
+    draft.lm_head = model.lm_head
+    draft.generation_config = copy.deepcopy(model.generation_config)
+    if any(t.is_meta for t in list(draft.parameters()) + list(draft.buffers())):
+        raise RuntimeError('Draft model has weights left on the meta device')
+    draft.eval()
+    print(f"[INFO] Draft model: {num_layers} layers copied from main model layers {layer_ids}")
+    return draft
+
+# load the draft model for a spec, returns (draft, from_registry)
+# 1. "layers:N" -> trimmed_layer_copy of the main model
+# 2. otherwise the named model from the shared model registry
+# 3. a draft with a different vocabulary (our chat model adds special tokens) cannot verify
+#    token by token, fall back to a trimmed copy of the main model
+def load_assistant_model(spec, main_model, device='cpu', quantized=False):
+    if spec.startswith('layers'):
+        _, _, count = spec.partition(':')
+        return trimmed_layer_copy(main_model, int(count or DEFAULT_DRAFT_LAYERS)), False
+    from scripts.model_registry import get_registry
+    draft, _ = get_registry().get_gpt2(spec, quantized=quantized, device=device)
+    if draft.config.vocab_size != main_model.config.vocab_size:
+        get_registry().release(draft)
+        print(f"⚠️ Draft {spec} vocabulary ({draft.config.vocab_size}) differs from the main model "
+              f"({main_model.config.vocab_size}), using a trimmed layer copy instead")
+        return trimmed_layer_copy(main_model, DEFAULT_DRAFT_LAYERS), False
+    print(f"[INFO] Draft model: {spec}")
+    return draft, True
+
+# give a registry draft back (trimmed copies are simply dropped)
+def release_assistant_model(draft, from_registry):
+    if draft is not None and from_registry:
+        from scripts.model_registry import get_registry
+        get_registry().release(draft)
@@ -0,0 +1,102 @@
+"""
+Assisted Generation Benchmark
+Tokens/s of greedy GPT-2 decoding with and without a draft model (assisted decoding)
+for the chat and cover letter generators, and whether both produce identical tokens
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import torch
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.smart_chat_response import SmartChatResponse, build_ai_prompt
+from scripts.smart_cover_letter_generator import SmartCoverLetterGenerator
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+COVER_LETTER_DATA = os.path.join(project_root, 'ai', 'cover_letter_trainer', 'training_data', 'training_data.json')
+
+# main model, draft model, prompts and the logits settings the generator uses
+def chat_setup(assistant, limit):
+    generator = SmartChatResponse.ChatGPT2Generator(prefix_cache=False, assistant=assistant)
+    with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+        prompts = [build_ai_prompt(item['phase'], item['context']) for item in json.load(f)[:limit]]
+    return generator, prompts, {'no_repeat_ngram_size': 2}
+
+def cover_letter_setup(assistant, limit):
+    generator = SmartCoverLetterGenerator(assistant=assistant)
+    if not generator.load_model_temporarily():
+        sys.exit(1)
+    with open(COVER_LETTER_DATA, 'r', encoding='utf-8') as f:
+        prompts = [generator._build_prompt(item) for item in json.load(f)[:limit]]
+    return generator, prompts, {'repetition_penalty': 1.1}
+
+# greedy decode of every prompt, returns new token ids per prompt and the summed time
+def decode(generator, prompts, assistant_model, max_new_tokens, generate_kwargs):
+    outputs, seconds = [], 0.0
+    for prompt in prompts:
+        input_ids = generator.tokenizer.encode(prompt, return_tensors='pt').to(generator.model.device)
+        started = time.perf_counter()
+        with torch.no_grad():
+            output = generator.model.generate(
+                input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                assistant_model=assistant_model,
+                pad_token_id=generator.tokenizer.eos_token_id,
+                **generate_kwargs
+            )
+        seconds += time.perf_counter() - started
+        outputs.append(output[0, input_ids.shape[1]:].tolist())
+    tokens = sum(len(ids) for ids in outputs)
+    return outputs, {
+        'new_tokens': tokens,
+        'seconds': round(seconds, 2),
+        'tokens_per_second': round(tokens / seconds, 1) if seconds else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark assisted (draft model) GPT-2 decoding')
+    parser.add_argument('--target', choices=['chat', 'cover_letter'], default='chat', help='Generator to benchmark (default: chat)')
+    parser.add_argument('--assistant', default='distilgpt2',
+                        help='Draft model: GPT-2 path / hub name or layers:N (default: distilgpt2)')
+    parser.add_argument('--limit', type=int, default=10, help='Number of prompts (default: 10)')
+    parser.add_argument('--max-new-tokens', type=int, default=80, help='New tokens per prompt (default: 80)')
+    args = parser.parse_args()
+
+    setup = chat_setup if args.target == 'chat' else cover_letter_setup
+    generator, prompts, generate_kwargs = setup(args.assistant, args.limit)
+    if generator.assistant_model is None:
+        print("❌ Draft model not loaded")
+        sys.exit(1)
+
+    # warm-up in both modes, then measure
+    decode(generator, prompts[:1], None, 5, generate_kwargs)
+    decode(generator, prompts[:1], generator.assistant_model, 5, generate_kwargs)
+    baseline_ids, baseline = decode(generator, prompts, None, args.max_new_tokens, generate_kwargs)
+    assisted_ids, assisted = decode(generator, prompts, generator.assistant_model, args.max_new_tokens, generate_kwargs)
+
+    report = {
+        'target': args.target,
+        'assistant': args.assistant,
+        'prompts': len(prompts),
+        'device': str(generator.model.device),
+        'main_layers': generator.model.config.n_layer,
+        'draft_layers': generator.assistant_model.config.n_layer,
+        'greedy': baseline,
+        'assisted': assisted,
+        'speedup': round(baseline['seconds'] / assisted['seconds'], 2) if assisted['seconds'] else None,
+        'identical_outputs': round(sum(a == b for a, b in zip(baseline_ids, assisted_ids)) / len(prompts), 4)
+    }
+
+    print("=" * 60)
+    print("ASSISTED GENERATION BENCHMARK")
+    print("=" * 60)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Chat AI Candidates Benchmark
+Latency of N AI options from one batched generate call (generate_responses) versus
+N separate generate_single_response calls, on AI prompts built from
+phase_training_data.json contexts
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import torch
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.smart_chat_response import SmartChatResponse, build_ai_prompt
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+
+# mean ms per prompt of fn(prompt), same seed per prompt
+def timed(fn, prompts):
+    latencies, outputs = [], []
+    for i, prompt in enumerate(prompts):
+        torch.manual_seed(i)
+        started = time.perf_counter()
+        outputs.append(fn(prompt))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return round(sum(latencies) / len(latencies), 1), outputs
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched AI candidates against separate calls')
+    parser.add_argument('--limit', type=int, default=10, help='Number of prompts (default: 10)')
+    parser.add_argument('--options', type=int, default=3, help='Candidates per prompt (default: 3)')
+    parser.add_argument('--max-length', type=int, default=80, help='New tokens per response (default: 80)')
+    args = parser.parse_args()
+
+    with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+        data = json.load(f)[:args.limit]
+    prompts = [build_ai_prompt(item['phase'], item['context']) for item in data]
+
+    generator = SmartChatResponse.ChatGPT2Generator()
+    generator.generate_single_response(prompts[0], max_length=5)
+
+    single_ms, _ = timed(lambda p: generator.generate_single_response(p, args.max_length), prompts)
+    separate_ms, _ = timed(
+        lambda p: [generator.generate_single_response(p, args.max_length) for _ in range(args.options)], prompts)
+    batched_ms, batched = timed(
+        lambda p: generator.generate_responses(p, num_return_sequences=args.options, max_length=args.max_length), prompts)
+
+    report = {
+        'prompts': len(prompts),
+        'options': args.options,
+        'device': str(generator.device),
+        'single_ms': single_ms,
+        'separate_calls_ms': separate_ms,
+        'batched_ms': batched_ms,
+        'batched_vs_single': round(batched_ms / single_ms, 2),
+        'batched_speedup_vs_separate': round(separate_ms / batched_ms, 2),
+        'mean_unique_candidates': round(sum(len(c) for c in batched) / len(batched), 2),
+        'example': batched[0]
+    }
+
+    print("=" * 60)
+    print("CHAT AI CANDIDATES BENCHMARK")
+    print("=" * 60)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Chat Prompt Prefix Cache Benchmark
+Time-to-first-token and total generation latency of ChatGPT2Generator with and
+without reuse of the cached static prompt prefix, on AI prompts built from
+phase_training_data.json contexts
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import torch
+from transformers.generation.streamers import BaseStreamer
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.smart_chat_response import SmartChatResponse, build_ai_prompt
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+
+# streamer that records when the first generated token arrives
+# generate calls put() once with the prompt, then once per new token
+class FirstTokenTimer(BaseStreamer):
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_ms = None
+        self.puts = 0
+
+    def put(self, value):
+        self.puts += 1
+        if self.puts == 2 and self.first_token_ms is None:
+            self.first_token_ms = (time.perf_counter() - self.started) * 1000
+
+    def end(self):
+        pass
+
+# p50 / p95 / mean of latencies in ms
+def latency_summary(latencies_ms):
+    ordered = sorted(latencies_ms)
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {
+        'p50_ms': round(percentile(50), 1),
+        'p95_ms': round(percentile(95), 1),
+        'mean_ms': round(sum(ordered) / len(ordered), 1)
+    }
+
+# generate for every prompt, same seed per prompt in both modes
+def run(generator, prompts, max_length):
+    ttft, total, new_tokens = [], [], []
+    for i, prompt in enumerate(prompts):
+        torch.manual_seed(i)
+        timer = FirstTokenTimer()
+        generator.generate_single_response(prompt, max_length=max_length, streamer=timer)
+        total.append((time.perf_counter() - timer.started) * 1000)
+        if timer.first_token_ms is not None:
+            ttft.append(timer.first_token_ms)
+        new_tokens.append(timer.puts - 1)
+    return {
+        'ttft': latency_summary(ttft) if ttft else None,
+        'total': latency_summary(total),
+        'mean_new_tokens': round(sum(new_tokens) / len(new_tokens), 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark static prompt prefix cache reuse')
+    parser.add_argument('--limit', type=int, default=20, help='Number of prompts (default: 20)')
+    parser.add_argument('--max-length', type=int, default=80, help='New tokens per response (default: 80)')
+    parser.add_argument('--quantized', action='store_true', help='Benchmark the INT8 model')
+    args = parser.parse_args()
+
+    with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+        data = json.load(f)[:args.limit]
+    prompts = [build_ai_prompt(item['phase'], item['context']) for item in data]
+
+    generator = SmartChatResponse.ChatGPT2Generator(quantized=args.quantized or None, prefix_cache=True)
+    if generator.prefix_cache is None:
+        print("❌ Prefix cache unavailable (transformers without DynamicCache)")
+        sys.exit(1)
+    prefix_cache = generator.prefix_cache
+    prompt_tokens = [len(generator.tokenizer.encode(prompt)) for prompt in prompts]
+
+    report = {
+        'prompts': len(prompts),
+        'prefix_tokens': len(generator.prefix_ids),
+        'mean_prompt_tokens': round(sum(prompt_tokens) / len(prompt_tokens), 1),
+        'device': str(generator.device)
+    }
+    # warm-up in both modes, then measure
+    for name, cache in (('full_prompt', None), ('prefix_reuse', prefix_cache)):
+        generator.prefix_cache = cache
+        generator.generate_single_response(prompts[0], max_length=5)
+        report[name] = run(generator, prompts, args.max_length)
+    generator.prefix_cache = prefix_cache
+
+    if report['full_prompt']['ttft'] and report['prefix_reuse']['ttft']:
+        report['ttft_speedup'] = round(report['full_prompt']['ttft']['mean_ms'] / report['prefix_reuse']['ttft']['mean_ms'], 2)
+    report['total_speedup'] = round(report['full_prompt']['total']['mean_ms'] / report['prefix_reuse']['total']['mean_ms'], 2)
+
+    print("=" * 60)
+    print("CHAT PROMPT PREFIX CACHE BENCHMARK")
+    print("=" * 60)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Generation Latency Budget Report
+Runs chat and cover letter generation in-process under the latency budget and reports
+p50 / p95 per generator against the target, with how often the budget stopped generation
+"""
+import os
+import sys
+import json
+import argparse
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.smart_chat_response import SmartChatResponse, build_ai_prompt
+from scripts.smart_cover_letter_generator import SmartCoverLetterGenerator
+from scripts.latency_budget import tracker, latency_budget_ms
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+COVER_LETTER_DATA = os.path.join(project_root, 'ai', 'cover_letter_trainer', 'training_data', 'training_data.json')
+
+def main():
+    parser = argparse.ArgumentParser(description='Report generation latency against the latency budget')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Latency budget / p95 target in ms (default: GENERATION_LATENCY_BUDGET_MS or 8000)')
+    parser.add_argument('--limit', type=int, default=20, help='Generations per generator (default: 20)')
+    parser.add_argument('--max-length', type=int, default=80, help='New chat tokens per response (default: 80)')
+    args = parser.parse_args()
+    budget_ms = latency_budget_ms(args.budget_ms)
+
+    with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+        prompts = [build_ai_prompt(item['phase'], item['context']) for item in json.load(f)[:args.limit]]
+    with open(COVER_LETTER_DATA, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+
+    chat = SmartChatResponse.ChatGPT2Generator()
+    chat.generate_single_response(prompts[0], max_length=5, budget_ms=0)
+    # warm-up call only seeds the step time estimate, it is not part of the report
+    tracker.samples.clear()
+    for prompt in prompts:
+        chat.generate_single_response(prompt, max_length=args.max_length, budget_ms=budget_ms)
+
+    cover_letter = SmartCoverLetterGenerator()
+    if cover_letter.load_model_temporarily():
+        for i in range(args.limit):
+            cover_letter.generate_cover_letter(jobs[i % len(jobs)], budget_ms=budget_ms)
+
+    print("=" * 60)
+    print("GENERATION LATENCY BUDGET REPORT")
+    print("=" * 60)
+    print(json.dumps(tracker.summary(budget_ms), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Phase Detector Batch Benchmark
+Times PhaseDetector.predict_batch against the old one-by-one loop
+that padded every context to max_length
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import torch
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.phase_detector import PhaseDetector, MAX_LENGTH
+
+SAMPLE_LINES = [
+    "client: Hi, are you available for a writing project?",
+    "freelancer: Yes, I am available. What are the main deliverables?",
+    "client: We need 10 articles about healthcare, around 1000 words each.",
+    "client: What is your rate per article?",
+    "freelancer: My rate is $40 per article, samples attached.",
+    "client: Can you deliver the first batch by Friday?",
+    "client: Each article needs an intro, three sections and a conclusion.",
+    "client: I sent the contract, please accept it."
+]
+
+# build n contexts of 1-10 lines like get_recent_messages(limit=10)
+def build_contexts(n_contexts, seed=42):
+    rng = random.Random(seed)
+    return ["\n".join(rng.choice(SAMPLE_LINES) for _ in range(rng.randint(1, 10)))
+            for _ in range(n_contexts)]
+
+# what predict_batch did before: one forward pass per context padded to max_length
+def legacy_predict_batch(detector, contexts):
+    results = []
+    for context in contexts:
+        encoding = detector.tokenizer(context, max_length=MAX_LENGTH, padding='max_length',
+                                      truncation=True, return_tensors='pt')
+        with torch.no_grad():
+            outputs = detector.model(encoding['input_ids'].to(detector.device),
+                                     encoding['attention_mask'].to(detector.device))
+        results.append(detector.id_to_phase[int(torch.argmax(outputs, dim=1).item())])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched phase detection')
+    parser.add_argument('--contexts', type=int, default=200, help='Number of contexts (default: 200)')
+    parser.add_argument('--batch-size', type=int, default=32, help='predict_batch batch size (default: 32)')
+    args = parser.parse_args()
+
+    detector = PhaseDetector()
+    contexts = build_contexts(args.contexts)
+
+    print("=" * 60)
+    print("PHASE DETECTOR BATCH BENCHMARK")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    legacy = legacy_predict_batch(detector, contexts)
+    legacy_seconds = time.perf_counter() - started
+
+    timings = {}
+    for sort_by_length in (False, True):
+        started = time.perf_counter()
+        batched = detector.predict_batch(contexts, batch_size=args.batch_size, sort_by_length=sort_by_length)
+        timings[sort_by_length] = time.perf_counter() - started
+
+    agreement = sum(a == b['phase'] for a, b in zip(legacy, batched)) / len(contexts)
+    result = {
+        'contexts': len(contexts),
+        'batch_size': args.batch_size,
+        'legacy_seconds': round(legacy_seconds, 3),
+        'batched_seconds': round(timings[False], 3),
+        'batched_sorted_seconds': round(timings[True], 3),
+        'speedup': round(legacy_seconds / timings[True], 2),
+        'agreement': round(agreement, 4)
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Phase Cascade Report
+Fast-path share, per-context latency distribution and agreement with BERT
+for the TF-IDF cascade on the held-out split of phase_training_data.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from sklearn.model_selection import train_test_split
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.onnx_phase_detector import load_phase_detector, default_model_dir
+from scripts.cascade_phase_detector import CascadePhaseDetector, FAST_METADATA_FILE
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+
+# p50 / p95 / max / mean of latencies in ms
+def latency_summary(latencies_ms):
+    ordered = sorted(latencies_ms)
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {
+        'p50_ms': round(percentile(50), 2),
+        'p95_ms': round(percentile(95), 2),
+        'max_ms': round(ordered[-1], 2),
+        'mean_ms': round(sum(ordered) / len(ordered), 2)
+    }
+
+# time detector.predict on every context one by one (the per-tick pattern)
+def timed_predictions(detector, contexts):
+    results, latencies = [], []
+    for context in contexts:
+        started = time.perf_counter()
+        results.append(detector.predict(context)['phase'])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description='Report on the TF-IDF / BERT phase cascade')
+    parser.add_argument('--model-dir', default=default_model_dir(), help='Trained model directory')
+    parser.add_argument('--backend', default=None, help='BERT backend: auto, onnx or torch (default: auto)')
+    parser.add_argument('--split', choices=['heldout', 'all'], default='heldout',
+                        help='Evaluate on held-out split of the trainers or on all examples (default: heldout)')
+    parser.add_argument('--threshold', type=float, default=None, help='Override calibrated threshold')
+    args = parser.parse_args()
+
+    with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    contexts = [item['context'] for item in data]
+    labels = [item['phase'] for item in data]
+    if args.split == 'heldout':
+        with open(os.path.join(args.model_dir, FAST_METADATA_FILE), 'r', encoding='utf-8') as f:
+            fast_metadata = json.load(f)
+        _, contexts, _, labels = train_test_split(
+            contexts, labels, test_size=fast_metadata['test_size'],
+            random_state=fast_metadata['random_state'], stratify=labels
+        )
+
+    bert = load_phase_detector(args.model_dir, args.backend, cascade=False)
+    # cascade escalates to the already loaded BERT so load time is not in the latencies
+    cascade = CascadePhaseDetector(args.model_dir, lambda: bert, threshold=args.threshold)
+    bert.predict(contexts[0])
+
+    bert_phases, bert_latencies = timed_predictions(bert, contexts)
+    cascade_phases, cascade_latencies = timed_predictions(cascade, contexts)
+
+    def accuracy(predicted):
+        return round(sum(p == l for p, l in zip(predicted, labels)) / len(labels), 4)
+
+    report = {
+        'split': args.split,
+        'samples': len(contexts),
+        'threshold': cascade.threshold,
+        'fast_fraction': round(cascade.stats['fast'] / len(contexts), 4),
+        'agreement_with_bert': round(sum(a == b for a, b in zip(cascade_phases, bert_phases)) / len(contexts), 4),
+        'bert_accuracy': accuracy(bert_phases),
+        'cascade_accuracy': accuracy(cascade_phases),
+        'bert_latency': latency_summary(bert_latencies),
+        'cascade_latency': latency_summary(cascade_latencies)
+    }
+
+    print("=" * 60)
+    print("PHASE CASCADE REPORT")
+    print("=" * 60)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
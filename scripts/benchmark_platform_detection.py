@@ -0,0 +1,81 @@
+"""
+Platform Detection Micro-Benchmark
+Times ChatParser._detect_platform_from_html against the old full-text scan
+on synthetic chats of growing length
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import tempfile
+import contextlib
+import io
+from bs4 import BeautifulSoup
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.chat_parser import ChatParser
+
+# build a chat page with n messages, platform only named in <head>
+def build_chat_html(n_messages):
+    messages = ''.join(
+        f'<div class="chat-message-row"><span class="message-author">Client</span>'
+        f'<div class="message-content">Message {i} about the article batch and deadline</div></div>'
+        for i in range(n_messages)
+    )
+    return (
+        '<html><head><title>Messages | Upwork</title>'
+        '<link rel="canonical" href="https://www.upwork.com/ab/messages/rooms/room_1"></head>'
+        f'<body><div class="messages-list">{messages}</div></body></html>'
+    )
+
+# what _detect_platform_from_html did before: materialize all page text
+def legacy_detect(soup, file_path):
+    html_text = soup.get_text().lower()
+    file_name = os.path.basename(file_path).lower()
+    for platform in ['upwork', 'linkedin', 'discord', 'teams', 'slack']:
+        if platform in html_text or platform in file_name:
+            return platform
+    return 'unknown'
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chat platform detection')
+    parser.add_argument('--sizes', default='100,1000,5000,20000',
+                        help='Comma separated message counts (default: 100,1000,5000,20000)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per size (default: 20)')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        chat_parser = ChatParser(os.path.join(work_dir, 'bench_chat.db'))
+
+    print("=" * 60)
+    print("PLATFORM DETECTION BENCHMARK")
+    print("=" * 60)
+    print(f"{'messages':>10} {'html KB':>10} {'legacy ms':>12} {'current ms':>12}")
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(',')]:
+        html = build_chat_html(size)
+        file_path = os.path.join(work_dir, 'chat_raw_bench.html')
+        soup = BeautifulSoup(html, 'html.parser')
+
+        legacy = min(timeit.repeat(lambda: legacy_detect(soup, file_path),
+                                   number=1, repeat=args.repeat))
+        current = min(timeit.repeat(lambda: chat_parser._detect_platform_from_html(soup, file_path, html),
+                                    number=1, repeat=args.repeat))
+
+        print(f"{size:>10} {len(html) // 1024:>10} {legacy * 1000:>12.3f} {current * 1000:>12.3f}")
+        results.append({
+            'messages': size,
+            'html_bytes': len(html),
+            'legacy_ms': round(legacy * 1000, 3),
+            'current_ms': round(current * 1000, 3)
+        })
+
+    print("=" * 60)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
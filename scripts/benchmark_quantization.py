@@ -0,0 +1,158 @@
+"""
+INT8 Quantization Comparison
+Compares fp32 and INT8 dynamic-quantized models on the existing training sets:
+latency, weights size, resident memory and accuracy / agreement with fp32
+"""
+import os
+import sys
+import gc
+import json
+import math
+import time
+import argparse
+import torch
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.phase_detector import PhaseDetector
+from scripts.model_quantization import model_size_mb, load_gpt2_quantized
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+CHAT_DATA = os.path.join(project_root, 'ai', 'chat_bot_trainer', 'training_data', 'training_data_parsed.json')
+COVER_LETTER_DATA = os.path.join(project_root, 'ai', 'cover_letter_trainer', 'training_data', 'training_data.json')
+CHAT_MODEL = os.path.join(project_root, 'ai', 'chat_bot_trainer', 'trained_models', 'final_chat_model', 'trained_chat_model_1.0')
+COVER_LETTER_MODEL = os.path.join(project_root, 'ai', 'cover_letter_trainer', 'trained_models', 'custom_cover_letter_model', 'final')
+
+# resident memory in MB, None when psutil is not installed
+def rss_mb():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+
+# run loader and report RSS growth next to the loaded model
+def measure_load(loader):
+    gc.collect()
+    before = rss_mb()
+    started = time.perf_counter()
+    model = loader()
+    load_seconds = time.perf_counter() - started
+    after = rss_mb()
+    rss_delta = round(after - before, 1) if before is not None else None
+    return model, round(load_seconds, 2), rss_delta
+
+# phase classifier: accuracy against labels and agreement between fp32 and int8
+def compare_phase(limit):
+    with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+        data = json.load(f)[:limit]
+    contexts = [item['context'] for item in data]
+    labels = [item['phase'] for item in data]
+
+    report = {'model': 'phase_classifier', 'samples': len(contexts)}
+    predictions = {}
+    for name, quantized in (('fp32', False), ('int8', True)):
+        detector, load_seconds, rss_delta = measure_load(lambda: PhaseDetector(quantized=quantized))
+        started = time.perf_counter()
+        results = detector.predict_batch(contexts)
+        latency_ms = (time.perf_counter() - started) * 1000 / len(contexts)
+        predictions[name] = [r['phase'] for r in results]
+        report[name] = {
+            'load_seconds': load_seconds,
+            'rss_delta_mb': rss_delta,
+            'weights_mb': model_size_mb(detector.model),
+            'ms_per_context': round(latency_ms, 2),
+            'accuracy': round(sum(p == l for p, l in zip(predictions[name], labels)) / len(labels), 4)
+        }
+        del detector
+    report['agreement'] = round(sum(a == b for a, b in zip(predictions['fp32'], predictions['int8'])) / len(labels), 4)
+    return report
+
+# texts from chat and cover letter training sets
+def load_gpt2_texts(kind, limit):
+    if kind == 'chat':
+        with open(CHAT_DATA, 'r', encoding='utf-8') as f:
+            conversations = json.load(f)
+        # parsed list of exchanges, or train_chat_gpt2 format with formatted_training_text
+        if isinstance(conversations, dict):
+            conversations = conversations.get('training_conversations', [])
+        texts = [c.get('formatted_training_text') or
+                 "\n".join(f"{e['speaker']}: {e['message']}" for e in c.get('exchanges', []))
+                 for c in conversations]
+    else:
+        with open(COVER_LETTER_DATA, 'r', encoding='utf-8') as f:
+            texts = [item['cover_letter'] for item in json.load(f)]
+    return [t for t in texts if t.strip()][:limit]
+
+# GPT-2: perplexity on training texts, next-token agreement with fp32 and generation latency
+def compare_gpt2(kind, model_path, limit, new_tokens):
+    from transformers import GPT2LMHeadModel
+    from scripts.fast_tokenizers import load_gpt2_tokenizer
+    if not os.path.exists(model_path):
+        model_path = 'gpt2'
+    tokenizer = load_gpt2_tokenizer(model_path)
+    texts = load_gpt2_texts(kind, limit)
+    encodings = [tokenizer(text, return_tensors='pt', truncation=True, max_length=256) for text in texts]
+
+    report = {'model': f'{kind}_gpt2', 'model_path': model_path, 'samples': len(texts)}
+    next_tokens = {}
+    loaders = {
+        'fp32': lambda: GPT2LMHeadModel.from_pretrained(model_path).eval(),
+        'int8': lambda: load_gpt2_quantized(model_path).eval()
+    }
+    for name, loader in loaders.items():
+        model, load_seconds, rss_delta = measure_load(loader)
+        losses, tokens = [], []
+        with torch.no_grad():
+            for encoding in encodings:
+                outputs = model(**encoding, labels=encoding['input_ids'])
+                losses.append(outputs.loss.item())
+                tokens.append(outputs.logits.argmax(dim=-1))
+            started = time.perf_counter()
+            for encoding in encodings:
+                prompt = encoding['input_ids'][:, :64]
+                model.generate(prompt, attention_mask=torch.ones_like(prompt), max_new_tokens=new_tokens,
+                               do_sample=False, pad_token_id=tokenizer.eos_token_id)
+            latency_ms = (time.perf_counter() - started) * 1000 / len(encodings)
+        next_tokens[name] = tokens
+        report[name] = {
+            'load_seconds': load_seconds,
+            'rss_delta_mb': rss_delta,
+            'weights_mb': model_size_mb(model),
+            'ms_per_generation': round(latency_ms, 1),
+            'perplexity': round(math.exp(sum(losses) / len(losses)), 2)
+        }
+        del model
+
+    matched = sum((a == b).sum().item() for a, b in zip(next_tokens['fp32'], next_tokens['int8']))
+    total = sum(a.numel() for a in next_tokens['fp32'])
+    report['next_token_agreement'] = round(matched / total, 4)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare fp32 and INT8 dynamic-quantized models')
+    parser.add_argument('--models', default='phase,chat,cover_letter',
+                        help='Comma separated: phase, chat, cover_letter (default: all)')
+    parser.add_argument('--limit', type=int, default=50, help='Max samples per training set (default: 50)')
+    parser.add_argument('--new-tokens', type=int, default=40, help='Tokens generated per GPT-2 sample (default: 40)')
+    args = parser.parse_args()
+    torch.set_grad_enabled(False)
+
+    print("=" * 60)
+    print("INT8 QUANTIZATION COMPARISON")
+    print("=" * 60)
+
+    reports = []
+    models = args.models.split(',')
+    if 'phase' in models:
+        reports.append(compare_phase(args.limit))
+    if 'chat' in models:
+        reports.append(compare_gpt2('chat', CHAT_MODEL, args.limit, args.new_tokens))
+    if 'cover_letter' in models:
+        reports.append(compare_gpt2('cover_letter', COVER_LETTER_MODEL, args.limit, args.new_tokens))
+
+    print(json.dumps(reports, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+CLI Startup Benchmark
+Import time (python -X importtime) and --help wall time of the chat / cover letter /
+phase CLIs, the heavy modules each one pulls in at startup, and optionally the same
+numbers for an older git revision to show the difference
+"""
+import os
+import sys
+import json
+import time
+import tarfile
+import tempfile
+import argparse
+import subprocess
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module imported at startup -> script run with --help
+CLIS = {
+    'scripts.smart_chat_response': 'scripts/smart_chat_response.py',
+    'scripts.smart_cover_letter_generator': 'scripts/smart_cover_letter_generator.py',
+    'scripts.standalone_phase_detector': 'scripts/standalone_phase_detector.py',
+    'ai': None
+}
+# modules that should only be imported once a model is needed
+HEAVY_MODULES = ('torch', 'transformers', 'nltk', 'sklearn', 'onnxruntime', 'openai', 'numpy')
+
+# parse -X importtime stderr
+# lines look like "import time:  self [us] | cumulative | imported package"
+# top-level imports have no indentation in the package column
+def parse_importtime(stderr):
+    total_us, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        modules.add(name.strip().split('.')[0])
+        if not name[1:].startswith(' '):
+            total_us += int(cumulative)
+    return total_us, modules
+
+# one fresh interpreter per measurement so nothing is cached between runs
+def measure(root, module, script, runs):
+    env = dict(os.environ, PYTHONPATH=root)
+    import_ms, heavy = [], set()
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                   cwd=root, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            return {'error': completed.stderr.strip().splitlines()[-1]}
+        total_us, modules = parse_importtime(completed.stderr)
+        import_ms.append(total_us / 1000)
+        heavy = sorted(m for m in modules if m in HEAVY_MODULES)
+    result = {'import_ms': round(min(import_ms), 1), 'heavy_modules': heavy}
+    if script:
+        wall_ms = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, script, '--help'], cwd=root, env=env, capture_output=True)
+            wall_ms.append((time.perf_counter() - started) * 1000)
+        result['help_wall_ms'] = round(min(wall_ms), 1)
+    return result
+
+# export a git revision into a temp directory (tracked files only)
+def export_revision(rev, target):
+    archive = os.path.join(target, 'rev.tar')
+    subprocess.run(['git', 'archive', '--format=tar', '-o', archive, rev], cwd=project_root, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target)
+    os.remove(archive)
+    return target
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup (import) time')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per CLI, best is reported (default: 3)')
+    parser.add_argument('--compare-rev', default=None, metavar='REV',
+                        help='Also measure this git revision, e.g. HEAD~1')
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'current': {}}
+    for module, script in CLIS.items():
+        report['current'][module] = measure(project_root, module, script, args.runs)
+
+    if args.compare_rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = export_revision(args.compare_rev, tmp)
+            report[args.compare_rev] = {module: measure(root, module, script, args.runs)
+                                        for module, script in CLIS.items()}
+        report['import_speedup'] = {
+            module: round(report[args.compare_rev][module]['import_ms'] / report['current'][module]['import_ms'], 1)
+            for module in CLIS
+            if 'import_ms' in report[args.compare_rev][module] and report['current'][module].get('import_ms')
+        }
+
+    print("=" * 60)
+    print("CLI STARTUP BENCHMARK")
+    print("=" * 60)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Cascade Phase Classifier
+TF-IDF + logistic regression fast path (ai/phase_detector_trainer/train_fast_phase_classifier.py)
+serves confident predictions, everything else is escalated to the BERT / ONNX detector,
+which is only loaded on the first escalation
+"""
+import os
+import json
+import pickle
+
+# files written by train_fast_phase_classifier.py next to the BERT model
+FAST_MODEL_FILE = 'fast_phase_classifier.pkl'
+FAST_METADATA_FILE = 'fast_phase_metadata.json'
+
+# opt-in flag, explicit argument wins over PHASE_DETECTOR_CASCADE=1 environment variable
+def cascade_enabled(flag=None):
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get('PHASE_DETECTOR_CASCADE') == '1'
+
+def fast_model_available(model_dir):
+    return all(os.path.exists(os.path.join(model_dir, name)) for name in (FAST_MODEL_FILE, FAST_METADATA_FILE))
+
+# cascade with the same predict / predict_batch interface as PhaseDetector
+#1. fast pipeline and calibrated threshold from the model directory
+#2. heavy_loader builds the BERT / ONNX detector when the first context is escalated
+#3. stats count contexts served by each path
+class CascadePhaseDetector:
+    def __init__(self, model_dir, heavy_loader, threshold=None):
+        self.model_dir = model_dir
+        self.heavy_loader = heavy_loader
+        self._heavy = None
+
+        with open(os.path.join(model_dir, FAST_MODEL_FILE), 'rb') as f:
+            self.fast_pipeline = pickle.load(f)
+        with open(os.path.join(model_dir, FAST_METADATA_FILE), 'r', encoding='utf-8') as f:
+            self.fast_metadata = json.load(f)
+        self.threshold = threshold if threshold is not None else self.fast_metadata['threshold']
+
+        with open(os.path.join(model_dir, 'metadata.json'), 'r', encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self.phase_labels = self.metadata['phase_labels']
+        self.is_trained_model = True
+        self.stats = {'fast': 0, 'escalated': 0}
+        print(f"✅ Fast phase classifier loaded (threshold {self.threshold:.3f})")
+
+    # heavy detector, loaded on first escalation only
+    @property
+    def heavy(self):
+        if self._heavy is None:
+            self._heavy = self.heavy_loader()
+        return self._heavy
+
+    def predict(self, context, return_probabilities=False):
+        """Predict conversation phase from context"""
+        return self.predict_batch([context], batch_size=1, return_probabilities=return_probabilities)[0]
+
+    # fast path probabilities for every context, keyed by phase label
+    def predict_fast(self, contexts):
+        probabilities = self.fast_pipeline.predict_proba(list(contexts))
+        classes = list(self.fast_pipeline.classes_)
+        return [
+            {label: float(row[classes.index(label)]) if label in classes else 0.0 for label in self.phase_labels}
+            for row in probabilities
+        ]
+
+    # cascade prediction
+    #1. fast path for all contexts in one call
+    #2. confident ones are returned directly (path 'fast')
+    #3. the rest go through one heavy predict_batch (path 'bert')
+    #4. results keep original order
+    def predict_batch(self, contexts, batch_size=32, sort_by_length=True, return_probabilities=False):
+        """Predict phases for multiple contexts"""
+        if not contexts:
+            return []
+        results = [None] * len(contexts)
+        escalate = []
+        for i, probabilities in enumerate(self.predict_fast(contexts)):
+            phase = max(probabilities, key=probabilities.get)
+            if probabilities[phase] < self.threshold:
+                escalate.append(i)
+                continue
+            result = {
+                'phase': phase,
+                'confidence': round(probabilities[phase], 4),
+                'model_type': 'fast_tfidf',
+                'path': 'fast'
+            }
+            if return_probabilities:
+                result['all_probabilities'] = {label: round(p, 4) for label, p in probabilities.items()}
+            results[i] = result
+
+        if escalate:
+            heavy_results = self.heavy.predict_batch([contexts[i] for i in escalate], batch_size=batch_size,
+                                                     sort_by_length=sort_by_length,
+                                                     return_probabilities=return_probabilities)
+            for i, result in zip(escalate, heavy_results):
+                result['path'] = 'bert'
+                results[i] = result
+
+        self.stats['fast'] += len(contexts) - len(escalate)
+        self.stats['escalated'] += len(escalate)
+        return results
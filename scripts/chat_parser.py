@@ -5,11 +5,18 @@ Parses chat messages from HTML files saved by chat scraper
 """
 
 import os
+import io
 import sys
 import json
+import hashlib
+import itertools
 import argparse
+import contextlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from bs4 import BeautifulSoup
+import soupsieve
 import re
 from typing import Optional, List, Dict
 
@@ -19,8 +26,92 @@ sys.path.append(project_root)
 
 from data.chat_database_manager import ChatDatabase
 
+# timestamp patterns compiled once instead of on every message
+TIME_PATTERNS = [
+    re.compile(r'\d{1,2}:\d{2}\s*(AM|PM)'),
+    re.compile(r'\d{1,2}:\d{2}'),
+    re.compile(r'\d{4}-\d{2}-\d{2}'),
+]
+
+# separators inside CSS class names, message direction is matched on whole words
+CLASS_WORD_SPLIT = re.compile(r'[\s_-]+')
+
+# sender selectors, most specific first
+SENDER_SELECTORS = [
+    '[data-test*="author"]',
+    '[data-test*="sender"]',
+    '.message-author',
+    '.sender-name',
+    '.username',
+    '[class*="author"]',
+    '[class*="sender"]'
+]
+# compiled once: the combined selector finds candidates in one pass over a message,
+# the single ones rank them (the combined one returns document order)
+SENDER_SELECTOR = soupsieve.compile(', '.join(SENDER_SELECTORS))
+SENDER_PATTERNS = [soupsieve.compile(selector) for selector in SENDER_SELECTORS]
+
+# platform name -> marker looked for in URLs, titles and page text (checked in order)
+PLATFORM_MARKERS = [
+    ('upwork', 'upwork'),
+    ('linkedin', 'linkedin'),
+    ('discord', 'discord'),
+    ('teams', 'teams'),
+    ('slack', 'slack'),
+]
+
+# how much raw HTML to sniff before falling back to a full-text scan
+PLATFORM_SNIFF_CHARS = 64 * 1024
+
+# message selectors per platform, tried in order until one matches
+MESSAGE_SELECTORS = {
+    'upwork': [
+        '[data-test*="message"]',
+        '.message-item',
+        '.conversation-message',
+        '[class*="message"]',
+        '.message-container'
+    ],
+    'linkedin': [
+        '.msg-s-message-list-item',
+        '.message-item',
+        '[data-test*="message"]'
+    ],
+    'discord': [
+        '[data-list-item-id*="chat-messages"]',
+        '.message-content',
+        '[class*="message"]'
+    ],
+    'generic': [
+        '[data-test*="message"]',
+        '.message',
+        '.chat-message',
+        '[class*="message"]',
+        'p', 'div[class*="text"]'
+    ]
+}
+
+# newest messages extracted to identify the chat participant
+PARTICIPANT_PROBE_MESSAGES = 10
+
+# messages hashed into a watermark: the message and the ones before it, so a repeated
+# short reply ("Thanks!") newer than the watermark does not match it
+WATERMARK_TAIL_MESSAGES = 3
+
+# senders that are the user, never the participant (CHAT_USER_NAMES adds display names, comma separated)
+OWN_SENDER_NAMES = {'unknown', 'user', 'me', 'you'}
+
+def own_sender_names():
+    names = {name.strip().lower() for name in os.environ.get('CHAT_USER_NAMES', '').split(',')}
+    return OWN_SENDER_NAMES | (names - {''})
+
 class ChatParser:
     def __init__(self, db_path="data/chat_data.db"):
+        # parse-only instance (batch workers) - no database connection
+        if db_path is None:
+            self.db_path = None
+            self.db = None
+            return
         # path to chat database
         self.db_path = os.path.join(project_root, db_path)
         # initialize database manager
@@ -44,6 +135,7 @@ class ChatParser:
         ''', (platform, title, participant))
         # check rows that are matching and put inside row var
         row = cursor.fetchone()
+        conn.close()
         # if there are matching rows
         if row:
             # log found session
@@ -112,87 +204,83 @@ class ChatParser:
         ''', (session_id, session_id))
         
         conn.commit()
+        conn.close()
         
         print(f"[SUCCESS] Added {saved_count} new messages to existing session {session_id}")
         return saved_count
-    # extract participant name from messages
+    # extract participant name from messages (newest first, as _apply_messages probes them)
+    # 1. skip the user's own messages (outgoing or an own sender name), so who
+    #    wrote most of the latest messages does not change the participant
+    # 2. most frequent remaining sender wins, ties go to the oldest
     def extract_participant_name(self, platform: str, messages: List[Dict]) -> str:
         """Extract participant name from messages"""
-        # Try to find unique senders
-        senders = set()
-        for msg in messages[:10]:  # Check first 10 messages
+        own_names = own_sender_names()
+        # Count valid senders, oldest first
+        sender_counts = {}
+        for msg in reversed(messages[:PARTICIPANT_PROBE_MESSAGES]):
             sender = msg.get('sender', 'unknown')
-            if sender not in ['unknown', 'user', 'me', 'you'] and len(sender) < 50:
-                senders.add(sender)
+            if msg.get('sender_type') == 'outgoing' or sender.lower() in own_names:
+                continue
+            if len(sender) < 50:
+                sender_counts[sender] = sender_counts.get(sender, 0) + 1
         
-        if senders:
-            return list(senders)[0]  # Return first valid sender
+        if sender_counts:
+            return max(sender_counts, key=sender_counts.get)
         
         return 'Unknown Participant'
+    # stable identity of a message across scrapes (python's hash() is salted per process)
+    def _message_hash(self, message: Dict) -> str:
+        """Hash of sender and text of one message"""
+        key = f"{message['sender']}\x1f{message['text']}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+    # watermark of a message: its hash chained with the messages before it
+    # takes the message and up to WATERMARK_TAIL_MESSAGES - 1 older ones, newest first
+    def _tail_signature(self, window) -> str:
+        """Hash of a message and the messages preceding it"""
+        key = '\x1e'.join(self._message_hash(message) for message in window)
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+    # pair each newest-first message with its tail signature
+    # (reads WATERMARK_TAIL_MESSAGES - 1 messages ahead, the oldest ones get shorter tails)
+    def _with_tail_signatures(self, newest_first):
+        """Yield (message, tail signature) newest first"""
+        window = deque()
+        for message in newest_first:
+            window.append(message)
+            if len(window) == WATERMARK_TAIL_MESSAGES:
+                yield window[0], self._tail_signature(window)
+                window.popleft()
+        while window:
+            yield window[0], self._tail_signature(window)
+            window.popleft()
     # process chat with incremental update logic
+    # 1. parse the page and collect message elements (no text extraction yet)
+    # 2. hand newest-first messages to _apply_messages, which extracts only
+    #    as far back as the session watermark
+    # 3. record the file as processed so batch mode skips it
     def process_incremental(self, html_file_path: str = None):
         """Process chat with incremental update logic"""
         try:
-            # Parse HTML file
-            if html_file_path:
-                messages, platform = self.parse_html_file(html_file_path)
-            else:
+            if not html_file_path:
                 # Get latest HTML file
-                data_dir = os.path.join(project_root, 'data')
-                html_files = [f for f in os.listdir(data_dir) if f.startswith('chat_raw_') and f.endswith('.html')]
+                chat_files = self._list_chat_files()
                 
-                if not html_files:
+                if not chat_files:
                     return {'success': False, 'error': 'No chat HTML files found'}
                 
-                latest_file = max(html_files, key=lambda f: os.path.getctime(os.path.join(data_dir, f)))
-                html_path = os.path.join(data_dir, latest_file)
-                messages, platform = self.parse_html_file(html_path)
-            
-            if not messages:
-                return {'success': False, 'error': 'No messages found in HTML'}
+                html_file_path = max(chat_files, key=lambda f: f['ctime'])['path']
             
-            # Extract chat metadata
-            participant = self.extract_participant_name(platform, messages)
-            title = f"{platform.title()} Chat with {participant}"
-            
-            print(f"[INFO] Processing chat: {platform} - {participant}")
-            print(f"[INFO] Messages in scrape: {len(messages)}")
-            
-            # Check if session exists
-            existing_session_id = self.chat_session_exists(platform, title, participant)
-            
-            if existing_session_id:
-                print(f"[FOUND] Using existing session: {existing_session_id}")
-                
-                # Update with new messages only
-                new_count = self.update_existing_session(existing_session_id, messages)
-                
-                result = {
-                    'action': 'incremental_update',
-                    'session_id': existing_session_id,
-                    'new_messages_added': new_count,
-                    'total_messages_in_scrape': len(messages),
-                    'success': True
-                }
-                
-                print(f"[SUCCESS] Added {new_count} new messages to existing session")
-                
-            else:
-                print(f"[NEW] Creating new chat session")
-                
-                # Create new session (use existing save_to_database method)
-                session_id = self.save_to_database(messages, platform)
-                
-                result = {
-                    'action': 'new_session',
-                    'session_id': session_id,
-                    'messages_saved': len(messages),
-                    'total_messages': len(messages),
-                    'success': True
-                }
-                
-                print(f"[SUCCESS] Created new session with {len(messages)} messages")
+            soup, platform = self._load_html(html_file_path)
+            elements = self._find_message_elements(soup, platform)
+            result = self._apply_messages(platform, self._iter_messages_from_end(elements, platform))
+            if result['success'] and result['action'] == 'incremental_update':
+                result['message_elements_in_scrape'] = len(elements)
             
+            fingerprint = self._file_fingerprint(html_file_path)
+            self.db.mark_chat_file_processed(
+                os.path.abspath(html_file_path), fingerprint['file_hash'], fingerprint['file_size'],
+                fingerprint['file_mtime'], result.get('session_id'),
+                'processed' if result['success'] else 'empty'
+            )
             return result
             
         except Exception as e:
@@ -203,6 +291,214 @@ class ChatParser:
             }
             print(f"[ERROR] Chat parsing failed: {e}")
             return error_result
+
+    # store messages from one scrape (single writer - only this touches the DB)
+    # takes platform and an iterator of messages, newest first
+    # 1. take the newest few messages to identify the participant and session
+    # 2. consume messages until a watermark: the found session's, or when no session
+    #    matched the participant, any session on the platform (the same chat captured
+    #    while its participant was detected differently)
+    #    a watermark matches on the tail signature and only at or before the scrape
+    #    position it was saved at - later messages repeating the same tail are new
+    # 3. existing session: insert only the messages newer than the watermark
+    # 4. new session: no watermark in the scrape, save everything
+    # 5. move the watermark to the newest message in the scrape
+    def _apply_messages(self, platform: str, newest_first) -> Dict:
+        """Save one scrape's messages to its session, stopping at the watermark"""
+        newest_first = iter(newest_first)
+        # newest messages first - enough to identify the participant
+        probe = list(itertools.islice(newest_first, PARTICIPANT_PROBE_MESSAGES))
+        if not probe:
+            return {'success': False, 'error': 'No messages found in HTML'}
+        
+        # Extract chat metadata
+        participant = self.extract_participant_name(platform, probe)
+        title = f"{platform.title()} Chat with {participant}"
+        
+        print(f"[INFO] Processing chat: {platform} - {participant}")
+        
+        # Check if session exists
+        existing_session_id = self.chat_session_exists(platform, title, participant)
+        if existing_session_id:
+            watermark = self.db.get_session_watermark(existing_session_id)
+            watermarks = {
+                watermark['last_message_hash']: (existing_session_id, participant, watermark['last_message_position'])
+            } if watermark else {}
+        else:
+            watermarks = self.db.get_platform_watermarks(platform)
+        
+        # walk back from the newest message until a watermark
+        # (another session's watermark only counts when its participant wrote in this scrape)
+        new_messages = []
+        newest_signature = None
+        senders = {message.get('sender') for message in probe}
+        watermark_reached = False
+        for message, signature in self._with_tail_signatures(itertools.chain(probe, newest_first)):
+            newest_signature = newest_signature or (signature, message.get('position'))
+            senders.add(message.get('sender'))
+            watermark = watermarks.get(signature)
+            if watermark and watermark[1] in senders and self._before_watermark_position(message, watermark[2]):
+                watermark_reached = True
+                existing_session_id = watermark[0]
+                break
+            new_messages.append(message)
+        new_messages.reverse()
+        new_messages = self._dedupe_messages(new_messages)
+        
+        if existing_session_id:
+            print(f"[FOUND] Using existing session: {existing_session_id}")
+            
+            if not watermark_reached:
+                print(f"[INFO] Watermark not in scrape - checking all {len(new_messages)} messages")
+            
+            # Update with new messages only
+            new_count = self.update_existing_session(existing_session_id, new_messages) if new_messages else 0
+            session_id = existing_session_id
+            
+            result = {
+                'action': 'incremental_update',
+                'session_id': existing_session_id,
+                'new_messages_added': new_count,
+                'tail_messages_extracted': len(new_messages),
+                'watermark_reached': watermark_reached,
+                'success': True
+            }
+            
+            print(f"[SUCCESS] Added {new_count} new messages to existing session")
+            
+        else:
+            print(f"[NEW] Creating new chat session")
+            
+            messages = new_messages
+            
+            # Create new session (use existing save_to_database method)
+            session_id = self.save_to_database(messages, platform, title=title, participant=participant)
+            
+            result = {
+                'action': 'new_session',
+                'session_id': session_id,
+                'messages_saved': len(messages),
+                'total_messages': len(messages),
+                'success': True
+            }
+            
+            print(f"[SUCCESS] Created new session with {len(messages)} messages")
+        
+        # newest message in the scrape becomes the watermark
+        if new_messages:
+            self.db.save_session_watermark(session_id, *newest_signature)
+        
+        return result
+
+    # a watermark saved at scrape position N can't be a message further down the page
+    # (a capture with more history loaded above it fails this, walks on and relies on the
+    #  duplicate check in update_existing_session)
+    def _before_watermark_position(self, message, watermark_position) -> bool:
+        """Whether a message is at or above the scrape position of a watermark"""
+        position = message.get('position')
+        return watermark_position is None or position is None or position <= watermark_position
+
+    # ================ BATCH CHAT PROCESSING FUNCTIONS ================
+    # list chat_raw_*.html files with one directory scan (stat comes with the entry)
+    def _list_chat_files(self, data_dir: str = None) -> List[Dict]:
+        """List chat HTML files with size, mtime and ctime"""
+        data_dir = data_dir or os.path.join(project_root, 'data')
+        chat_files = []
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('chat_raw_') and entry.name.endswith('.html') and entry.is_file():
+                    stat = entry.stat()
+                    chat_files.append({
+                        'path': os.path.abspath(entry.path),
+                        'size': stat.st_size,
+                        'mtime': stat.st_mtime,
+                        'ctime': stat.st_ctime
+                    })
+        return chat_files
+
+    def _file_fingerprint(self, file_path: str) -> Dict:
+        """Content hash, size and mtime of a file"""
+        with open(file_path, 'rb') as f:
+            file_hash = hashlib.sha1(f.read()).hexdigest()
+        stat = os.stat(file_path)
+        return {'file_hash': file_hash, 'file_size': stat.st_size, 'file_mtime': stat.st_mtime}
+
+    # chat files not yet processed, oldest first
+    # a file whose path, size and mtime match its last record is skipped without
+    # being read; anything else is parsed and checked against its content hash
+    def discover_unprocessed_files(self, data_dir: str = None) -> List[Dict]:
+        """Find chat HTML files that have not been ingested yet"""
+        processed = self.db.get_processed_chat_files()
+        pending = []
+        for chat_file in self._list_chat_files(data_dir):
+            known = processed.get(chat_file['path'])
+            if known and known['file_size'] == chat_file['size'] and known['file_mtime'] == chat_file['mtime']:
+                continue
+            pending.append(chat_file)
+        pending.sort(key=lambda f: f['mtime'])
+        return pending
+
+    # ingest every unprocessed chat file
+    # 1. parse files in a process pool (workers never touch the database)
+    # 2. keep at most max_in_flight files submitted so memory stays bounded
+    # 3. apply results one at a time in scrape time order, each through the watermark logic
+    def process_batch(self, data_dir: str = None, workers: int = None, max_in_flight: int = None) -> Dict:
+        """Parse all backlogged chat files in parallel and apply them in order"""
+        pending = self.discover_unprocessed_files(data_dir)
+        print(f"[BATCH] {len(pending)} unprocessed chat files")
+        
+        summary = {
+            'action': 'batch',
+            'files_found': len(pending),
+            'files_applied': 0,
+            'files_skipped': 0,
+            'files_failed': 0,
+            'new_messages_added': 0,
+            'sessions': [],
+            'success': True
+        }
+        if not pending:
+            return summary
+        
+        workers = workers or max(1, min(len(pending), (os.cpu_count() or 2) - 1))
+        max_in_flight = max_in_flight or workers * 2
+        
+        def apply_parsed(future):
+            parsed = future.result()
+            file_path = parsed['file_path']
+            session_id = None
+            if parsed.get('error'):
+                print(f"[ERROR] {os.path.basename(file_path)}: {parsed['error']}")
+                summary['files_failed'] += 1
+                status = 'error'
+            elif self.db.is_chat_file_processed(file_path, parsed['file_hash']):
+                summary['files_skipped'] += 1
+                status = 'processed'
+            else:
+                print(f"[BATCH] Applying {os.path.basename(file_path)}")
+                result = self._apply_messages(parsed['platform'], parsed['messages'])
+                session_id = result.get('session_id')
+                status = 'processed' if result['success'] else 'empty'
+                summary['files_applied'] += 1
+                summary['new_messages_added'] += result.get('new_messages_added', result.get('messages_saved', 0))
+                if session_id and session_id not in summary['sessions']:
+                    summary['sessions'].append(session_id)
+            if parsed.get('file_hash'):
+                self.db.mark_chat_file_processed(
+                    file_path, parsed['file_hash'], parsed['file_size'],
+                    parsed['file_mtime'], session_id, status
+                )
+        
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chat_file in pending:
+                in_flight.append(pool.submit(_parse_chat_file, chat_file['path']))
+                if len(in_flight) >= max_in_flight:
+                    apply_parsed(in_flight.popleft())
+            while in_flight:
+                apply_parsed(in_flight.popleft())
+        
+        return summary
     #================== functions for extracting messages for different platforms ===================
     # function for Upwork HTML 
     def parse_upwork_messages(self, soup):
@@ -210,13 +506,7 @@ class ChatParser:
         messages = []
         
         # Multiple selectors for Upwork messages
-        selectors = [
-            '[data-test*="message"]',
-            '.message-item',
-            '.conversation-message',
-            '[class*="message"]',
-            '.message-container'
-        ]
+        selectors = MESSAGE_SELECTORS['upwork']
         # look in each selector
         # if selector finds elements extract content
         # save elements inside message_data
@@ -227,7 +517,7 @@ class ChatParser:
             if elements:
                 print(f"Found {len(elements)} messages with selector: {selector}")
                 
-                for element in elements:
+                for element in self._select_message_elements(elements):
                     message_data = self._extract_message_data(element, 'upwork')
                     if message_data:
                         messages.append(message_data)
@@ -239,16 +529,12 @@ class ChatParser:
         """Parse LinkedIn chat messages"""
         messages = []
         
-        selectors = [
-            '.msg-s-message-list-item',
-            '.message-item',
-            '[data-test*="message"]'
-        ]
+        selectors = MESSAGE_SELECTORS['linkedin']
         
         for selector in selectors:
             elements = soup.select(selector)
             if elements:
-                for element in elements:
+                for element in self._select_message_elements(elements):
                     message_data = self._extract_message_data(element, 'linkedin')
                     if message_data:
                         messages.append(message_data)
@@ -260,16 +546,12 @@ class ChatParser:
         """Parse Discord chat messages"""
         messages = []
         
-        selectors = [
-            '[data-list-item-id*="chat-messages"]',
-            '.message-content',
-            '[class*="message"]'
-        ]
+        selectors = MESSAGE_SELECTORS['discord']
         
         for selector in selectors:
             elements = soup.select(selector)
             if elements:
-                for element in elements:
+                for element in self._select_message_elements(elements):
                     message_data = self._extract_message_data(element, 'discord')
                     if message_data:
                         messages.append(message_data)
@@ -277,6 +559,90 @@ class ChatParser:
                 
         return messages
     
+    # message elements for a platform without extracting any text
+    # first selector with matches wins, same as the parse_*_messages functions
+    def _find_message_elements(self, soup, platform):
+        """Selected message elements in document order"""
+        selectors = MESSAGE_SELECTORS.get(platform, MESSAGE_SELECTORS['generic'])
+        for selector in selectors:
+            elements = soup.select(selector)
+            if elements:
+                return self._select_message_elements(elements)
+        return []
+
+    # extract messages lazily from the newest element backwards,
+    # so callers pay only for the messages they consume
+    def _iter_messages_from_end(self, elements, platform):
+        """Yield extracted messages newest first"""
+        extract_platform = platform if platform in ('upwork', 'linkedin', 'discord') else 'generic'
+        for position in range(len(elements), 0, -1):
+            message_data = self._extract_message_data(elements[position - 1], extract_platform)
+            if not message_data:
+                continue
+            if extract_platform == 'generic' and len(message_data['text']) <= 10:
+                continue
+            # element position in the page, the watermark keeps it
+            message_data['position'] = position
+            yield message_data
+
+    # keep one element per message before any text is extracted
+    # selectors like [class*="message"] match a message container and its
+    # message-content / message-author children, so extraction would run on
+    # overlapping subtrees and emit the same text several times
+    # 1. link every match to its nearest matched ancestor (one pass in document order)
+    # 2. innermost: keep matches that contain no other match
+    # 3. outermost: keep top-level matches, but descend into list wrappers
+    #    (a match whose matched children repeat the same tag/class, e.g. a messages list)
+    def _select_message_elements(self, elements, keep='outermost'):
+        """Drop nested selector matches so each message is extracted once"""
+        if len(elements) < 2:
+            return elements
+
+        index = {id(element): i for i, element in enumerate(elements)}
+        children = [[] for _ in elements]
+        roots = []
+        for i, element in enumerate(elements):
+            parent_index = None
+            for ancestor in element.parents:
+                parent_index = index.get(id(ancestor))
+                if parent_index is not None:
+                    break
+            if parent_index is None:
+                roots.append(i)
+            else:
+                children[parent_index].append(i)
+
+        if keep == 'innermost':
+            return [element for i, element in enumerate(elements) if not children[i]]
+
+        selected = []
+        stack = list(reversed(roots))
+        while stack:
+            i = stack.pop()
+            signatures = [
+                (elements[c].name, tuple(elements[c].get('class') or ()), elements[c].get('data-test'))
+                for c in children[i]
+            ]
+            if len(signatures) != len(set(signatures)):
+                # repeated children means this match is a list of messages
+                stack.extend(reversed(children[i]))
+            else:
+                selected.append(elements[i])
+        return selected
+
+    # drop messages repeated within one scrape (same sender and text),
+    # the same rule the database applies, so duplicates never reach it
+    def _dedupe_messages(self, messages):
+        """Remove duplicate messages while keeping document order"""
+        seen = set()
+        unique = []
+        for message in messages:
+            key = (message['sender'], message['text'])
+            if key not in seen:
+                seen.add(key)
+                unique.append(message)
+        return unique
+
     def _extract_message_data(self, element, platform):
         """Extract message data from HTML element"""
         try:
@@ -286,7 +652,7 @@ class ChatParser:
                 return None
             
             # Try to extract timestamp
-            timestamp = self._extract_timestamp(element)
+            timestamp = self._extract_timestamp(element, text)
             
             # Try to extract sender
             sender = self._extract_sender(element, platform)
@@ -300,7 +666,7 @@ class ChatParser:
                 'timestamp': timestamp,
                 'sender_type': message_type,  # Map to correct database column
                 'platform': platform,
-                'html_snippet': str(element)[:500],  # First 500 chars for debugging
+                'html_snippet': self._element_snippet(element),  # Start tag for debugging
                 'message_id': f"{platform}_{hash(text)}_{timestamp}",  # Generate message_id
                 'order': 0  # Will be set properly in save function
             }
@@ -308,72 +674,77 @@ class ChatParser:
         except Exception as e:
             print(f"Error extracting message data: {e}")
             return None
+
+    # opening tag of the element - serializing the whole subtree just to
+    # keep 500 characters of it was the most expensive part of extraction
+    def _element_snippet(self, element, limit=500):
+        """Short HTML snippet of a message element for debugging"""
+        attrs = ' '.join(
+            f'{key}="{" ".join(value) if isinstance(value, list) else value}"'
+            for key, value in element.attrs.items()
+        )
+        return f"<{element.name} {attrs}>"[:limit] if attrs else f"<{element.name}>"
     # ================== functions to extract messages end ================
 
     # ================== functions to extract metadata from messages ===================
     # loop through common patterns to find timestamp
     # 1. find time elements
     # 2. in element look for datetime or data-time attributes
-    # 3. return current time if none found
-    def _extract_timestamp(self, element):
+    # 3. search the already extracted message text with precompiled patterns
+    # 4. return current time if none found
+    def _extract_timestamp(self, element, text=None):
         """Try to extract timestamp from message element"""
         # Look for time elements
-        time_element = element.find(['time', '[datetime]', '[data-time]'])
+        time_element = element.select_one('time, [datetime], [data-time]')
         if time_element:
             datetime_attr = time_element.get('datetime') or time_element.get('data-time')
             if datetime_attr:
                 return datetime_attr
         
-        # where is the text
         # Look for timestamp patterns in text
-        text = element.get_text()
-        time_patterns = [
-            r'\d{1,2}:\d{2}\s*(AM|PM)',
-            r'\d{1,2}:\d{2}',
-            r'\d{4}-\d{2}-\d{2}',
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, text)
+        if text is None:
+            text = element.get_text()
+        
+        for pattern in TIME_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group()
         
         return datetime.now().isoformat()
     
     # Try to extract sender/author from message element
-    # 1. look for common CSS selectors
-    # 2. return "unknown" if none found
+    # 1. one select with the combined sender selector
+    # 2. rank each match by the first sender selector it matches, keep the best
+    #    one with non-empty text (skips avatars / icons)
+    # 3. return "unknown" if none found
     def _extract_sender(self, element, platform):
         """Try to extract sender/author from message element"""
-        sender_selectors = [
-            '[data-test*="author"]',
-            '[data-test*="sender"]',
-            '.message-author',
-            '.sender-name',
-            '.username',
-            '[class*="author"]',
-            '[class*="sender"]'
-        ]
-        
-        for selector in sender_selectors:
-            sender_element = element.select_one(selector)
-            if sender_element:
-                sender = sender_element.get_text(strip=True)
-                if sender:
-                    return sender
-        
-        return "unknown"
+        sender, sender_rank = None, len(SENDER_PATTERNS)
+        for sender_element in SENDER_SELECTOR.select(element):
+            rank = next((i for i, pattern in enumerate(SENDER_PATTERNS[:sender_rank])
+                         if pattern.match(sender_element)), None)
+            if rank is None:
+                continue
+            text = sender_element.get_text(strip=True)
+            if text:
+                sender, sender_rank = text, rank
+                if rank == 0:
+                    break
+        
+        return sender or "unknown"
     # determine if message is incoming or outgoing
-    # 1. look for common CSS selectors
-    # 2. return "unknown" if none found
+    # 1. split CSS classes into words (chat-message-row -> chat, message, row),
+    #    substrings would find "me" in every *message* class
+    # 2. look for words that indicate message direction
+    # 3. return "unknown" if none found
     def _determine_message_type(self, element, text):
         """Determine if message is incoming or outgoing"""
         # Look for CSS classes that indicate message direction
-        classes = ' '.join(element.get('class', []))
+        words = set(CLASS_WORD_SPLIT.split(' '.join(element.get('class', [])).lower()))
         
-        if any(word in classes.lower() for word in ['sent', 'outgoing', 'own', 'me']):
+        if words & {'sent', 'outgoing', 'own', 'me'}:
             return 'outgoing'
-        elif any(word in classes.lower() for word in ['received', 'incoming', 'other', 'them']):
+        elif words & {'received', 'incoming', 'other', 'them'}:
             return 'incoming'
         
         return 'unknown'
@@ -386,16 +757,7 @@ class ChatParser:
         if not os.path.exists(html_file_path):
             raise FileNotFoundError(f"HTML file not found: {html_file_path}")
         
-        print(f"Parsing HTML file: {html_file_path}")
-        # open and read HTML content from file
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        # inside variable library for parsing and content of the file and where to save
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Detect platform from filename or URL in HTML
-        platform = self._detect_platform_from_html(soup, html_file_path)
-        print(f"Detected platform: {platform}")
+        soup, platform = self._load_html(html_file_path)
         
         # Parse messages based on platform
         messages = []
@@ -409,27 +771,40 @@ class ChatParser:
             # Generic parsing
             messages = self.parse_generic_messages(soup)
         
+        messages = self._dedupe_messages(messages)
         print(f"Parsed {len(messages)} messages")
         return messages, platform
     
+    # read and parse an HTML file and detect its platform
+    def _load_html(self, html_file_path):
+        """Return (soup, platform) for a chat HTML file"""
+        if not os.path.exists(html_file_path):
+            raise FileNotFoundError(f"HTML file not found: {html_file_path}")
+        
+        print(f"Parsing HTML file: {html_file_path}")
+        # open and read HTML content from file
+        with open(html_file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        # inside variable library for parsing and content of the file and where to save
+        soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Detect platform from filename or URL in HTML
+        platform = self._detect_platform_from_html(soup, html_file_path, html_content)
+        print(f"Detected platform: {platform}")
+        return soup, platform
+    
     def parse_generic_messages(self, soup):
         """Generic message parsing for unknown platforms"""
         messages = []
         
         # Try common message selectors
-        selectors = [
-            '[data-test*="message"]',
-            '.message',
-            '.chat-message',
-            '[class*="message"]',
-            'p', 'div[class*="text"]'
-        ]
+        selectors = MESSAGE_SELECTORS['generic']
         
         for selector in selectors:
             elements = soup.select(selector)
             if elements and len(elements) > 0:
                 print(f"Using generic selector: {selector} ({len(elements)} elements)")
-                for element in elements:
+                for element in self._select_message_elements(elements):
                     message_data = self._extract_message_data(element, 'generic')
                     if message_data and len(message_data['text']) > 10:  # Filter out very short texts
                         messages.append(message_data)
@@ -439,35 +814,92 @@ class ChatParser:
         
         return messages
     
-    def _detect_platform_from_html(self, soup, file_path):
+    # detect platform from the cheapest signal that answers, so cost does
+    # not grow with chat length
+    # 1. page URL from the scraper's chat_result_<ts>.json sidecar
+    # 2. file name
+    # 3. canonical link, og:url and <title> inside <head>
+    # 4. bounded prefix of the raw HTML
+    # 5. full page text (last resort)
+    def _detect_platform_from_html(self, soup, file_path, html_content=None):
         """Detect platform from HTML content or filename"""
-        html_text = soup.get_text().lower()
-        file_name = os.path.basename(file_path).lower()
-        
-        if 'upwork' in html_text or 'upwork' in file_name:
-            return 'upwork'
-        elif 'linkedin' in html_text or 'linkedin' in file_name:
-            return 'linkedin'
-        elif 'discord' in html_text or 'discord' in file_name:
-            return 'discord'
-        elif 'teams' in html_text or 'teams' in file_name:
-            return 'teams'
-        elif 'slack' in html_text or 'slack' in file_name:
-            return 'slack'
-        
-        return 'unknown'
+        page_url = self._read_sidecar_url(file_path)
+        file_name = os.path.basename(file_path)
+
+        head = soup.head
+        head_hints = []
+        if head is not None:
+            canonical = head.find('link', rel='canonical')
+            if canonical:
+                head_hints.append(canonical.get('href', ''))
+            og_url = head.find('meta', property='og:url')
+            if og_url:
+                head_hints.append(og_url.get('content', ''))
+            if head.title:
+                head_hints.append(head.title.get_text())
+
+        candidates = [page_url, file_name, ' '.join(head_hints)]
+        if html_content:
+            candidates.append(html_content[:PLATFORM_SNIFF_CHARS])
+
+        for text in candidates:
+            platform = self._platform_from_text(text)
+            if platform:
+                return platform
+
+        # Nothing cheap matched - scan the whole page text
+        return self._platform_from_text(soup.get_text()) or 'unknown'
+
+    def _platform_from_text(self, text):
+        """Return the first platform whose marker appears in text"""
+        if not text:
+            return None
+        text = text.lower()
+        for platform, marker in PLATFORM_MARKERS:
+            if marker in text:
+                return platform
+        return None
+
+    # chat_raw_<ts>.html is written next to chat_result_<ts>.json, which
+    # holds the page URL captured by browser_connect_chat.js
+    def _read_sidecar_url(self, file_path):
+        """Page URL from the scraper's JSON sidecar, or empty string"""
+        file_name = os.path.basename(file_path)
+        if not file_name.startswith('chat_raw_'):
+            return ''
+        sidecar_name = 'chat_result_' + file_name[len('chat_raw_'):].rsplit('.', 1)[0] + '.json'
+        sidecar_path = os.path.join(os.path.dirname(file_path), sidecar_name)
+        try:
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('url', '') or ''
+        except (OSError, ValueError):
+            return ''
     
-    def save_to_database(self, messages, platform, session_id=None):
+    # platform_<timestamp> session id, suffixed when a session already has it
+    # (save_chat_session replaces rows, two chats saved in one second would merge)
+    def _new_session_id(self, platform):
+        base_id = f"{platform}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        session_id, suffix = base_id, 1
+        while cursor.execute('SELECT 1 FROM chat_sessions WHERE session_id = ?', (session_id,)).fetchone():
+            suffix += 1
+            session_id = f"{base_id}_{suffix}"
+        conn.close()
+        return session_id
+    
+    def save_to_database(self, messages, platform, session_id=None, title=None, participant=None):
         """Save parsed messages to database"""
         if not session_id:
-            session_id = f"{platform}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            session_id = self._new_session_id(platform)
         
         # Save chat session - match database schema exactly
+        # title/participant must match what chat_session_exists looks up
         session_data = {
             'session_id': session_id,
             'platform': platform,  # This maps to chat_platform in database
-            'title': f"{platform.title()} Chat Session",
-            'participant': 'Unknown',
+            'title': title or f"{platform.title()} Chat Session",
+            'participant': participant or 'Unknown',
             'url': '',
             'started_at': datetime.now(),
             'total_messages': len(messages)
@@ -498,16 +930,15 @@ class ChatParser:
     
     def process_latest_html(self):
         """Process the most recent HTML file in data directory"""
-        data_dir = os.path.join(project_root, 'data')
-        html_files = [f for f in os.listdir(data_dir) if f.startswith('chat_raw_') and f.endswith('.html')]
+        chat_files = self._list_chat_files()
         
-        if not html_files:
+        if not chat_files:
             print("No chat HTML files found")
             return None
         
         # Get most recent file
-        latest_file = max(html_files, key=lambda f: os.path.getctime(os.path.join(data_dir, f)))
-        html_path = os.path.join(data_dir, latest_file)
+        html_path = max(chat_files, key=lambda f: f['ctime'])['path']
+        latest_file = os.path.basename(html_path)
         
         print(f"Processing latest HTML file: {latest_file}")
         
@@ -540,12 +971,28 @@ class ChatParser:
         print(json.dumps(result, indent=2))
         return result
 
+# batch worker: parse one chat file into newest-first messages
+# runs in a child process, so it builds a parse-only ChatParser and never opens the DB
+def _parse_chat_file(html_file_path):
+    chat_parser = ChatParser(db_path=None)
+    try:
+        fingerprint = chat_parser._file_fingerprint(html_file_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            soup, platform = chat_parser._load_html(html_file_path)
+            elements = chat_parser._find_message_elements(soup, platform)
+            messages = list(chat_parser._iter_messages_from_end(elements, platform))
+        return {'file_path': html_file_path, 'platform': platform, 'messages': messages, **fingerprint}
+    except Exception as e:
+        return {'file_path': html_file_path, 'error': str(e)}
+
 def main():
     parser = argparse.ArgumentParser(description='Parse chat messages from HTML')
     parser.add_argument('--html-file', help='Specific HTML file to parse')
     parser.add_argument('--latest', action='store_true', help='Process latest HTML file')
     parser.add_argument('--incremental', action='store_true', help='Process with incremental update logic')
     parser.add_argument('--cleanup', action='store_true', help='Cleanup duplicate chat sessions')
+    parser.add_argument('--batch', action='store_true', help='Ingest every unprocessed chat HTML file in parallel')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --batch (default: CPU count - 1)')
     
     args = parser.parse_args()
     
@@ -564,6 +1011,11 @@ def main():
             }
             print(json.dumps(result, indent=2))
             
+        elif args.batch:
+            # Catch up on every chat file not yet ingested
+            result = chat_parser.process_batch(workers=args.workers)
+            print(json.dumps(result, indent=2))
+            
         elif args.incremental:
             # Process with incremental logic
             result = chat_parser.process_incremental(args.html_file)
@@ -0,0 +1,128 @@
+"""
+Fast Tokenizer Conversion and Check
+Writes tokenizer.json into the saved model folders (phase classifiers, chat and cover letter
+GPT-2) and checks that the fast tokenizers give the same token ids as the slow (Python)
+tokenizers on our training corpora, with the time both take to encode them
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.fast_tokenizers import (load_gpt2_tokenizer, load_bert_tokenizer, batch_encode,
+                                     convert_tokenizer_dir, has_tokenizer_json)
+from scripts.onnx_phase_detector import default_model_dir
+from scripts.smart_chat_response import build_ai_prompt
+
+PHASE_DATA = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'training_data', 'phase_training_data.json')
+CHAT_DATA = os.path.join(project_root, 'ai', 'chat_bot_trainer', 'training_data', 'training_data_parsed.json')
+COVER_LETTER_DATA = os.path.join(project_root, 'ai', 'cover_letter_trainer', 'training_data', 'training_data.json')
+DISTILLED_MODEL = os.path.join(project_root, 'ai', 'phase_detector_trainer', 'trained_models', 'phase_classifier_distilled_v1')
+CHAT_MODEL = os.path.join(project_root, 'ai', 'chat_bot_trainer', 'trained_models', 'final_chat_model', 'trained_chat_model_1.0')
+COVER_LETTER_MODEL = os.path.join(project_root, 'ai', 'cover_letter_trainer', 'trained_models', 'custom_cover_letter_model', 'final')
+
+# name -> (saved model folder, tokenizer kind, base model used when the folder is missing)
+MODELS = {
+    'phase': (default_model_dir(), 'bert', 'bert-base-uncased'),
+    'phase_distilled': (DISTILLED_MODEL, 'bert', 'bert-base-uncased'),
+    'chat': (CHAT_MODEL, 'gpt2', 'gpt2'),
+    'cover_letter': (COVER_LETTER_MODEL, 'gpt2', 'gpt2')
+}
+
+# texts each model tokenizes in training and inference
+# 1. phase: conversation contexts
+# 2. chat: formatted training conversations and the generation prompts built from phase contexts
+# 3. cover letter: training examples in the trainer's tagged format
+def load_corpus(name):
+    if name.startswith('phase'):
+        with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+            return [str(item['context']) for item in json.load(f)]
+    if name == 'chat':
+        with open(CHAT_DATA, 'r', encoding='utf-8') as f:
+            conversations = json.load(f)
+        if isinstance(conversations, dict):
+            conversations = conversations.get('training_conversations', [])
+        texts = [c.get('formatted_training_text', '') for c in conversations]
+        with open(PHASE_DATA, 'r', encoding='utf-8') as f:
+            texts += [build_ai_prompt(item['phase'], item['context']) for item in json.load(f)]
+        return [t for t in texts if t.strip()]
+    with open(COVER_LETTER_DATA, 'r', encoding='utf-8') as f:
+        return [
+            f"<JOB_TITLE>{item.get('job_title', 'Unknown Position')}<COMPANY>{item.get('company', 'Unknown Company')}"
+            f"<SKILLS>{', '.join(item.get('skills', []))}<COVER_LETTER>{item.get('cover_letter', '')}<END>"
+            for item in json.load(f)
+        ]
+
+def load_slow_tokenizer(path, kind):
+    from transformers import GPT2Tokenizer, BertTokenizer
+    return (GPT2Tokenizer if kind == 'gpt2' else BertTokenizer).from_pretrained(path)
+
+# token ids of slow (one call per text) and fast (one batch call) tokenizers on a corpus
+def compare(path, kind, texts):
+    slow = load_slow_tokenizer(path, kind)
+    fast = load_gpt2_tokenizer(path) if kind == 'gpt2' else load_bert_tokenizer(path)
+
+    started = time.perf_counter()
+    slow_ids = [slow(text)['input_ids'] for text in texts]
+    slow_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    fast_ids = batch_encode(fast, texts)['input_ids']
+    fast_seconds = time.perf_counter() - started
+
+    mismatches = [i for i, (a, b) in enumerate(zip(slow_ids, fast_ids)) if a != b]
+    report = {
+        'model_path': path,
+        'tokenizer_json': has_tokenizer_json(path),
+        'texts': len(texts),
+        'tokens': sum(len(ids) for ids in slow_ids),
+        'mismatches': len(mismatches),
+        'slow_seconds': round(slow_seconds, 3),
+        'fast_seconds': round(fast_seconds, 3),
+        'speedup': round(slow_seconds / fast_seconds, 1) if fast_seconds else None
+    }
+    if mismatches:
+        i = mismatches[0]
+        position = next((p for p, (a, b) in enumerate(zip(slow_ids[i], fast_ids[i])) if a != b),
+                        min(len(slow_ids[i]), len(fast_ids[i])))
+        report['first_mismatch'] = {
+            'text': texts[i][:150],
+            'position': position,
+            'slow': slow.convert_ids_to_tokens(slow_ids[i][position:position + 5]),
+            'fast': fast.convert_ids_to_tokens(fast_ids[i][position:position + 5])
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert saved tokenizers to tokenizer.json and check fast vs slow token ids')
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS),
+                        help='Models to convert / check (default: all)')
+    parser.add_argument('--convert', action='store_true', help='Write tokenizer.json into saved model folders missing it')
+    parser.add_argument('--limit', type=int, default=None, help='Texts per corpus (default: all)')
+    args = parser.parse_args()
+
+    report = {}
+    for name in args.models:
+        model_dir, kind, base_model = MODELS[name]
+        if not os.path.exists(model_dir):
+            print(f"⚠️ {name}: {model_dir} not found, checking base {base_model} tokenizer")
+            model_dir = base_model
+        elif args.convert:
+            convert_tokenizer_dir(model_dir, kind)
+        print(f"[INFO] Checking {name} tokenizer...")
+        report[name] = compare(model_dir, kind, load_corpus(name)[:args.limit])
+
+    print("=" * 60)
+    print("FAST TOKENIZER CHECK")
+    print("=" * 60)
+    print(json.dumps(report, indent=2))
+    if any(r['mismatches'] for r in report.values()):
+        print("❌ Fast tokenizer ids differ from slow tokenizer ids")
+        sys.exit(1)
+    print("✅ Fast and slow tokenizers give identical token ids")
+
+if __name__ == "__main__":
+    main()
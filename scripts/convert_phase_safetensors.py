@@ -0,0 +1,62 @@
+"""
+Convert Phase Classifier Weights to Safetensors
+One-off conversion of a trained phase_classifier.pth to phase_classifier.safetensors
+(memory-mapped at inference) plus config.json, for model folders saved before the
+trainer wrote them. Run it again after replacing the .pth by hand
+"""
+import os
+import sys
+import json
+import argparse
+import torch
+from safetensors.torch import save_file
+from transformers import BertConfig
+
+# Set UTF-8 encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.phase_detector import WEIGHTS_PTH, WEIGHTS_SAFETENSORS
+from scripts.onnx_phase_detector import default_model_dir
+from scripts.derived_artifacts import PHASE_PTH_FILES, artifact_is_current, record_artifact_source
+
+# conversion function
+# 1. skip when the safetensors file was already written from the current .pth
+# 2. save the .pth state dict as safetensors (contiguous tensors, as safetensors requires)
+# 3. write the default BERT config when the folder has none (older saves are bert-base-uncased)
+# 4. record the .pth the safetensors file was made from, so PhaseDetector can tell it is current
+def convert_phase_safetensors(model_dir, force=False):
+    model_path = os.path.join(model_dir, WEIGHTS_PTH)
+    safetensors_path = os.path.join(model_dir, WEIGHTS_SAFETENSORS)
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"No {WEIGHTS_PTH} in {model_dir}")
+    if not force and artifact_is_current(safetensors_path, model_dir, PHASE_PTH_FILES):
+        return {'model_dir': model_dir, 'converted': False, 'reason': f'{WEIGHTS_SAFETENSORS} is current'}
+
+    state_dict = torch.load(model_path, map_location='cpu')
+    save_file({k: v.contiguous() for k, v in state_dict.items()}, safetensors_path)
+    if not os.path.exists(os.path.join(model_dir, 'config.json')):
+        BertConfig().save_pretrained(model_dir)
+    record_artifact_source(safetensors_path, model_dir, PHASE_PTH_FILES)
+    return {
+        'model_dir': model_dir,
+        'converted': True,
+        'tensors': len(state_dict),
+        'size_mb': round(os.path.getsize(safetensors_path) / (1024 * 1024), 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert trained phase classifier weights to safetensors')
+    parser.add_argument('--model-dir', default=default_model_dir(), help='Trained model directory')
+    parser.add_argument('--force', action='store_true', help='Convert even when the safetensors file is current')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CONVERT PHASE CLASSIFIER TO SAFETENSORS")
+    print("=" * 60)
+    print(json.dumps(convert_phase_safetensors(args.model_dir, args.force), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,12 @@ import sys
 import json
 import re
 import sqlite3
+import time
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 from bs4 import BeautifulSoup
 from pathlib import Path
 import argparse
@@ -13,6 +17,10 @@ import argparse
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from data.database_manager import JobDatabase
 
+# Bump whenever a selector or extraction rule changes so --reparse can
+# rebuild the jobs table from history and tag rows with the parser that made them
+PARSER_VERSION = '2'
+
 # ======= 🧱 function to detect website type from HTML =======
 def detect_website_type(soup, url_hint=None):
     """
@@ -630,6 +638,153 @@ def get_html_from_database(db: JobDatabase, limit: int = 10) -> List[Tuple[str,
     conn.close()
     return html_data
 
+# ======= ♻️ functions for versioned re-parse of scraped_data =======
+# stream browser scrapes from the database in id order
+# 1. read one small page of rows per query (keyset pagination on id)
+# 2. close the connection before yielding so writers are never blocked
+# 3. yield only rows that actually contain HTML
+def iter_html_from_database(db: JobDatabase, start_after_id: int = 0,
+                            page_size: int = 10) -> Iterator[Tuple[int, str, str]]:
+    """
+    Stream HTML content from database without loading every row at once
+    Yields tuples: (scrape_id, source_identifier, html_content)
+    """
+    last_id = start_after_id
+    while True:
+        conn = sqlite3.connect(db.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, file_path, raw_content, scrape_timestamp
+            FROM scraped_data
+            WHERE scrape_type = 'browser' AND id > ?
+            ORDER BY id ASC
+            LIMIT ?
+        ''', (last_id, page_size))
+        rows = cursor.fetchall()
+        conn.close()
+
+        if not rows:
+            return
+
+        for row in rows:
+            last_id = row[0]
+            html_row = _html_row(*row)
+            if html_row:
+                yield html_row
+
+# stream the given scrapes (failed pages of an earlier run), same filtering as above
+# (ids whose row is gone or holds no HTML are added to skipped)
+def iter_html_by_ids(db: JobDatabase, scrape_ids: List[int], page_size: int = 10,
+                     skipped: Optional[List[int]] = None) -> Iterator[Tuple[int, str, str]]:
+    for start in range(0, len(scrape_ids), page_size):
+        chunk = scrape_ids[start:start + page_size]
+        conn = sqlite3.connect(db.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id, file_path, raw_content, scrape_timestamp
+            FROM scraped_data
+            WHERE id IN ({",".join("?" * len(chunk))})
+            ORDER BY id ASC
+        ''', chunk)
+        rows = cursor.fetchall()
+        conn.close()
+        if skipped is not None:
+            # ids whose row is gone
+            found = {row[0] for row in rows}
+            skipped.extend(scrape_id for scrape_id in chunk if scrape_id not in found)
+        for row in rows:
+            html_row = _html_row(*row)
+            if html_row:
+                yield html_row
+            elif skipped is not None:
+                skipped.append(row[0])
+
+# (scrape_id, identifier, html) for a scraped_data row holding HTML, None otherwise
+def _html_row(scrape_id, file_path, html_content, timestamp):
+    if html_content and ('<html' in html_content or '<!DOCTYPE' in html_content):
+        identifier = file_path if file_path else f'db_record_{scrape_id}_{str(timestamp).replace(":", "").replace(" ", "_")}'
+        return scrape_id, identifier, html_content
+    return None
+
+# parse one scraped_data row inside a worker process
+# job_uids that are not stable across runs (generic_N, timestamped python.org ids)
+# are replaced with ids derived from the scrape so re-runs update instead of duplicating
+# (rows stored under the old ids are matched by title + url in upsert_reparsed_jobs)
+def _reparse_worker(row):
+    scrape_id, identifier, html_content = row
+    result = parse_html_content(html_content, identifier)
+    if 'error' in result:
+        return scrape_id, identifier, [], result['error']
+
+    jobs = result.get('jobs', [])
+    for j, job in enumerate(jobs):
+        job_uid = job.get('job_uid', '')
+        if not job_uid or job_uid.startswith(('generic_', 'python_org_')):
+            job['job_uid'] = f'db_{scrape_id}_{j+1}'
+    return scrape_id, identifier, jobs, None
+
+# re-apply the current parser to every stored scrape
+# 1. retry pages earlier runs of this parser version failed on, then resume after the checkpoint
+# 2. parse pages in a process pool with at most max_in_flight pages submitted
+# 3. apply results in id order so the checkpoint only ever moves past finished scrapes,
+#    failed pages are recorded in reparse_failures for the next run
+# 4. drop retries that have nothing left to parse (scrape deleted or without HTML)
+def reparse_database(db: JobDatabase, parser_version: str = PARSER_VERSION,
+                     workers: int = None, max_in_flight: int = None,
+                     reset: bool = False) -> dict:
+    """Rebuild jobs from scraped_data with a resumable, memory-bounded worker pool"""
+    if reset:
+        db.reset_reparse_checkpoint(parser_version)
+    start_after_id = db.get_reparse_checkpoint(parser_version)
+    retry_ids = db.get_reparse_failures(parser_version)
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    max_in_flight = max_in_flight or workers * 2
+
+    print(f'♻️  Reparse with parser v{parser_version}: workers={workers}, max in flight={max_in_flight}')
+    print(f'📍 Resuming after scrape id {start_after_id}, retrying {len(retry_ids)} failed pages')
+
+    stats = {
+        'parser_version': parser_version,
+        'resumed_after_id': start_after_id,
+        'pages_processed': 0,
+        'pages_failed': 0,
+        'failed_pages_retried': len(retry_ids),
+        'jobs_upserted': 0,
+        'last_scrape_id': start_after_id
+    }
+    started = time.perf_counter()
+
+    def apply_result(future):
+        scrape_id, identifier, jobs, error = future.result()
+        if error:
+            print(f'❌ {identifier}: {error}')
+            stats['pages_failed'] += 1
+        # failed pages advance the checkpoint too but stay in reparse_failures until they parse
+        stats['jobs_upserted'] += db.upsert_reparsed_jobs(scrape_id, jobs, parser_version, error)
+        stats['pages_processed'] += 1
+        stats['last_scrape_id'] = max(stats['last_scrape_id'], scrape_id)
+
+    # retry ids without a row or HTML any more are dropped from reparse_failures after the run
+    dead_ids = []
+    rows = itertools.chain(iter_html_by_ids(db, retry_ids, skipped=dead_ids),
+                           iter_html_from_database(db, start_after_id))
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for row in rows:
+            in_flight.append(pool.submit(_reparse_worker, row))
+            if len(in_flight) >= max_in_flight:
+                apply_result(in_flight.popleft())
+        while in_flight:
+            apply_result(in_flight.popleft())
+
+    stats['failed_pages_dropped'] = db.clear_reparse_failures(parser_version, dead_ids)
+    elapsed = time.perf_counter() - started
+    stats['elapsed_seconds'] = round(elapsed, 2)
+    stats['failed_pages_pending'] = len(db.get_reparse_failures(parser_version))
+    stats['pages_per_second'] = round(stats['pages_processed'] / elapsed, 2) if elapsed > 0 else 0.0
+    return stats
+
 def main():
 
     # inside varable call argparse to handle powershell arguments
@@ -639,8 +794,28 @@ def main():
     parser.add_argument('--direct-db', action='store_true', help='Save jobs directly to database without JSON files')
     parser.add_argument('--from-db', action='store_true', help='Read HTML content from database instead of raw files')
     parser.add_argument('--db-limit', type=int, default=10, help='Limit number of records from database (default: 10)')
+    parser.add_argument('--reparse', action='store_true', help='Re-parse every stored scrape with the current parser and upsert jobs')
+    parser.add_argument('--parser-version', default=PARSER_VERSION, help=f'Version tag written to re-parsed jobs (default: {PARSER_VERSION})')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --reparse (default: CPU count - 1)')
+    parser.add_argument('--max-in-flight', type=int, default=None, help='Max pages held in memory during --reparse (default: 2 x workers)')
+    parser.add_argument('--reset-checkpoint', action='store_true', help='Start --reparse from the oldest scrape instead of resuming')
     args = parser.parse_args()
 
+    if args.reparse:
+        base_dir = Path(__file__).parent.parent
+        db = JobDatabase(str(base_dir / 'data' / 'jobs.db'))
+        stats = reparse_database(
+            db,
+            parser_version=args.parser_version,
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            reset=args.reset_checkpoint
+        )
+        print(f'\n📊 REPARSE SUMMARY')
+        print(f'================')
+        print(json.dumps(stats, indent=2))
+        return
+
     print('🔍 JOB DATA PARSER (Universal)')
     print('==============================')
     print('🌐 Supports: Upwork + Generic job websites')
@@ -0,0 +1,48 @@
+"""
+Derived Model Artifacts
+Files built from trained fp32 weights (INT8 weights, ONNX export) record which weights they
+were built from in a <artifact>.source.json sidecar, so a retrain makes them stale instead
+of silently serving the old model
+"""
+import os
+import json
+
+# fp32 weight files per model kind, all that exist are part of the signature
+PHASE_WEIGHT_FILES = ['phase_classifier.pth', 'phase_classifier.safetensors']
+GPT2_WEIGHT_FILES = ['model.safetensors', 'pytorch_model.bin']
+# the phase safetensors weights are themselves converted from the .pth
+PHASE_PTH_FILES = ['phase_classifier.pth']
+
+def _sidecar_path(artifact_path):
+    return f"{artifact_path}.source.json"
+
+# size and mtime of each weight file in the model directory
+def source_signature(model_dir, weight_files):
+    signature = {}
+    for name in weight_files:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            signature[name] = f"{stat.st_size}:{stat.st_mtime_ns}"
+    return signature
+
+# artifact exists and was built from the weights currently in model_dir
+# (artifacts from before the sidecar existed count as stale and are rebuilt once)
+def artifact_is_current(artifact_path, model_dir, weight_files):
+    if not os.path.exists(artifact_path):
+        return False
+    try:
+        with open(_sidecar_path(artifact_path), 'r', encoding='utf-8') as f:
+            recorded = json.load(f).get('sources')
+    except (OSError, ValueError):
+        return False
+    current = source_signature(model_dir, weight_files)
+    return bool(current) and recorded == current
+
+# write the sidecar right after the artifact is (re)built
+def record_artifact_source(artifact_path, model_dir, weight_files):
+    try:
+        with open(_sidecar_path(artifact_path), 'w', encoding='utf-8') as f:
+            json.dump({'sources': source_signature(model_dir, weight_files)}, f, indent=2)
+    except OSError as e:
+        print(f"⚠️ Could not record source weights of {os.path.basename(artifact_path)}: {e}")
@@ -0,0 +1,93 @@
+"""
+Export Phase Classifier to ONNX
+Converts the trained phase_classifier_v1 to phase_classifier.onnx with dynamic
+batch and sequence axes, writes tokenizer.json and checks outputs against torch
+"""
+import os
+import sys
+import json
+import argparse
+import torch
+
+# Set UTF-8 encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.phase_detector import PhaseDetector
+from scripts.onnx_phase_detector import OnnxPhaseDetector, ONNX_MODEL_FILE, default_model_dir
+from scripts.derived_artifacts import PHASE_WEIGHT_FILES, record_artifact_source
+
+# contexts used to compare torch and ONNX outputs after export
+CHECK_CONTEXTS = [
+    "client: Hi, are you available for a writing project?",
+    "client: What is your rate per article?\nfreelancer: $40 per article.\nclient: Can you deliver by Friday?",
+    "client: I sent the contract, please accept it."
+]
+
+# export function
+# 1. load trained fp32 PhaseDetector (must not fall back to base BERT)
+# 2. save fast tokenizer so tokenizer.json sits next to the model
+# 3. torch.onnx.export with dynamic batch / sequence axes
+# 4. record the fp32 weights the export was made from (auto backend skips stale exports)
+# 5. compare ONNX and torch probabilities on a few contexts
+def export_phase_onnx(model_dir, opset):
+    detector = PhaseDetector(model_dir, quantized=False)
+    if not detector.is_trained_model:
+        raise RuntimeError(f"No trained phase classifier in {model_dir}, nothing to export")
+    model = detector.model.to('cpu').eval()
+
+    detector.tokenizer.save_pretrained(model_dir)
+
+    sample = detector.tokenizer(CHECK_CONTEXTS, padding=True, truncation=True, max_length=256, return_tensors='pt')
+    onnx_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+    print(f"🔄 Exporting to {onnx_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask']),
+            onnx_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=opset,
+            do_constant_folding=True
+        )
+    record_artifact_source(onnx_path, model_dir, PHASE_WEIGHT_FILES)
+
+    onnx_detector = OnnxPhaseDetector(model_dir)
+    torch_results = detector.predict_batch(CHECK_CONTEXTS, return_probabilities=True)
+    onnx_results = onnx_detector.predict_batch(CHECK_CONTEXTS, return_probabilities=True)
+    max_diff = max(
+        abs(t['all_probabilities'][label] - o['all_probabilities'][label])
+        for t, o in zip(torch_results, onnx_results)
+        for label in detector.phase_labels
+    )
+    return {
+        'success': True,
+        'onnx_path': onnx_path,
+        'size_mb': round(os.path.getsize(onnx_path) / (1024 * 1024), 1),
+        'phases_match': all(t['phase'] == o['phase'] for t, o in zip(torch_results, onnx_results)),
+        'max_probability_diff': round(max_diff, 6)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Export trained phase classifier to ONNX')
+    parser.add_argument('--model-dir', default=default_model_dir(), help='Trained model directory')
+    parser.add_argument('--opset', type=int, default=14, help='ONNX opset version (default: 14)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("EXPORT PHASE CLASSIFIER TO ONNX")
+    print("=" * 60)
+    result = export_phase_onnx(args.model_dir, args.opset)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['phases_match'] else 1)
+
+if __name__ == "__main__":
+    main()
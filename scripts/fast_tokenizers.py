@@ -0,0 +1,50 @@
+"""
+Fast Tokenizers
+One place that loads the Rust-backed GPT-2 / BERT tokenizers (GPT2TokenizerFast,
+BertTokenizerFast) for generators, phase detectors and trainers, encodes lists of texts
+in one call, and converts saved tokenizer folders (vocab / merges files only) to tokenizer.json
+"""
+import os
+
+# single-file fast tokenizer, also read directly by the ONNX phase detector
+TOKENIZER_FILE = 'tokenizer.json'
+
+# GPT-2 fast tokenizer, pad token falls back to eos like every GPT-2 caller here expects
+def load_gpt2_tokenizer(path, cache_dir=None):
+    from transformers import GPT2TokenizerFast
+    tokenizer = GPT2TokenizerFast.from_pretrained(path, cache_dir=cache_dir)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+# BERT fast tokenizer (phase classifiers)
+def load_bert_tokenizer(path):
+    from transformers import BertTokenizerFast
+    return BertTokenizerFast.from_pretrained(path)
+
+# fast tokenizer class per model kind
+FAST_CLASSES = {'gpt2': 'GPT2TokenizerFast', 'bert': 'BertTokenizerFast'}
+
+# encode a list of texts in one tokenizer call instead of one call per text
+# kwargs go to the tokenizer as-is (truncation, max_length, padding, return_tensors ...)
+def batch_encode(tokenizer, texts, **kwargs):
+    return tokenizer([str(text) for text in texts], **kwargs)
+
+def has_tokenizer_json(model_dir):
+    return os.path.exists(os.path.join(model_dir, TOKENIZER_FILE))
+
+# write tokenizer.json next to the slow tokenizer files of a saved model
+# 1. skip folders that already have it (or have no tokenizer at all)
+# 2. load the fast tokenizer, transformers converts it from vocab / merges files
+#    (no pad token default here, the saved special tokens stay as they were)
+# 3. save_pretrained of a fast tokenizer writes tokenizer.json, later loads skip step 2
+def convert_tokenizer_dir(model_dir, kind='gpt2'):
+    if has_tokenizer_json(model_dir):
+        return False
+    if not os.path.exists(os.path.join(model_dir, 'tokenizer_config.json')):
+        return False
+    import transformers
+    tokenizer = getattr(transformers, FAST_CLASSES[kind]).from_pretrained(model_dir)
+    tokenizer.save_pretrained(model_dir)
+    print(f"✅ Converted {model_dir} tokenizer to {TOKENIZER_FILE}")
+    return True
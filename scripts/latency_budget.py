@@ -0,0 +1,123 @@
+"""
+Generation Latency Budget
+Time-based stopping for GPT-2 generate calls: generation stops early enough that the call
+finishes inside its budget, the text is trimmed to its last complete sentence and every
+call is recorded so the p95 latency of chat and cover letter generation can be checked
+against the configured target
+"""
+import os
+import re
+import time
+import threading
+
+# p95 latency target per generate call in ms, GENERATION_LATENCY_BUDGET_MS overrides, 0 = no budget
+DEFAULT_LATENCY_BUDGET_MS = 8000
+# time of one decoding step assumed before a generator has measured its own
+DEFAULT_STEP_MS = 120
+# generation stops this many steps before the deadline (the step in flight plus decoding)
+STEP_MARGIN = 1.5
+# samples kept per generator kind for the p95 report
+MAX_SAMPLES = 500
+
+def latency_budget_ms(value=None):
+    if value is not None:
+        return float(value)
+    return float(os.environ.get('GENERATION_LATENCY_BUDGET_MS', DEFAULT_LATENCY_BUDGET_MS))
+
+# cut text after its last sentence end (. ! ?), unchanged when it has none
+def trim_to_last_sentence(text):
+    ends = [match.end() for match in re.finditer(r'[.!?](?=\s|$)', text)]
+    return text[:ends[-1]] if ends else text
+
+# p-th percentile of a list of numbers (nearest rank)
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+# process-wide record of generate calls per kind ('chat', 'cover_letter')
+class LatencyTracker:
+    def __init__(self):
+        self.samples = {}
+        self.step_ms = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, elapsed_ms, budget_ms, budget_hit, new_tokens):
+        with self.lock:
+            samples = self.samples.setdefault(kind, [])
+            samples.append({'elapsed_ms': elapsed_ms, 'budget_ms': budget_ms, 'budget_hit': budget_hit})
+            del samples[:-MAX_SAMPLES]
+            # moving average of the time per generated token, used as the stopping margin
+            if new_tokens:
+                step = elapsed_ms / new_tokens
+                self.step_ms[kind] = 0.7 * self.step_ms.get(kind, step) + 0.3 * step
+
+    def margin_ms(self, kind):
+        return STEP_MARGIN * self.step_ms.get(kind, DEFAULT_STEP_MS)
+
+    def summary(self, target_ms=None):
+        target_ms = latency_budget_ms(target_ms)
+        with self.lock:
+            report = {'target_ms': target_ms}
+            for kind, samples in self.samples.items():
+                latencies = [s['elapsed_ms'] for s in samples]
+                p95 = round(percentile(latencies, 95), 1)
+                report[kind] = {
+                    'calls': len(samples),
+                    'p50_ms': round(percentile(latencies, 50), 1),
+                    'p95_ms': p95,
+                    'budget_hits': sum(s['budget_hit'] for s in samples),
+                    'within_target': not target_ms or p95 <= target_ms
+                }
+            return report
+
+tracker = LatencyTracker()
+
+# MaxTimeCriteria that remembers whether it stopped the generation
+_deadline_class = None
+
+def _deadline_criteria(max_time, started):
+    global _deadline_class
+    if _deadline_class is None:
+        from transformers import MaxTimeCriteria
+
+        class DeadlineCriteria(MaxTimeCriteria):
+            hit = False
+
+            def __call__(self, input_ids, scores, **kwargs):
+                stop = super().__call__(input_ids, scores, **kwargs)
+                if bool(stop.all() if hasattr(stop, 'all') else stop):
+                    self.hit = True
+                return stop
+
+        _deadline_class = DeadlineCriteria
+    return _deadline_class(max_time=max_time, initial_timestamp=started)
+
+# budget of one generate call
+# 1. created before tokenization, so the budget covers the whole call
+# 2. stopping_criteria stops generation one margin (measured step time) before the deadline
+# 3. finish records the call and returns budget_ms / elapsed_ms / budget_hit
+class GenerationBudget:
+    def __init__(self, kind, budget_ms=None):
+        self.kind = kind
+        self.budget_ms = latency_budget_ms(budget_ms)
+        self.started = time.time()
+        self.criteria = None
+
+    def stopping_criteria(self):
+        if self.budget_ms <= 0:
+            return None
+        from transformers import StoppingCriteriaList
+        max_ms = max(self.budget_ms - tracker.margin_ms(self.kind), 0)
+        self.criteria = _deadline_criteria(max_ms / 1000, self.started)
+        return StoppingCriteriaList([self.criteria])
+
+    @property
+    def hit(self):
+        return bool(self.criteria and self.criteria.hit)
+
+    def finish(self, new_tokens=0):
+        elapsed_ms = round((time.time() - self.started) * 1000, 1)
+        tracker.record(self.kind, elapsed_ms, self.budget_ms, self.hit, new_tokens)
+        if self.hit:
+            print(f"[BUDGET] {self.kind} generation stopped at the {self.budget_ms:.0f}ms budget ({elapsed_ms}ms)")
+        return {'budget_ms': self.budget_ms, 'elapsed_ms': elapsed_ms, 'budget_hit': self.hit}
@@ -0,0 +1,53 @@
+"""
+Model Server Client
+Thin client for the resident model server (scripts/model_server.py)
+Only uses the standard library so callers can try the server before importing torch
+"""
+import os
+import json
+import urllib.request
+import urllib.error
+
+# default address of scripts/model_server.py, override with MODEL_SERVER_URL
+DEFAULT_MODEL_SERVER_URL = 'http://127.0.0.1:8765'
+
+# localhost must never go through HTTP(S)_PROXY settings
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+def get_model_server_url():
+    """Base URL of the model server"""
+    return os.environ.get('MODEL_SERVER_URL', DEFAULT_MODEL_SERVER_URL).rstrip('/')
+
+# send one request to the model server
+# 1. skip entirely when MODEL_SERVER_DISABLED=1
+# 2. POST payload as JSON to the endpoint
+# 3. return the decoded result, or None if the server is down or reported an error
+#    so the caller can fall back to loading the model in-process
+def request_model_server(endpoint, payload, timeout=120):
+    """POST to the model server; None when it is unavailable"""
+    if os.environ.get('MODEL_SERVER_DISABLED') == '1':
+        return None
+
+    request = urllib.request.Request(
+        get_model_server_url() + endpoint,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with _opener.open(request, timeout=timeout) as response:
+            result = json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        try:
+            error = json.loads(e.read().decode('utf-8')).get('error', str(e))
+        except ValueError:
+            error = str(e)
+        print(f"[MODEL SERVER] {endpoint} failed: {error}")
+        return None
+    except (urllib.error.URLError, OSError, ValueError):
+        # server not running - caller loads the model itself
+        return None
+
+    if not result.get('success'):
+        print(f"[MODEL SERVER] {endpoint} failed: {result.get('error', 'unknown error')}")
+        return None
+    return result
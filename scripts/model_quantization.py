@@ -0,0 +1,73 @@
+"""
+INT8 Dynamic Quantization
+Opt-in CPU inference mode for the phase classifier and the GPT-2 generators
+Linear layers are quantized to int8, quantized weights are saved next to the originals
+"""
+import os
+import torch
+import torch.nn as nn
+from scripts.derived_artifacts import GPT2_WEIGHT_FILES, artifact_is_current, record_artifact_source
+
+# quantized GPT-2 weights file inside the model directory
+GPT2_QUANTIZED_WEIGHTS = 'model_int8.pt'
+
+# opt-in flag, explicit argument wins over MODEL_QUANTIZED=1 environment variable
+def quantization_enabled(flag=None):
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get('MODEL_QUANTIZED') == '1'
+
+# GPT-2 uses transformers Conv1D (x @ W + b) instead of nn.Linear
+# swap them for nn.Linear with transposed weights so dynamic quantization reaches them
+def conv1d_to_linear(model):
+    from transformers.pytorch_utils import Conv1D
+    for module in list(model.modules()):
+        for child_name, child in list(module.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = nn.Linear(in_features, out_features)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(module, child_name, linear)
+    return model
+
+# dynamic int8 quantization of every Linear layer (weights int8, activations quantized per batch)
+def quantize_linear_int8(model):
+    model = conv1d_to_linear(model)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+# size of model weights in MB, quantized modules keep packed weights outside parameters()
+def model_size_mb(model):
+    import io
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return round(buffer.tell() / (1024 * 1024), 1)
+
+# load GPT-2 in int8
+# 1. if model_int8.pt is next to the model and built from its current weights,
+#    build architecture from config and load it
+# 2. else (missing or the model was retrained) load fp32 model, quantize it and save model_int8.pt
+# 3. hub names like "gpt2" have no local directory, they are quantized in memory only
+def load_gpt2_quantized(model_path, cache_dir=None):
+    from transformers import GPT2Config, GPT2LMHeadModel
+    model_dir = str(model_path)
+    quantized_path = os.path.join(model_dir, GPT2_QUANTIZED_WEIGHTS) if os.path.isdir(model_dir) else None
+
+    if quantized_path and artifact_is_current(quantized_path, model_dir, GPT2_WEIGHT_FILES):
+        model = quantize_linear_int8(GPT2LMHeadModel(GPT2Config.from_pretrained(model_dir)))
+        model.load_state_dict(torch.load(quantized_path, map_location='cpu'))
+        print(f"✅ INT8 GPT-2 loaded from {GPT2_QUANTIZED_WEIGHTS}")
+        return model
+
+    if quantized_path and os.path.exists(quantized_path):
+        print(f"[INFO] {GPT2_QUANTIZED_WEIGHTS} is older than the trained weights, requantizing")
+    model = quantize_linear_int8(GPT2LMHeadModel.from_pretrained(model_dir, cache_dir=cache_dir))
+    if quantized_path:
+        try:
+            torch.save(model.state_dict(), quantized_path)
+            record_artifact_source(quantized_path, model_dir, GPT2_WEIGHT_FILES)
+            print(f"[INFO] Saved {GPT2_QUANTIZED_WEIGHTS} next to {model_dir}")
+        except OSError as e:
+            print(f"⚠️ Could not save {GPT2_QUANTIZED_WEIGHTS}: {e}")
+    return model
@@ -0,0 +1,229 @@
+"""
+Shared Model Registry
+One process-wide cache of GPT-2 models and tokenizers keyed by path, dtype and device,
+so the chat, cover letter and local AI generators share one copy of the same weights.
+Least recently used models are evicted when the memory budget is exceeded or after an idle TTL
+"""
+import os
+import gc
+import time
+import threading
+from collections import OrderedDict
+
+# memory budget for resident models in MB (0 = unlimited), MODEL_MEMORY_BUDGET_MB overrides
+DEFAULT_MEMORY_BUDGET_MB = 3072
+# seconds a model may stay unused before eviction (0 = never), MODEL_IDLE_TTL overrides
+DEFAULT_IDLE_TTL = 1800
+# size assumed before the first load when there are no local weight files (GPT-2 base fp32)
+DEFAULT_MODEL_ESTIMATE_MB = 500
+WEIGHT_FILES = ('model.safetensors', 'pytorch_model.bin')
+QUANTIZED_WEIGHT_FILE = 'model_int8.pt'
+
+def memory_budget_mb(value=None):
+    if value is not None:
+        return float(value)
+    return float(os.environ.get('MODEL_MEMORY_BUDGET_MB', DEFAULT_MEMORY_BUDGET_MB))
+
+def idle_ttl_seconds(value=None):
+    if value is not None:
+        return float(value)
+    return float(os.environ.get('MODEL_IDLE_TTL', DEFAULT_IDLE_TTL))
+
+# registry key, local directories by absolute path so relative and absolute paths share an entry
+def model_key(model_path, quantized=False, device='cpu'):
+    path = str(model_path)
+    if os.path.isdir(path):
+        path = os.path.abspath(path)
+    return (path, 'int8' if quantized else 'float32', str(device))
+
+# expected size of a model before loading it, from its weight files when they are on disk
+def estimate_load_mb(model_path, quantized=False):
+    path = str(model_path)
+    if os.path.isdir(path):
+        names = ((QUANTIZED_WEIGHT_FILE,) if quantized else ()) + WEIGHT_FILES
+        for name in names:
+            weights = os.path.join(path, name)
+            if os.path.exists(weights):
+                return round(os.path.getsize(weights) / (1024 * 1024), 1)
+    return DEFAULT_MODEL_ESTIMATE_MB
+
+# size of a loaded model in MB, quantized modules keep packed weights outside parameters()
+def resident_mb(model, quantized=False):
+    if quantized:
+        from scripts.model_quantization import model_size_mb
+        return model_size_mb(model)
+    tensors = list(model.parameters()) + list(model.buffers())
+    return round(sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024), 1)
+
+# class that owns the shared models
+# 1. get_gpt2 returns the cached model and tokenizer for (path, dtype, device) or loads them once
+# 2. every get counts a user, release gives it back, in-use models are only evicted through
+#    a holder callback (hold) that drops the holder's reference first
+# 3. before a load, least recently used models are evicted until the new one fits the budget
+# 4. evict_idle drops models unused for longer than the idle TTL (start_idle_reaper runs it periodically)
+class ModelRegistry:
+    def __init__(self, budget_mb=None, idle_ttl=None):
+        self.budget_mb = memory_budget_mb(budget_mb)
+        self.idle_ttl = idle_ttl_seconds(idle_ttl)
+        # key -> entry, least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.stats = {'loads': 0, 'hits': 0, 'evictions': 0}
+        self._reaper = None
+
+    # shared GPT-2 model and tokenizer, loaded in eval mode on device with left padding
+    def get_gpt2(self, model_path, quantized=False, device='cpu', cache_dir=None):
+        key = model_key(model_path, quantized, device)
+        with self.lock:
+            self.evict_idle()
+            entry = self.entries.get(key)
+            if entry is None:
+                self._make_room(estimate_load_mb(key[0], quantized), exclude=key)
+                entry = self._load_gpt2(key, quantized, cache_dir)
+                self.entries[key] = entry
+                self.stats['loads'] += 1
+                # actual size can be above the estimate
+                self._make_room(0, exclude=key)
+            else:
+                self.stats['hits'] += 1
+            entry['users'] += 1
+            self._touch(key)
+            return entry['model'], entry['tokenizer']
+
+    def _load_gpt2(self, key, quantized, cache_dir):
+        import torch
+        from transformers import GPT2LMHeadModel
+        from scripts.fast_tokenizers import load_gpt2_tokenizer
+        path, _, device = key
+        started = time.perf_counter()
+        tokenizer = load_gpt2_tokenizer(path, cache_dir=cache_dir)
+        tokenizer.padding_side = 'left'
+        if quantized:
+            from scripts.model_quantization import load_gpt2_quantized
+            model = load_gpt2_quantized(path, cache_dir=cache_dir)
+        else:
+            model = GPT2LMHeadModel.from_pretrained(path, cache_dir=cache_dir,
+                                                    torch_dtype=torch.float32, low_cpu_mem_usage=True)
+        model.to(device)
+        model.eval()
+        size_mb = resident_mb(model, quantized)
+        print(f"[INFO] Registry loaded {os.path.basename(path)} ({key[1]}, {device}, {size_mb} MB) "
+              f"in {time.perf_counter() - started:.1f}s")
+        return {'model': model, 'tokenizer': tokenizer, 'size_mb': size_mb,
+                'users': 0, 'holders': [], 'last_used': time.time()}
+
+    def _entry_for(self, model):
+        for key, entry in self.entries.items():
+            if entry['model'] is model:
+                return key, entry
+        return None, None
+
+    def _touch(self, key):
+        self.entries[key]['last_used'] = time.time()
+        self.entries.move_to_end(key)
+
+    # mark a model as used now (long-lived holders call this per request)
+    def touch(self, model):
+        with self.lock:
+            key, _ = self._entry_for(model)
+            if key:
+                self._touch(key)
+
+    # holder callback for an in-use model, called before eviction
+    # it must drop the holder's reference and release the model, returning False when busy
+    def hold(self, model, on_evict):
+        with self.lock:
+            _, entry = self._entry_for(model)
+            if entry:
+                entry['holders'].append(on_evict)
+
+    # give a model back, it stays cached for the next get until LRU / TTL eviction
+    def release(self, model):
+        with self.lock:
+            _, entry = self._entry_for(model)
+            if entry:
+                entry['users'] = max(0, entry['users'] - 1)
+
+    # drop the registry reference when nobody uses the model any more
+    def _evict(self, key):
+        entry = self.entries[key]
+        if entry['users'] > len(entry['holders']):
+            return False
+        for on_evict in list(entry['holders']):
+            if not on_evict():
+                return False
+            entry['holders'].remove(on_evict)
+        if entry['users'] > 0:
+            return False
+        del self.entries[key]
+        self.stats['evictions'] += 1
+        device = key[2]
+        del entry
+        gc.collect()
+        if device.startswith('cuda'):
+            import torch
+            torch.cuda.empty_cache()
+        return True
+
+    def resident_total_mb(self):
+        return round(sum(entry['size_mb'] for entry in self.entries.values()), 1)
+
+    # evict least recently used models until needed_mb more fits in the budget
+    def _make_room(self, needed_mb, exclude=None):
+        if self.budget_mb <= 0:
+            return
+        for key in list(self.entries):
+            if self.resident_total_mb() + needed_mb <= self.budget_mb:
+                return
+            if key != exclude and self._evict(key):
+                print(f"[INFO] Registry evicted {os.path.basename(key[0])} ({key[1]}) "
+                      f"to stay within {self.budget_mb:.0f} MB")
+        if self.resident_total_mb() + needed_mb > self.budget_mb:
+            print(f"⚠️ Models need {self.resident_total_mb() + needed_mb:.0f} MB, "
+                  f"over the {self.budget_mb:.0f} MB budget, nothing idle to evict")
+
+    def evict_idle(self):
+        if self.idle_ttl <= 0:
+            return
+        with self.lock:
+            now = time.time()
+            for key in list(self.entries):
+                if now - self.entries[key]['last_used'] > self.idle_ttl and self._evict(key):
+                    print(f"[INFO] Registry evicted idle {os.path.basename(key[0])} ({key[1]})")
+
+    # background thread for long-running processes, evicts idle models every interval seconds
+    def start_idle_reaper(self, interval=60):
+        if self.idle_ttl <= 0 or self._reaper:
+            return
+        def run():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+        self._reaper = threading.Thread(target=run, daemon=True)
+        self._reaper.start()
+
+    def status(self):
+        with self.lock:
+            now = time.time()
+            return {
+                'budget_mb': self.budget_mb,
+                'idle_ttl': self.idle_ttl,
+                'resident_mb': self.resident_total_mb(),
+                'models': [{
+                    'path': key[0], 'dtype': key[1], 'device': key[2],
+                    'size_mb': entry['size_mb'], 'users': entry['users'],
+                    'idle_seconds': round(now - entry['last_used'], 1)
+                } for key, entry in self.entries.items()],
+                **self.stats
+            }
+
+# process-wide registry
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
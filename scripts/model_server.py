@@ -0,0 +1,314 @@
+"""
+Resident Model Server
+Loads the phase classifier, chat GPT-2 and cover letter GPT-2 once and serves them
+on a local HTTP endpoint, so n8n ticks skip torch imports and weight loading
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Set UTF-8 encoding
+if sys.platform == "win32":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# Add parent directory to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+from scripts.model_client import DEFAULT_MODEL_SERVER_URL
+from scripts.model_registry import get_registry
+from scripts.latency_budget import tracker as latency_tracker
+
+# names of the models the server can host
+MODEL_NAMES = ['phase', 'chat', 'cover_letter']
+
+# class that owns the loaded models
+# 1. each model is loaded once, on startup or on first request
+# 2. one lock per model so concurrent requests never run the same model at once
+# 3. the request functions reuse the existing generator classes unchanged
+# 4. GPT-2 weights come from the shared model registry, which can drop an idle generator
+#    here (LRU over the memory budget or idle TTL), it is loaded again on the next request
+class ModelServer:
+    def __init__(self):
+        self.models = {}
+        self.load_seconds = {}
+        self.locks = {name: threading.Lock() for name in MODEL_NAMES}
+        self.started_at = datetime.now().isoformat()
+        # phase model version returned with every prediction, clients key their phase cache on it
+        self.phase_version = None
+        # database-only SmartChatResponse for the stream endpoint, created on first use under the chat lock
+        self.chat_session = None
+
+    # load model by name with the same classes the CLIs use in-process
+    def _load(self, name):
+        started = time.perf_counter()
+        if name == 'phase':
+            # onnx or torch backend, same choice as standalone_phase_detector
+            from scripts.onnx_phase_detector import load_phase_detector, phase_model_version
+            from scripts.cascade_phase_detector import CascadePhaseDetector
+            model = load_phase_detector()
+            trained = getattr(model, 'is_trained_model', True)
+            self.phase_version = phase_model_version(cascade=isinstance(model, CascadePhaseDetector)) if trained else None
+        elif name == 'chat':
+            from scripts.smart_chat_response import SmartChatResponse
+            model = SmartChatResponse.ChatGPT2Generator()
+        elif name == 'cover_letter':
+            from scripts.smart_cover_letter_generator import SmartCoverLetterGenerator
+            model = SmartCoverLetterGenerator()
+            if not model.load_model_temporarily():
+                raise RuntimeError('Cover letter model failed to load')
+        else:
+            raise ValueError(f'Unknown model: {name}')
+        self.load_seconds[name] = round(time.perf_counter() - started, 2)
+        print(f"[MODEL SERVER] Loaded {name} in {self.load_seconds[name]}s")
+        if name != 'phase':
+            get_registry().hold(model.model, lambda: self._drop(name))
+        return model
+
+    # registry eviction callback, skipped while the model is busy
+    def _drop(self, name):
+        if not self.locks[name].acquire(blocking=False):
+            return False
+        try:
+            generator = self.models.pop(name, None)
+            if generator is not None:
+                generator.unload_model()
+                print(f"[MODEL SERVER] Unloaded {name}")
+            return True
+        finally:
+            self.locks[name].release()
+
+    # run fn with the named model while holding its lock
+    def _with_model(self, name, fn):
+        with self.locks[name]:
+            if name not in self.models:
+                self.models[name] = self._load(name)
+            model = self.models[name]
+            try:
+                return fn(model)
+            finally:
+                if name != 'phase':
+                    get_registry().touch(model.model)
+
+    def preload(self, names):
+        for name in names:
+            self._with_model(name, lambda model: None)
+
+    def phase(self, payload):
+        context = payload['context']
+        result = self._with_model('phase', lambda detector: detector.predict(
+            context, return_probabilities=payload.get('return_probabilities', False)))
+        return {'success': True, **result, 'model_version': self.phase_version}
+
+    def phase_batch(self, payload):
+        contexts = payload['contexts']
+        results = self._with_model('phase', lambda detector: detector.predict_batch(
+            contexts, return_probabilities=payload.get('return_probabilities', False)))
+        results = [{**result, 'model_version': self.phase_version} for result in results]
+        return {'success': True, 'results': results, 'model_version': self.phase_version}
+
+    # generation requests take an optional budget_ms (latency budget) and return its record as 'budget'
+    def chat_response(self, payload):
+        prompt = payload['prompt']
+        response, budget = self._with_model('chat', lambda generator: (generator.generate_single_response(
+            prompt, max_length=payload.get('max_length', 80), budget_ms=payload.get('budget_ms')), generator.last_budget))
+        return {'success': True, 'response': response, 'budget': budget}
+
+    def chat_responses(self, payload):
+        prompt = payload['prompt']
+        candidates, budget = self._with_model('chat', lambda generator: (generator.generate_responses(
+            prompt, num_return_sequences=payload.get('num_return_sequences', 3),
+            max_length=payload.get('max_length', 80), budget_ms=payload.get('budget_ms')), generator.last_budget))
+        return {'success': True, 'candidates': candidates, 'budget': budget}
+
+    def cover_letter(self, payload):
+        job_data = payload['job_data']
+        cover_letter, budget = self._with_model('cover_letter', lambda generator: (generator.generate_cover_letter(
+            job_data, budget_ms=payload.get('budget_ms')), generator.last_budget))
+        if not cover_letter:
+            return {'success': False, 'error': 'Cover letter generation failed'}
+        return {'success': True, 'cover_letter': cover_letter, 'budget': budget}
+
+    def cover_letter_batch(self, payload):
+        jobs_data = payload['jobs_data']
+        cover_letters, budget = self._with_model('cover_letter', lambda generator: (generator.generate_cover_letters(
+            jobs_data, budget_ms=payload.get('budget_ms')), generator.last_budget))
+        return {'success': True, 'cover_letters': cover_letters, 'budget': budget}
+
+    # stream AI response for a session as events, emit(event, data) writes one event
+    #1. prompt from stored phase and recent messages (SmartChatResponse, database only)
+    #2. 'meta' with session and phase, 'token' per text chunk, 'done' with the cleaned response
+    #3. final response saved to temp_ai_suggestions.json like the CLI ai mode
+    def chat_stream(self, session_id, emit):
+        # concurrent first requests build one session (ThreadingHTTPServer)
+        with self.locks['chat']:
+            if self.chat_session is None:
+                from scripts.smart_chat_response import SmartChatResponse
+                self.chat_session = SmartChatResponse()
+        prepared = self.chat_session.prepare_ai_prompt(session_id)
+        if not prepared['success']:
+            emit('failed', prepared)
+            return
+        emit('meta', {key: prepared[key] for key in ('session_id', 'phase', 'confidence')})
+
+        def run(generator):
+            started = time.perf_counter()
+            first_token_ms = None
+            for event in generator.stream_response(prepared['prompt']):
+                if 'delta' in event:
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                    emit('token', {'text': event['delta']})
+                else:
+                    return (event['response'], first_token_ms, round((time.perf_counter() - started) * 1000, 1),
+                            generator.last_budget)
+
+        response, first_token_ms, total_ms, budget = self._with_model('chat', run)
+        emit('done', {'response': response, 'first_token_ms': first_token_ms, 'server_ms': total_ms, 'budget': budget})
+        self.chat_session.save_to_temp_file({
+            'success': True,
+            'session_id': prepared['session_id'],
+            'mode': 'ai',
+            'phase': prepared['phase'],
+            'confidence': prepared['confidence'],
+            'responses': [response]
+        })
+
+    def health(self):
+        return {
+            'success': True,
+            'loaded': sorted(self.models),
+            'load_seconds': self.load_seconds,
+            'started_at': self.started_at,
+            'registry': get_registry().status(),
+            'latency': latency_tracker.summary()
+        }
+
+# HTTP handler that maps endpoints to ModelServer functions
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'ModelServer/1.0'
+    routes = {
+        '/phase': 'phase',
+        '/phase-batch': 'phase_batch',
+        '/chat-response': 'chat_response',
+        '/chat-responses': 'chat_responses',
+        '/cover-letter': 'cover_letter',
+        '/cover-letter-batch': 'cover_letter_batch'
+    }
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # Server-Sent Events stream of one AI response (GET /chat-stream?session_id=...)
+    # CORS header lets chat_dashboard.html opened from disk connect
+    def _stream_chat(self, query):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        def emit(event, data):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            session_id = parse_qs(query).get('session_id', ['latest'])[0]
+            self.server.model_server.chat_stream(session_id, emit)
+        except (BrokenPipeError, ConnectionResetError):
+            print("[MODEL SERVER] Stream client disconnected")
+        except Exception as e:
+            print(f"[MODEL SERVER ERROR] chat_stream: {e}")
+            try:
+                emit('failed', {'success': False, 'error': str(e)})
+            except OSError:
+                pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self._send_json(200, self.server.model_server.health())
+        elif url.path == '/chat-stream':
+            self._stream_chat(url.query)
+        else:
+            self._send_json(404, {'success': False, 'error': f'Unknown endpoint: {self.path}'})
+
+    def do_POST(self):
+        route = self.routes.get(urlparse(self.path).path)
+        if not route:
+            self._send_json(404, {'success': False, 'error': f'Unknown endpoint: {self.path}'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+            started = time.perf_counter()
+            result = getattr(self.server.model_server, route)(payload)
+            result['server_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            self._send_json(200 if result.get('success') else 500, result)
+        except KeyError as e:
+            self._send_json(400, {'success': False, 'error': f'Missing field: {e}'})
+        except Exception as e:
+            print(f"[MODEL SERVER ERROR] {route}: {e}")
+            self._send_json(500, {'success': False, 'error': str(e)})
+
+    def log_message(self, format, *args):
+        print(f"[MODEL SERVER] {self.address_string()} {format % args}")
+
+# main function
+# 1. parse host, port and which models to preload
+# 2. run from project root so relative model paths resolve like in the CLIs
+# 3. preload models, then serve until interrupted
+def main():
+    default_url = urlparse(DEFAULT_MODEL_SERVER_URL)
+    parser = argparse.ArgumentParser(description='Resident model server for phase detection and GPT-2 generation')
+    parser.add_argument('--host', default=default_url.hostname, help=f'Bind address (default: {default_url.hostname})')
+    parser.add_argument('--port', type=int, default=default_url.port, help=f'Port (default: {default_url.port})')
+    parser.add_argument('--preload', default=','.join(MODEL_NAMES),
+                        help='Comma separated models to load at startup, empty for lazy loading (default: all)')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='RAM budget for GPT-2 models, LRU eviction above it, 0 = unlimited (default: MODEL_MEMORY_BUDGET_MB or 3072)')
+    parser.add_argument('--idle-ttl', type=float, default=None,
+                        help='Seconds before an unused GPT-2 model is evicted, 0 = never (default: MODEL_IDLE_TTL or 1800)')
+    args = parser.parse_args()
+
+    os.chdir(project_root)
+    registry = get_registry()
+    if args.memory_budget_mb is not None:
+        registry.budget_mb = args.memory_budget_mb
+    if args.idle_ttl is not None:
+        registry.idle_ttl = args.idle_ttl
+    registry.start_idle_reaper()
+
+    print("\n" + "="*60)
+    print("RESIDENT MODEL SERVER")
+    print("="*60)
+
+    model_server = ModelServer()
+    preload = [name for name in args.preload.split(',') if name]
+    model_server.preload(preload)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), ModelRequestHandler)
+    httpd.model_server = model_server
+    print(f"✅ Serving on http://{args.host}:{args.port} (loaded: {', '.join(preload) or 'none'})")
+    print("   Endpoints: /phase /phase-batch /chat-response /cover-letter /health")
+    print("="*60 + "\n")
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[MODEL SERVER] Stopping")
+    finally:
+        httpd.server_close()
+
+if __name__ == "__main__":
+    main()
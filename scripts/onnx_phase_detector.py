@@ -0,0 +1,184 @@
+"""
+ONNX Runtime Phase Classifier Inference
+Same predict / predict_batch interface as PhaseDetector, runs the exported
+phase_classifier.onnx on CPU without importing torch or transformers
+"""
+import os
+import json
+from scripts.derived_artifacts import PHASE_WEIGHT_FILES, artifact_is_current
+
+# exported model and tokenizer files inside the model directory (scripts/export_phase_onnx.py)
+ONNX_MODEL_FILE = 'phase_classifier.onnx'
+TOKENIZER_FILE = 'tokenizer.json'
+# same limits as scripts/phase_detector.py
+MAX_LENGTH = 256
+DEFAULT_BATCH_SIZE = 32
+# backends StandalonePhaseDetector can choose from (PHASE_DETECTOR_BACKEND or --backend)
+PHASE_BACKENDS = ['auto', 'onnx', 'torch']
+
+# PHASE_MODEL_DIR switches every phase consumer to another model directory
+# (e.g. the distilled student from distill_phase_classifier.py)
+def default_model_dir():
+    if os.environ.get('PHASE_MODEL_DIR'):
+        return os.environ['PHASE_MODEL_DIR']
+    return os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        'ai', 'phase_detector_trainer', 'trained_models', 'phase_classifier_v1'
+    )
+
+# version of the trained phase model for prediction caches, read from metadata.json without loading it
+# None for the untrained base BERT fallback, its random predictions are never cached
+# INT8 (MODEL_QUANTIZED=1) and cascade predictions can differ from fp32 BERT, so they are part of it
+def phase_model_version(model_dir=None, cascade=False):
+    model_dir = model_dir or default_model_dir()
+    metadata_path = os.path.join(model_dir, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        return None
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    version = f"{os.path.basename(model_dir)}@{metadata.get('trained_at', 'unknown')}"
+    if os.environ.get('MODEL_QUANTIZED') == '1':
+        version += '+int8'
+    if cascade:
+        version += '+cascade'
+    return version
+
+# export matches the trained weights (export_phase_onnx.py records them, a retrain makes it stale)
+def onnx_export_current(model_dir):
+    return (os.path.exists(os.path.join(model_dir, TOKENIZER_FILE)) and
+            artifact_is_current(os.path.join(model_dir, ONNX_MODEL_FILE), model_dir, PHASE_WEIGHT_FILES))
+
+# pick phase backend
+# 1. explicit backend or PHASE_DETECTOR_BACKEND environment variable, default auto
+# 2. auto uses onnx when an export of the current weights and onnxruntime are available, else torch
+def resolve_phase_backend(model_dir=None, backend=None):
+    backend = (backend or os.environ.get('PHASE_DETECTOR_BACKEND') or 'auto').lower()
+    if backend not in PHASE_BACKENDS:
+        raise ValueError(f"Unknown phase backend '{backend}', use one of {PHASE_BACKENDS}")
+    if backend == 'torch':
+        return backend
+    model_dir = model_dir or default_model_dir()
+    exported = os.path.exists(os.path.join(model_dir, ONNX_MODEL_FILE))
+    current = exported and onnx_export_current(model_dir)
+    if exported and not current:
+        print(f"⚠️ {ONNX_MODEL_FILE} was not exported from the current weights, "
+              f"re-run scripts/export_phase_onnx.py")
+    if backend != 'auto':
+        return backend
+    if not current:
+        return 'torch'
+    try:
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+    except ImportError:
+        return 'torch'
+    return 'onnx'
+
+# load phase detector for the resolved backend, torch is only imported for the torch backend
+# cascade (or PHASE_DETECTOR_CASCADE=1) puts the TF-IDF fast path in front when it is trained
+def load_phase_detector(model_dir=None, backend=None, cascade=None):
+    from scripts.cascade_phase_detector import CascadePhaseDetector, cascade_enabled, fast_model_available
+    model_dir = model_dir or default_model_dir()
+    resolved = resolve_phase_backend(model_dir, backend)
+
+    def load_heavy():
+        if resolved == 'onnx':
+            return OnnxPhaseDetector(model_dir)
+        from scripts.phase_detector import PhaseDetector
+        return PhaseDetector(model_dir)
+
+    if cascade_enabled(cascade) and fast_model_available(model_dir):
+        return CascadePhaseDetector(model_dir, load_heavy)
+    return load_heavy()
+
+# ONNX Runtime version of PhaseDetector
+#1. metadata.json for phase labels, same as trained PhaseDetector
+#2. fast tokenizer from tokenizer.json (Rust tokenizers library)
+#3. onnxruntime CPU session on phase_classifier.onnx
+class OnnxPhaseDetector:
+    def __init__(self, model_dir=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir or default_model_dir()
+        model_path = os.path.join(self.model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found, run scripts/export_phase_onnx.py first")
+
+        print(f"🔄 Loading ONNX phase classifier...")
+        with open(os.path.join(self.model_dir, 'metadata.json'), 'r', encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self.phase_labels = self.metadata['phase_labels']
+        self.id_to_phase = {int(k): v for k, v in self.metadata['id_to_phase'].items()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_LENGTH)
+        self.tokenizer.no_padding()
+        self.pad_id = self.tokenizer.token_to_id('[PAD]') or 0
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.is_trained_model = True
+        print(f"✅ ONNX phase classifier loaded")
+
+    def predict(self, context, return_probabilities=False):
+        """Predict conversation phase from context"""
+        return self.predict_batch([context], batch_size=1, return_probabilities=return_probabilities)[0]
+
+    # build result dictionary from one row of class probabilities, same keys as PhaseDetector
+    def _build_result(self, probabilities, return_probabilities=False):
+        import numpy as np
+        predicted = int(np.argmax(probabilities))
+        result = {
+            'phase': self.id_to_phase[predicted],
+            'confidence': round(float(probabilities[predicted]), 4),
+            'model_type': 'trained'
+        }
+        if return_probabilities:
+            result['all_probabilities'] = {
+                self.phase_labels[i]: round(float(probabilities[i]), 4)
+                for i in range(len(self.phase_labels))
+            }
+        return result
+
+    # batched prediction, same steps as PhaseDetector.predict_batch
+    #1. tokenize all contexts once
+    #2. optionally sort by length, pad each batch to its longest sequence
+    #3. one onnxruntime run per batch, softmax in numpy
+    #4. return results in original order
+    def predict_batch(self, contexts, batch_size=DEFAULT_BATCH_SIZE, sort_by_length=True,
+                      return_probabilities=False):
+        """Predict phases for multiple contexts"""
+        import numpy as np
+        if not contexts:
+            return []
+        encodings = self.tokenizer.encode_batch(list(contexts))
+        all_input_ids = [encoding.ids for encoding in encodings]
+        order = list(range(len(all_input_ids)))
+        if sort_by_length:
+            order.sort(key=lambda i: len(all_input_ids[i]), reverse=True)
+
+        results = [None] * len(all_input_ids)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            longest = max(len(all_input_ids[i]) for i in batch_indices)
+            input_ids = np.full((len(batch_indices), longest), self.pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(batch_indices), longest), dtype=np.int64)
+            for row, i in enumerate(batch_indices):
+                ids = all_input_ids[i]
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+
+            feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+            logits = self.session.run(['logits'], {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            # numerically stable softmax
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities = exp / exp.sum(axis=1, keepdims=True)
+
+            for row, i in enumerate(batch_indices):
+                results[i] = self._build_result(probabilities[row], return_probabilities)
+
+        return results
@@ -4,27 +4,59 @@ Uses trained model to detect conversation phases
 """
 import torch # lib for models tensor configuration
 import torch.nn as nn # lib for neural network modules
-from transformers import BertTokenizer, BertModel # lib for BERT model and tokenizer
+from transformers import BertModel, BertConfig # lib for BERT model and config
 import json # json lib
 import os # operating system lib
 from datetime import datetime # datetime lib
+import inspect # lib to check which load_state_dict options torch supports
+
+# safetensors lets weights be memory-mapped instead of unpickled (ships with transformers)
+try:
+    from safetensors.torch import load_file as load_safetensors
+    SAFETENSORS_AVAILABLE = True
+except ImportError:
+    SAFETENSORS_AVAILABLE = False
 
 # Set UTF-8 encoding
 import sys # lib for system specific parameters and functions
 if sys.platform == "win32": # if the system is Windows UTF-8 encoding
     sys.stdout.reconfigure(encoding='utf-8') # to be able to handle special characters
 
+# Add project root to path for shared quantization helpers
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.model_quantization import quantization_enabled, quantize_linear_int8
+from scripts.derived_artifacts import (PHASE_WEIGHT_FILES, PHASE_PTH_FILES, artifact_is_current,
+                                       record_artifact_source)
+from scripts.fast_tokenizers import load_bert_tokenizer, batch_encode
+from scripts.onnx_phase_detector import default_model_dir
+
+# max tokens per context, same as training
+MAX_LENGTH = 256
+# contexts per forward pass in predict_batch
+DEFAULT_BATCH_SIZE = 32
+# fine-tuned weights, safetensors is preferred when it was written from the current .pth
+# (by the trainer or scripts/convert_phase_safetensors.py, never on load)
+WEIGHTS_PTH = 'phase_classifier.pth'
+WEIGHTS_SAFETENSORS = 'phase_classifier.safetensors'
+# opt-in INT8 dynamic-quantized weights (MODEL_QUANTIZED=1 or quantized=True)
+WEIGHTS_INT8 = 'phase_classifier_int8.pt'
+
 # class for setting up model pipeline
 class PhaseClassifier(nn.Module):
     # setting up model pipeline
     #1. model
     #2. dropout
     #3. classifier
-    def __init__(self, n_classes=8, dropout=0.3):
+    # with config only the architecture is built, no base BERT weights are downloaded or loaded
+    # (used when fine-tuned weights are loaded right after)
+    def __init__(self, n_classes=8, dropout=0.3, config=None):
         # Call parent constructor (required for nn.Module)
         super(PhaseClassifier, self).__init__()
         # Initialize BERT model
-        self.bert = BertModel.from_pretrained('bert-base-uncased')
+        if config is not None:
+            self.bert = BertModel(config)
+        else:
+            self.bert = BertModel.from_pretrained('bert-base-uncased')
         # Add dropout to prevent overfitting and for better generalization
         self.dropout = nn.Dropout(dropout)
         # add linear layer to classify the output into n_classes, every id has a corresponding phase
@@ -58,21 +90,21 @@ class PhaseDetector:
     #6. load the trained version of the model
     #7. move model to device
     #8. set model to evaluation mode
-    def __init__(self, model_dir=None):
+    # quantized=True (or MODEL_QUANTIZED=1) runs INT8 Linear layers on CPU
+    def __init__(self, model_dir=None, quantized=None):
         """Initialize PhaseDetector with fallback to base BERT if trained model not found"""
         
         # Use default path if none provided
         if model_dir is None:
-            model_dir = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), 
-                'ai',
-                'phase_detector_trainer', 
-                'trained_models', 
-                'phase_classifier_v1'
-            )
+            model_dir = default_model_dir()
         
         self.model_dir = model_dir
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.quantized = quantization_enabled(quantized)
+        # dynamic quantization only runs on CPU
+        if self.quantized:
+            self.device = torch.device('cpu')
+        else:
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # Try to load trained model first
         if os.path.exists(model_dir) and os.path.exists(os.path.join(model_dir, 'metadata.json')):
@@ -92,6 +124,12 @@ class PhaseDetector:
             print(f"🔄 Using base BERT model (fallback)")
             self._load_fallback_model()
 
+    # load trained model from model_dir without touching base BERT
+    #1. metadata and tokenizer from model_dir
+    #2. architecture from saved config.json (BertConfig defaults equal bert-base-uncased for older saves)
+    #3. build the model on the meta device so no random weights are allocated
+    #4. load fine-tuned weights once, memory-mapped from safetensors when present
+    #5. move model to device and set to evaluation mode
     def _load_trained_model(self, model_dir):
         """Load trained model"""
         # Load metadata
@@ -102,17 +140,84 @@ class PhaseDetector:
         self.phase_labels = self.metadata['phase_labels']
         self.id_to_phase = {int(k): v for k, v in self.metadata['id_to_phase'].items()}
         
-        # Load tokenizer and model
-        self.tokenizer = BertTokenizer.from_pretrained(model_dir)
-        self.model = PhaseClassifier(n_classes=len(self.phase_labels))
-        
-        model_path = os.path.join(model_dir, 'phase_classifier.pth')
-        self.model.load_state_dict(torch.load(model_path, map_location=self.device))
+        # Load tokenizer
+        self.tokenizer = load_bert_tokenizer(model_dir)
+
+        # architecture only, offline
+        if os.path.exists(os.path.join(model_dir, 'config.json')):
+            config = BertConfig.from_pretrained(model_dir)
+        else:
+            config = BertConfig()
+
+        # INT8 weights saved by an earlier quantized run load directly,
+        # unless the fp32 weights were retrained since (then they are requantized below)
+        int8_path = os.path.join(model_dir, WEIGHTS_INT8)
+        if self.quantized and artifact_is_current(int8_path, model_dir, PHASE_WEIGHT_FILES):
+            self.model = quantize_linear_int8(PhaseClassifier(n_classes=len(self.phase_labels), config=config))
+            self.model.load_state_dict(torch.load(int8_path, map_location='cpu'))
+            self.model.eval()
+            self.is_trained_model = True
+            print(f"✅ INT8 phase classifier loaded from {WEIGHTS_INT8}")
+            return
+
+        state_dict = self._load_state_dict(model_dir)
+        self.model = None
+        # torch >= 2.1 can take the loaded tensors as parameters directly (assign=True)
+        if 'assign' in inspect.signature(nn.Module.load_state_dict).parameters:
+            with torch.device('meta'):
+                model = PhaseClassifier(n_classes=len(self.phase_labels), config=config)
+            model.load_state_dict(state_dict, assign=True)
+            self._materialize_embedding_buffers(model, config)
+            if not any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+                self.model = model
+        if self.quantized and os.path.exists(int8_path):
+            print(f"[INFO] {WEIGHTS_INT8} is older than the trained weights, requantizing")
+        if self.model is None:
+            self.model = PhaseClassifier(n_classes=len(self.phase_labels), config=config)
+            self.model.load_state_dict(state_dict)
+        del state_dict
         self.model.to(self.device)
         self.model.eval()
+
+        # quantize once and keep the INT8 weights next to the fp32 ones
+        if self.quantized:
+            self.model = quantize_linear_int8(self.model)
+            try:
+                torch.save(self.model.state_dict(), int8_path)
+                record_artifact_source(int8_path, model_dir, PHASE_WEIGHT_FILES)
+                print(f"[INFO] Saved {WEIGHTS_INT8} for quantized loading")
+            except OSError as e:
+                print(f"⚠️ Could not save {WEIGHTS_INT8}: {e}")
         
         self.is_trained_model = True
 
+    # position_ids / token_type_ids are non-persistent buffers (not in state_dict)
+    # so after building on the meta device they have to be created again
+    def _materialize_embedding_buffers(self, model, config):
+        embeddings = model.bert.embeddings
+        position_ids = torch.arange(config.max_position_embeddings).expand((1, -1))
+        buffers = {
+            'position_ids': position_ids,
+            'token_type_ids': torch.zeros(position_ids.size(), dtype=torch.long)
+        }
+        for name, value in buffers.items():
+            buffer = getattr(embeddings, name, None)
+            if buffer is not None and buffer.is_meta:
+                embeddings.register_buffer(name, value, persistent=False)
+
+    # read fine-tuned weights, safetensors first, else .pth
+    # (safetensors only while it matches the .pth - a retrained .pth wins over an old conversion)
+    def _load_state_dict(self, model_dir):
+        safetensors_path = os.path.join(model_dir, WEIGHTS_SAFETENSORS)
+        model_path = os.path.join(model_dir, WEIGHTS_PTH)
+        if SAFETENSORS_AVAILABLE and os.path.exists(safetensors_path) and (
+                not os.path.exists(model_path) or artifact_is_current(safetensors_path, model_dir, PHASE_PTH_FILES)):
+            return load_safetensors(safetensors_path, device='cpu')
+
+        if SAFETENSORS_AVAILABLE:
+            print(f"[INFO] Loading {WEIGHTS_PTH}, run scripts/convert_phase_safetensors.py for faster loading")
+        return torch.load(model_path, map_location='cpu')
+
     def _load_fallback_model(self):
         """Load base BERT model as fallback"""
         # Create default phase mapping for base BERT
@@ -123,12 +228,14 @@ class PhaseDetector:
         self.id_to_phase = {i: label for i, label in enumerate(self.phase_labels)}
         
         # Load base BERT
-        self.tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+        self.tokenizer = load_bert_tokenizer('bert-base-uncased')
         self.model = PhaseClassifier(n_classes=len(self.phase_labels))
         
         # Initialize with random weights (base model)
         self.model.to(self.device)
         self.model.eval()
+        if self.quantized:
+            self.model = quantize_linear_int8(self.model)
         
         self.is_trained_model = False
         self.metadata = {
@@ -139,37 +246,17 @@ class PhaseDetector:
         print(f"✅ Base BERT model loaded (fallback)")
         print(f"[WARNING] Using untrained model - predictions will be less accurate")
     # predict function that takes context and return probabilities flag
-    #1. tokenize the context text
-    #2. from tokenized text give tokens the id
-    #3. from tokenized text get tokens that are not relevant and give them "mask" for AI to not consider
-    #4. use model to predict and not to teach him torch.no_grad
-    #5. return result dictionary with phase and confidence score
-    #6. optional return of all probabilities with their phase labels
+    # single context is a batch of one, padded only to its own length
     def predict(self, context, return_probabilities=False):
         """Predict conversation phase from context"""
-        # Tokenize
-        encoding = self.tokenizer.encode_plus(
-            context, # text to be tokenized
-            add_special_tokens=True, # add special tokens
-            max_length=256, # max length of tokens
-            padding='max_length',
-            truncation=True,
-            return_attention_mask=True,
-            return_tensors='pt'
-        )
-        # get id of the tokenized text and move to device 
-        input_ids = encoding['input_ids'].to(self.device) 
-        # attention mask to ignore the tockens that are just padding
-        attention_mask = encoding['attention_mask'].to(self.device)
-
-        # use model to predict and don't teach it (no grad)
-        with torch.no_grad():
-            # put inputs through the model and attention mask to get outputs
-            outputs = self.model(input_ids, attention_mask)
-            # get probabilities of every class guess and than
-            probabilities = torch.softmax(outputs, dim=1)
-            # inside confidence and predticted put the class with most confidence
-            confidence, predicted = torch.max(probabilities, 1)
+        return self.predict_batch([context], batch_size=1, return_probabilities=return_probabilities)[0]
+
+    # build result dictionary from one row of class probabilities
+    #1. take the class with most confidence and map id to phase
+    #2. lower confidence for untrained model
+    #3. optional return of all probabilities with their phase labels
+    def _build_result(self, probabilities, return_probabilities=False):
+        confidence, predicted = torch.max(probabilities, 0)
         # map the predicted id to phase
         predicted_phase = self.id_to_phase[predicted.item()]
         # get confidence score
@@ -188,18 +275,59 @@ class PhaseDetector:
         
         # optional return of all probabilities with their phase labels 
         if return_probabilities:
-            all_probs = {
-                self.phase_labels[i]: round(probabilities[0][i].item(), 4)
+            result['all_probabilities'] = {
+                self.phase_labels[i]: round(probabilities[i].item(), 4)
                 for i in range(len(self.phase_labels))
             }
-            result['all_probabilities'] = all_probs
         
         return result
-    # loops through multiple contexts to predict their phases and predict for all
-    def predict_batch(self, contexts):
+
+    # batched prediction for many contexts
+    #1. tokenize all contexts once with the fast tokenizer, no padding yet
+    #2. optionally sort by token length so each batch holds similar lengths
+    #3. pad every batch only to its longest sequence, attention mask hides the padding
+    #4. one forward pass per batch with torch.no_grad
+    #5. return results in the original order of contexts
+    def predict_batch(self, contexts, batch_size=DEFAULT_BATCH_SIZE, sort_by_length=True,
+                      return_probabilities=False):
         """Predict phases for multiple contexts"""
-        results = []
-        for context in contexts:
-            result = self.predict(context)
-            results.append(result)
+        if not contexts:
+            return []
+        # tokenize whole list in one call, truncate like training
+        encodings = batch_encode(
+            self.tokenizer,
+            contexts,
+            add_special_tokens=True,
+            max_length=MAX_LENGTH,
+            truncation=True,
+            padding=False
+        )
+        all_input_ids = encodings['input_ids']
+        # order to run contexts in, longest first keeps padding low in every batch
+        order = list(range(len(all_input_ids)))
+        if sort_by_length:
+            order.sort(key=lambda i: len(all_input_ids[i]), reverse=True)
+
+        pad_id = self.tokenizer.pad_token_id
+        results = [None] * len(all_input_ids)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            # pad to the longest sequence in this batch only
+            longest = max(len(all_input_ids[i]) for i in batch_indices)
+            input_ids = torch.full((len(batch_indices), longest), pad_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(batch_indices), longest), dtype=torch.long)
+            for row, i in enumerate(batch_indices):
+                ids = all_input_ids[i]
+                input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+                attention_mask[row, :len(ids)] = 1
+
+            # use model to predict and don't teach it (no grad)
+            with torch.no_grad():
+                outputs = self.model(input_ids.to(self.device), attention_mask.to(self.device))
+                # get probabilities of every class guess
+                probabilities = torch.softmax(outputs, dim=1).cpu()
+
+            for row, i in enumerate(batch_indices):
+                results[i] = self._build_result(probabilities[row], return_probabilities)
+
         return results
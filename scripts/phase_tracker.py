@@ -0,0 +1,117 @@
+"""
+Incremental Phase Tracker
+Combines per-message phase probabilities with the stored session belief through an
+HMM forward step over the phase labels, so an update only scores the new client
+messages instead of re-encoding the whole conversation window
+"""
+import os
+import json
+
+# learned transition matrix written next to the phase model (--fit-transitions)
+TRANSITIONS_FILE = 'phase_transitions.json'
+# messages written by the freelancer are context only, never scored
+FREELANCER_SENDER_TYPES = ('outgoing', 'freelancer')
+# default transitions: stay in the phase, move on to the next one, rest spread over the others
+STAY_PROBABILITY = 0.7
+FORWARD_PROBABILITY = 0.2
+# pseudo-counts of the default matrix when fitting, keeps rare transitions possible
+PRIOR_WEIGHT = 10.0
+# floor for classifier probabilities so one message never zeroes a phase
+MIN_EMISSION = 1e-4
+
+def is_client_message(message):
+    return message.get('sender_type') not in FREELANCER_SENDER_TYPES
+
+# short model input for one message: the message before it (if any) and the message itself
+def message_context(message, previous=None):
+    lines = [previous, message] if previous else [message]
+    return "\n".join(f"{m['sender_type']}: {m['text']}" for m in lines)
+
+# sticky, forward-biased transition matrix in phase label order
+def default_transition_matrix(phase_labels, stay=STAY_PROBABILITY, forward=FORWARD_PROBABILITY):
+    n = len(phase_labels)
+    matrix = []
+    for i in range(n):
+        row = [0.0] * n
+        row[i] = stay
+        others = [j for j in range(n) if j != i]
+        if i + 1 < n:
+            row[i + 1] += forward
+            others.remove(i + 1)
+            rest = 1.0 - stay - forward
+        else:
+            rest = 1.0 - stay
+        for j in others:
+            row[j] += rest / len(others)
+        matrix.append(row)
+    return matrix
+
+# transition matrix from model directory when fitted for the same labels, default otherwise
+def load_transition_matrix(model_dir, phase_labels):
+    path = os.path.join(model_dir, TRANSITIONS_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('phase_labels') == list(phase_labels):
+            return saved['matrix']
+    return default_transition_matrix(phase_labels)
+
+# fit transitions from tracked sessions
+# 1. most likely phase of every scored message, in message order per session
+# 2. count consecutive phase pairs
+# 3. add default matrix as PRIOR_WEIGHT pseudo-counts per row and normalize
+def fit_transition_matrix(sequences, phase_labels, prior_weight=PRIOR_WEIGHT):
+    index = {label: i for i, label in enumerate(phase_labels)}
+    prior = default_transition_matrix(phase_labels)
+    counts = [[0.0] * len(phase_labels) for _ in phase_labels]
+    pairs = 0
+    for sequence in sequences:
+        phases = [max(probabilities, key=probabilities.get) for probabilities in sequence]
+        for current, following in zip(phases, phases[1:]):
+            counts[index[current]][index[following]] += 1
+            pairs += 1
+    matrix = []
+    for count_row, prior_row in zip(counts, prior):
+        row = [c + prior_weight * p for c, p in zip(count_row, prior_row)]
+        total = sum(row)
+        matrix.append([value / total for value in row])
+    return matrix, pairs
+
+# HMM forward filter over phases
+#1. belief is a dict phase -> probability, uniform before the first message
+#2. predict: belief times transition matrix
+#3. correct: multiply by classifier probabilities of the new message and normalize
+class PhaseTracker:
+    def __init__(self, phase_labels, transitions):
+        self.phase_labels = list(phase_labels)
+        self.transitions = transitions
+
+    def initial_belief(self):
+        return {label: 1.0 / len(self.phase_labels) for label in self.phase_labels}
+
+    # one forward step for one message
+    def step(self, belief, probabilities):
+        prior = [belief.get(label, 0.0) for label in self.phase_labels]
+        posterior = []
+        for j, label in enumerate(self.phase_labels):
+            predicted = sum(prior[i] * self.transitions[i][j] for i in range(len(self.phase_labels)))
+            posterior.append(predicted * max(probabilities.get(label, 0.0), MIN_EMISSION))
+        total = sum(posterior) or 1.0
+        return {label: value / total for label, value in zip(self.phase_labels, posterior)}
+
+    # forward steps for messages in order, starting from belief (None = new session)
+    def update(self, belief, message_probabilities):
+        belief = dict(belief) if belief else self.initial_belief()
+        for probabilities in message_probabilities:
+            belief = self.step(belief, probabilities)
+        return belief
+
+    # result in the same shape as a phase prediction
+    @staticmethod
+    def result(belief):
+        phase = max(belief, key=belief.get)
+        return {
+            'phase': phase,
+            'confidence': round(belief[phase], 4),
+            'all_probabilities': {label: round(p, 4) for label, p in belief.items()}
+        }
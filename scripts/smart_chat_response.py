@@ -6,10 +6,9 @@ Response Modes: Template OR AI (GPT-2)
 import sys
 import os
 import json
+import hashlib
 import argparse
 from datetime import datetime
-import torch
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
 
 # Set UTF-8 encoding
 if sys.platform == "win32":
@@ -18,6 +17,74 @@ if sys.platform == "win32":
 # Add parent directory to path and import database manager
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from data.chat_database_manager import ChatDatabase
+from scripts.model_client import request_model_server
+
+# static instruction block at the start of every AI prompt
+# ChatGPT2Generator encodes it once per model load and reuses its key/value cache,
+# so a request only encodes the conversation context and phase that follow it
+# (ends on a word so the token boundary to the dynamic part never changes)
+AI_PROMPT_PREFIX = """You are a professional freelancer responding to a client in an Upwork chat conversation.
+
+PHASE MEANINGS:
+- initial_response: Client is asking if you're available for work
+- ask_details: Client wants more information about project scope  
+- knowledge_check: Client is testing your expertise in specific topics
+- language_confirm: Client is asking about language preferences
+- rate_negotiation: Client is discussing pricing and budget
+- deadline_samples: Client is asking about delivery timelines
+- structure_clarification: Client wants to know about content format/structure
+- contract_acceptance: Client is ready to hire and wants you to accept contract
+
+YOUR TASK:
+Write a professional, friendly response that addresses the detected phase appropriately. 
+- Keep it concise (1-3 sentences)
+- Sound natural and conversational
+- Be enthusiastic and professional
+- Directly address what the client needs in this phase"""
+
+# prefix cache is on by default, CHAT_PREFIX_CACHE=0 (or prefix_cache=False) turns it off
+def prefix_cache_enabled(flag=None):
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get('CHAT_PREFIX_CACHE', '1') != '0'
+
+# seconds cached AI suggestions stay valid for an unchanged conversation
+# CHAT_RESPONSE_CACHE_TTL overrides, 0 turns the response cache off
+DEFAULT_RESPONSE_CACHE_TTL = 900
+
+def response_cache_ttl():
+    return float(os.environ.get('CHAT_RESPONSE_CACHE_TTL', DEFAULT_RESPONSE_CACHE_TTL))
+
+# trained chat model directory if it exists, base GPT-2 otherwise
+def chat_model_path():
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    trained_model_path = os.path.join(project_root, "ai", "chat_bot_trainer", "trained_models", "final_chat_model", "trained_chat_model_1.0")
+    return trained_model_path if os.path.exists(trained_model_path) else "gpt2"
+
+# version of the chat model for response cache keys, read from training_metadata.json
+# without loading the model (INT8 output differs from fp32, so it is its own version)
+def chat_model_version():
+    model_path = chat_model_path()
+    version = os.path.basename(model_path)
+    metadata_path = os.path.join(model_path, 'training_metadata.json')
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            version += f"@{json.load(f).get('trained_on', 'unknown')}"
+    if os.environ.get('MODEL_QUANTIZED') == '1':
+        version += '+int8'
+    return version
+
+# full AI prompt: static prefix + conversation context + detected phase
+def build_ai_prompt(phase, context):
+    return AI_PROMPT_PREFIX + f"""
+
+CONVERSATION CONTEXT:
+{context[-500:]}
+
+AI PHASE DETECTION RESULT:
+The AI system has analyzed this conversation and detected that the client is in the "{phase}" phase.
+
+Response:"""
 
 # class that connects to database initializes templates, and implements AI chat response generation
 class SmartChatResponse:
@@ -31,78 +98,282 @@ class SmartChatResponse:
         """Simplified GPT-2 generator integrated into SmartChatResponse"""
         # loads components for GPT-2 model
         # 1. set model path based on trained model if available else use base GPT-2
-        # 2. load tokenizer from model path
-        # 3. load model from model path
-        # 4. set pad token if not set
-        # 5. set hardware device to choose CUDA if available else CPU
-        # 6. load model to hardware device and set to eval mode
-        def __init__(self):
-            print("Loading GPT-2...")
-            # Check for trained model first
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            trained_model_path = os.path.join(project_root, "ai", "chat_bot_trainer", "trained_models", "final_chat_model", "trained_chat_model_1.0")
-            # if trained model is found set model_path to it
-            if os.path.exists(trained_model_path):
+        # 2. set hardware device to choose CUDA if available else CPU
+        # 3. get shared model and tokenizer for path and device from the model registry
+        #    (loaded once per process, pad token set, eval mode)
+        # 4. encode AI_PROMPT_PREFIX once and keep its key/value cache
+        # 5. optional draft model for assisted decoding of single responses
+        # quantized=True (or MODEL_QUANTIZED=1) loads INT8 dynamic-quantized weights on CPU
+        # assistant="distilgpt2" / "layers:N" (or CHAT_ASSISTANT_MODEL) turns on assisted decoding
+        def __init__(self, quantized=None, prefix_cache=None, assistant=None):
+            # torch is only imported when GPT-2 runs in-process (model server down)
+            import torch
+            from scripts.model_quantization import quantization_enabled
+            from scripts.model_registry import get_registry
+            from scripts.assisted_generation import assistant_spec, load_assistant_model
+            self.quantized = quantization_enabled(quantized)
+            print("Loading GPT-2..." + (" (INT8)" if self.quantized else ""))
+            # Check for trained model first, base GPT-2 if it is not found
+            model_path = chat_model_path()
+            if model_path != "gpt2":
                 print("🎯 Using TRAINED model for better responses")
-                model_path = trained_model_path
-            # else set model_path to base GPT-2
             else:
                 print("⚠️ Trained model not found, using base GPT-2")
-                model_path = "gpt2"
-            
-            # Load tokenizer
-            self.tokenizer = GPT2Tokenizer.from_pretrained(model_path)
-            # load model
-            self.model = GPT2LMHeadModel.from_pretrained(model_path)
-            
-            # Set pad token
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
             
             # Set hardware device to use CUDA if available else CPU
-            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            # load model to hardware device
-            self.model.to(self.device)
-            # set model to eval mode
-            self.model.eval()
+            # (quantized model only runs on CPU)
+            if self.quantized:
+                self.device = torch.device("cpu")
+            else:
+                self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            # shared model and tokenizer (pad token set, eval mode, on device)
+            # from the model registry, same weights as other generators in this process
+            self.model, self.tokenizer = get_registry().get_gpt2(model_path, quantized=self.quantized, device=self.device)
+            # latency budget record of the last generate call
+            self.last_budget = None
+            # static prompt prefix cache
+            self.prefix_ids = None
+            self.prefix_cache = None
+            self._cache_supported = None
+            if prefix_cache_enabled(prefix_cache):
+                self._build_prefix_cache()
+            # draft model for assisted decoding
+            self.assistant_model = None
+            self.assistant_from_registry = False
+            spec = assistant_spec(assistant, 'CHAT_ASSISTANT_MODEL')
+            if spec:
+                self.assistant_model, self.assistant_from_registry = load_assistant_model(
+                    spec, self.model, self.device, self.quantized)
             print("✅ GPT-2 Ready")
+
+        # give the model back to the registry
+        def unload_model(self):
+            if self.model is not None:
+                from scripts.model_registry import get_registry
+                from scripts.assisted_generation import release_assistant_model
+                get_registry().release(self.model)
+                release_assistant_model(self.assistant_model, self.assistant_from_registry)
+                self.model = None
+                self.assistant_model = None
+                self.prefix_cache = None
+
+        # whether this transformers' GPT-2 takes Cache objects as past_key_values
+        # DynamicCache exists from 4.36, but GPT-2 code from before its Cache support indexes
+        # tuple caches and raises on one, so a one-token forward pass decides (checked once)
+        def _cache_objects_supported(self):
+            if self._cache_supported is None:
+                import torch
+                try:
+                    from transformers import Cache, DynamicCache
+                    with torch.no_grad():
+                        outputs = self.model(torch.tensor([[self.tokenizer.eos_token_id]], device=self.device),
+                                             past_key_values=DynamicCache(), use_cache=True)
+                    self._cache_supported = isinstance(outputs.past_key_values, Cache)
+                except Exception as e:
+                    print(f"[INFO] GPT-2 check with DynamicCache failed: {type(e).__name__}: {e}")
+                    self._cache_supported = False
+                if not self._cache_supported:
+                    print("⚠️ This transformers' GPT-2 does not take Cache objects, prompt caches disabled")
+            return self._cache_supported
+
+        # run the static prefix through the model once and keep past_key_values
+        # transformers whose GPT-2 has no Cache support encode the full prompt every time
+        def _build_prefix_cache(self):
+            import torch
+            if not self._cache_objects_supported():
+                return
+            from transformers import DynamicCache
+            self.prefix_ids = self.tokenizer.encode(AI_PROMPT_PREFIX)
+            with torch.no_grad():
+                outputs = self.model(torch.tensor([self.prefix_ids], device=self.device),
+                                     past_key_values=DynamicCache(), use_cache=True)
+            self.prefix_cache = outputs.past_key_values
+            print(f"✅ Prompt prefix cached ({len(self.prefix_ids)} tokens)")
+
+        # copy of the prefix cache when the prompt starts with the cached prefix tokens, else None
+        # generate appends to the cache it is given, so the stored one is never passed directly
+        def _prefix_cache_for(self, input_ids):
+            import copy
+            if self.prefix_cache is None:
+                return None
+            n = len(self.prefix_ids)
+            if input_ids.shape[1] <= n or input_ids[0, :n].tolist() != self.prefix_ids:
+                return None
+            return copy.deepcopy(self.prefix_cache)
         # function to generate response
         # takes prompt and max_length as input
         # 1. encode prompt using tokenizer and move to hardware device
-        # 2. generate outputs with model.generate using parameters for text generation
-        # 3. decode generated outputs to text
-        # 4. simple cleanup to ensure proper ending punctuation     
-        def generate_single_response(self, prompt, max_length=80):
+        # 2. reuse cached static prefix so only the tokens after it are encoded
+        # 3. generate outputs with model.generate using parameters for text generation
+        # 4. decode generated outputs to text
+        # 5. simple cleanup to ensure proper ending punctuation     
+        # generation stops before the latency budget (budget_ms, default GENERATION_LATENCY_BUDGET_MS),
+        # then the response is cut at its last complete sentence, self.last_budget records the call
+        def generate_single_response(self, prompt, max_length=80, streamer=None, budget_ms=None):
             """Simple GPT-2 text generation"""
+            import torch
+            from scripts.latency_budget import GenerationBudget
+            budget = GenerationBudget('chat', budget_ms)
             try:
                 # tokenize prompt and move to hardware device
                 inputs = self.tokenizer.encode(prompt, return_tensors='pt').to(self.device)
+                # copy of the static prefix cache, None encodes the whole prompt
+                # (assisted decoding starts both models from the full prompt)
+                past_key_values = self._prefix_cache_for(inputs) if self.assistant_model is None else None
                 # generate outputs with the initialized model
                 # use torch.no_grad because no training is happening only inference
                 with torch.no_grad():
                     outputs = self.model.generate(
                         inputs,
+                        attention_mask=torch.ones_like(inputs),
                         max_length=inputs.shape[1] + max_length,
+                        past_key_values=past_key_values,
+                        assistant_model=self.assistant_model,
+                        streamer=streamer,
+                        stopping_criteria=budget.stopping_criteria(),
                         temperature=0.7,
                         do_sample=True,
                         top_p=0.9,
                         pad_token_id=self.tokenizer.eos_token_id,
                         no_repeat_ngram_size=2
                     )
-                # decode generated outputs to text
-                generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-                # extract response part
-                response = generated_text[len(prompt):].strip()
-                
-                # Simple cleanup
-                if not response.endswith(('.', '!', '?')) and len(response) > 10:
-                    response = response.rsplit(' ', 1)[0] + '.'
-                
-                return response[:150] if len(response) > 150 else response
+                self.last_budget = budget.finish(outputs.shape[1] - inputs.shape[1])
+                return self._finish_response(prompt, outputs[0], budget.hit)
                 
             except Exception as e:
                 print(f"GPT-2 Error: {e}")
                 return "Thank you for your message."
+
+        # decode one generated sequence (prompt included) and clean it up
+        #1. decode generated outputs to text
+        #2. extract response part after the prompt
+        #3. cut at the last complete sentence when the latency budget stopped generation
+        #4. simple cleanup to ensure proper ending punctuation, max 150 characters
+        def _finish_response(self, prompt, output_ids, budget_hit=False):
+            from scripts.latency_budget import trim_to_last_sentence
+            generated_text = self.tokenizer.decode(output_ids, skip_special_tokens=True)
+            response = generated_text[len(prompt):].strip()
+            if budget_hit:
+                response = trim_to_last_sentence(response)
+            
+            # Simple cleanup
+            if not response.endswith(('.', '!', '?')) and len(response) > 10:
+                response = response.rsplit(' ', 1)[0] + '.'
+            
+            return response[:150] if len(response) > 150 else response
+
+        # prompt cache shared by n sampled candidates
+        #1. start from a copy of the static prefix cache (or an empty cache)
+        #2. encode the rest of the prompt except its last token once, batch size 1
+        #3. repeat the cache n times, generate then only runs the last prompt token per row
+        # None when GPT-2 takes no Cache objects or DynamicCache has no batch_repeat_interleave
+        # (generate expands the prompt itself)
+        def _shared_prompt_cache(self, input_ids, n):
+            import torch
+            if not self._cache_objects_supported():
+                return None
+            from transformers import DynamicCache
+            past_key_values = self._prefix_cache_for(input_ids)
+            cached = len(self.prefix_ids) if past_key_values is not None else 0
+            if past_key_values is None:
+                past_key_values = DynamicCache()
+            if not hasattr(past_key_values, 'batch_repeat_interleave'):
+                return None
+            with torch.no_grad():
+                if input_ids.shape[1] - 1 > cached:
+                    self.model(input_ids[:, cached:-1], past_key_values=past_key_values, use_cache=True)
+            past_key_values.batch_repeat_interleave(n)
+            return past_key_values
+
+        # several candidates from one batched generate call
+        #1. encode prompt once, n rows share its key/value cache
+        #2. sample n sequences together, keep per-step scores
+        #3. average log-probability of each sequence's tokens up to its end-of-text
+        #4. clean up, drop duplicates (case / punctuation insensitive), best average first
+        # same latency budget as generate_single_response, for the whole batched call
+        def generate_responses(self, prompt, num_return_sequences=3, max_length=80, budget_ms=None):
+            """GPT-2 candidates ranked by average log-probability"""
+            import torch
+            from scripts.latency_budget import GenerationBudget
+            budget = GenerationBudget('chat', budget_ms)
+            try:
+                inputs = self.tokenizer.encode(prompt, return_tensors='pt').to(self.device)
+                n = max(1, num_return_sequences)
+                past_key_values = self._shared_prompt_cache(inputs, n)
+                if past_key_values is not None:
+                    batch_kwargs = {'past_key_values': past_key_values}
+                    input_ids = inputs.repeat(n, 1)
+                else:
+                    batch_kwargs = {'num_return_sequences': n}
+                    input_ids = inputs
+                with torch.no_grad():
+                    outputs = self.model.generate(
+                        input_ids,
+                        attention_mask=torch.ones_like(input_ids),
+                        max_length=inputs.shape[1] + max_length,
+                        temperature=0.7,
+                        do_sample=True,
+                        top_p=0.9,
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        no_repeat_ngram_size=2,
+                        output_scores=True,
+                        return_dict_in_generate=True,
+                        stopping_criteria=budget.stopping_criteria(),
+                        **batch_kwargs
+                    )
+                    token_scores = self.model.compute_transition_scores(
+                        outputs.sequences, outputs.scores, normalize_logits=True)
+                self.last_budget = budget.finish(len(outputs.scores))
+
+                generated = outputs.sequences[:, inputs.shape[1]:]
+                candidates = []
+                for row in range(generated.shape[0]):
+                    # tokens up to and including the first end-of-text, rest is padding
+                    length = generated.shape[1]
+                    eos = (generated[row] == self.tokenizer.eos_token_id).nonzero()
+                    if len(eos):
+                        length = int(eos[0]) + 1
+                    scores = token_scores[row, :length]
+                    scores = scores[torch.isfinite(scores)]
+                    avg_logprob = float(scores.mean()) if len(scores) else float('-inf')
+                    candidates.append((avg_logprob, self._finish_response(prompt, outputs.sequences[row], budget.hit)))
+
+                ranked, seen = [], set()
+                for avg_logprob, response in sorted(candidates, key=lambda c: c[0], reverse=True):
+                    key = ''.join(ch for ch in response.lower() if ch.isalnum())
+                    if response and key not in seen:
+                        seen.add(key)
+                        ranked.append({'response': response, 'avg_logprob': round(avg_logprob, 4)})
+                return ranked or [{'response': "Thank you for your message.", 'avg_logprob': None}]
+
+            except Exception as e:
+                print(f"GPT-2 Error: {e}")
+                return [{'response': "Thank you for your message.", 'avg_logprob': None}]
+        # stream response while it is generated
+        # 1. TextIteratorStreamer receives decoded text of new tokens only (prompt skipped)
+        # 2. generate_single_response runs in a thread with that streamer
+        # 3. yields {'delta': text} per chunk, then {'done': True, 'response': cleaned response}
+        def stream_response(self, prompt, max_length=80):
+            """GPT-2 text generation streamed as text chunks"""
+            import threading
+            from transformers import TextIteratorStreamer
+            streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+            result = {}
+
+            def run():
+                try:
+                    result['response'] = self.generate_single_response(prompt, max_length, streamer=streamer)
+                finally:
+                    # unblocks the iterator when generation failed before its own end()
+                    streamer.end()
+
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            for text in streamer:
+                if text:
+                    yield {'delta': text}
+            thread.join()
+            yield {'done': True, 'response': result.get('response')}
     # templates dict for each phase (detected by BERT AI)
     # NOTE: Only 8 phases match trained BERT model - extras removed for clarity
     # and one fallback 'general_inquiry' added
@@ -166,6 +437,8 @@ class SmartChatResponse:
         db_path = os.path.join(project_root, "data", "chat_data.db")
         # var for database
         self.db = ChatDatabase(db_path)
+        # latency budget record of the last AI generation
+        self.last_budget = None
         
         print("\n" + "="*60)
         print("INITIALIZING SMART CHAT RESPONSE")
@@ -256,58 +529,105 @@ class SmartChatResponse:
 
     # function that takes phase as input and generates AI response using GPT-2
     # takes phase, context and session_id as input
-    # 1. try to import ChatGPT2Generator from ai.chat_gpt2_generator
-    # 2. puts ChatGPT2Generator in gpt2 variable
-    # 3. create detailed prompt which includes context and phase information
-    # 4. call gpt2.generate_single_response with custom_prompt
-    # 5. if successful return first response
-    # 6. else return AI failure message
     def generate_ai_response(self, phase, context, session_id):
         """Generate AI response using integrated GPT-2"""
-        try:
-            # Use internal GPT-2 generator
-            if not hasattr(self, '_gpt2_generator'):
-                self._gpt2_generator = self.ChatGPT2Generator()
-            
-            # Create detailed prompt for better GPT-2 response
-            prompt = f"""You are a professional freelancer responding to a client in an Upwork chat conversation.
-
-CONVERSATION CONTEXT:
-{context[-500:]}
-
-AI PHASE DETECTION RESULT:
-The AI system has analyzed this conversation and detected that the client is in the "{phase}" phase.
-
-PHASE MEANINGS:
-- initial_response: Client is asking if you're available for work
-- ask_details: Client wants more information about project scope  
-- knowledge_check: Client is testing your expertise in specific topics
-- language_confirm: Client is asking about language preferences
-- rate_negotiation: Client is discussing pricing and budget
-- deadline_samples: Client is asking about delivery timelines
-- structure_clarification: Client wants to know about content format/structure
-- contract_acceptance: Client is ready to hire and wants you to accept contract
-
-YOUR TASK:
-Write a professional, friendly response that addresses the "{phase}" phase appropriately. 
-- Keep it concise (1-3 sentences)
-- Sound natural and conversational
-- Be enthusiastic and professional
-- Directly address what the client needs in this phase
+        return self.generate_ai_responses(phase, context, session_id, num_options=1)[0]
 
-Response:"""
+    # function that generates num_options AI responses from one GPT-2 generate call
+    # 1. create detailed prompt, static instructions first, then context and phase information
+    # 2. send prompt to resident model server (scripts/model_server.py)
+    # 3. if server is down load ChatGPT2Generator in-process and generate there
+    # 4. single option uses generate_single_response, several use generate_responses
+    #    (one batched decode, deduplicated, ranked by average log-probability)
+    # 5. else return AI failure message
+    # latency budget record of the generate call (server or in-process) is kept in self.last_budget
+    def generate_ai_responses(self, phase, context, session_id, num_options=1):
+        """Generate AI responses using integrated GPT-2"""
+        try:
+            # Create detailed prompt for better GPT-2 response (static prefix first, then context and phase)
+            prompt = build_ai_prompt(phase, context)
             
-            # Generate response using internal GPT-2
-            ai_response = self._gpt2_generator.generate_single_response(prompt)
+            # Generate on the model server, GPT-2 is already loaded there
+            if num_options > 1:
+                remote = request_model_server('/chat-responses', {'prompt': prompt, 'num_return_sequences': num_options})
+            else:
+                remote = request_model_server('/chat-response', {'prompt': prompt})
+            if remote:
+                print(f"[MODEL SERVER] Response in {remote['server_ms']}ms")
+                ai_responses = [c['response'] for c in remote['candidates']] if num_options > 1 else [remote['response']]
+                self.last_budget = remote.get('budget')
+            else:
+                # Use internal GPT-2 generator
+                if not hasattr(self, '_gpt2_generator'):
+                    self._gpt2_generator = self.ChatGPT2Generator()
+                if num_options > 1:
+                    candidates = self._gpt2_generator.generate_responses(prompt, num_return_sequences=num_options)
+                    ai_responses = [c['response'] for c in candidates]
+                else:
+                    ai_responses = [self._gpt2_generator.generate_single_response(prompt)]
+                self.last_budget = self._gpt2_generator.last_budget
             
-            # Return response or error message
-            if ai_response:
-                return ai_response
+            # Return responses or error message
+            ai_responses = [response for response in ai_responses if response]
+            if ai_responses:
+                return ai_responses
             else:
-                return "[AI Error] GPT-2 response generation failed. Please try again or use template mode."
+                return ["[AI Error] GPT-2 response generation failed. Please try again or use template mode."]
         except Exception as e:
             print(f"[WARN] GPT-2 failed: {e}")
-            return f"[AI Error] GPT-2 crashed: {str(e)}. Please use template mode instead."
+            return [f"[AI Error] GPT-2 crashed: {str(e)}. Please use template mode instead."]
+
+    # AI responses through the response cache in gpt2_responses
+    # 1. key: session, hash of the context messages, phase, mode ("ai:<options>") and chat model version
+    # 2. newest stored batch for the key younger than the TTL is returned without loading GPT-2
+    # 3. on a miss generate with generate_ai_responses and store the batch (errors are not stored)
+    # new messages change the context hash, so they never hit an older entry
+    # returns (responses, cache_hit)
+    def cached_ai_responses(self, phase, messages, session_id, num_options=1):
+        """Generate AI responses, reusing cached ones for an unchanged conversation"""
+        context = "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
+        ttl = response_cache_ttl()
+        if ttl <= 0:
+            return self.generate_ai_responses(phase, context, session_id, num_options), False
+        key = (session_id, hashlib.sha1(context.encode('utf-8')).hexdigest(), phase,
+               f"ai:{num_options}", chat_model_version())
+        cached = self.db.get_cached_responses(*key, max_age_seconds=ttl)
+        if cached:
+            print(f"[CACHE] Reusing {len(cached)} AI responses for unchanged conversation")
+            return cached, True
+        responses = self.generate_ai_responses(phase, context, session_id, num_options)
+        if not any(response.startswith('[AI Error]') for response in responses):
+            self.db.save_cached_responses(*key, responses=responses, context=messages)
+        return responses, False
+
+    # AI prompt for a session with its stored phase (used by the model server stream endpoint)
+    # returns dict with success, session_id, phase, confidence and prompt, or error
+    def prepare_ai_prompt(self, session_id='latest'):
+        """Build AI prompt from stored phase and recent messages"""
+        if session_id == 'latest':
+            latest = self.db.get_latest_session()
+            session_id = latest['session_id'] if latest else None
+        if not session_id:
+            return {'success': False, 'error': 'No active sessions found'}
+        session_data = self.db.get_session_with_phase(session_id)
+        if not session_data:
+            return {'success': False, 'error': f'Session {session_id} not found'}
+        if not session_data.get('phase'):
+            return {
+                'success': False,
+                'error': 'Phase not detected yet. Run standalone phase detector first.',
+                'session_id': session_id
+            }
+        messages = self.db.get_recent_messages(session_id, limit=10)
+        context = "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
+        return {
+            'success': True,
+            'session_id': session_id,
+            'phase': session_data['phase'],
+            'confidence': session_data['phase_confidence'],
+            'prompt': build_ai_prompt(session_data['phase'], context)
+        }
+
     # function that generates response
     # takes inputs ===============================================
     # session_id from database or 'latest'
@@ -358,12 +678,11 @@ Response:"""
         
         # if mode is set to ai or both
         if mode in ['ai', 'both']:
-            # get context for AI generation
+            # get context messages for AI generation and the response cache key
             messages = self.db.get_recent_messages(session_id, limit=10)
-            context = "\n".join([f"{m['sender_type']}: {m['text']}" for m in messages])
-            # else return empty string because only AI uses context
+            # else return empty list because only AI uses context
         else:
-            context = ""
+            messages = []
         
         # Generate response based on mode
         # if template mode
@@ -373,14 +692,14 @@ Response:"""
             print(f"[MODE] Template ({len(responses)} options)")
             # elif mode is ai
         elif mode == 'ai':
-            # response is generated AI response for phase and context
-            ai_response = self.generate_ai_response(phase, context, session_id)
-            responses = [ai_response]
-            print(f"[MODE] AI (GPT-2)")
+            # num_options AI responses for phase and context from one generate call (or the cache)
+            responses, cache_hit = self.cached_ai_responses(phase, messages, session_id, num_options)
+            print(f"[MODE] AI (GPT-2, {len(responses)} options)")
             # if mode is both
         elif mode == 'both':
             template_response = self.generate_template_response(phase, 1)[0]
-            ai_response = self.generate_ai_response(phase, context, session_id)
+            ai_responses, cache_hit = self.cached_ai_responses(phase, messages, session_id, 1)
+            ai_response = ai_responses[0]
             print(f"[MODE] Both (Template + AI)")
             # inside resulty put response and other fields
             result = {
@@ -389,8 +708,11 @@ Response:"""
                 'confidence': confidence,
                 'template_response': template_response,
                 'ai_response': ai_response,
-                'session_id': session_id
+                'session_id': session_id,
+                'response_cache': {'hit': cache_hit, **self.db.get_response_cache_stats()}
             }
+            if not cache_hit:
+                result['generation_budget'] = self.last_budget
             # Save to temp file for dashboard
             self.save_to_temp_file(result)
             return result
@@ -407,6 +729,10 @@ Response:"""
             'responses': responses,
             'timestamp': datetime.now().isoformat()
         }
+        if mode == 'ai':
+            result['response_cache'] = {'hit': cache_hit, **self.db.get_response_cache_stats()}
+            if not cache_hit:
+                result['generation_budget'] = self.last_budget
         
         # Save to temp file for dashboard
         self.save_to_temp_file(result)
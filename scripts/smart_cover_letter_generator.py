@@ -22,45 +22,50 @@ except ImportError:
     print("❌ Cannot import database_manager")
     sys.exit(1)
 
-# Try to import AI model and tokenizer, else exit with error
-try:
-    import torch
-    from transformers import GPT2LMHeadModel, GPT2Tokenizer
-    AI_AVAILABLE = True
-except ImportError as e:
-    print(f"❌ AI libraries not available: {e}")
-    sys.exit(1)
+# resident model server client, torch is only imported when generating in-process
+from scripts.model_client import request_model_server
 
-# Try to import NLTK for better text processing
-try:
-    import nltk
-    from nltk.tokenize import sent_tokenize
-    NLTK_AVAILABLE = True
-    
-    # Download required NLTK data if not present
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        print("📥 Downloading NLTK punkt tokenizer...")
-        nltk.download('punkt', quiet=True)
-    
-    # Try newer punkt_tab format
+# NLTK sentence tokenizer, imported (and punkt downloaded) on first cleanup only,
+# so checking the database for pending work never waits for NLTK
+_sent_tokenize = None
+NLTK_AVAILABLE = None
+
+def get_sent_tokenize():
+    """NLTK sent_tokenize, or None when NLTK is not installed"""
+    global _sent_tokenize, NLTK_AVAILABLE
+    if NLTK_AVAILABLE is not None:
+        return _sent_tokenize
+    # Try to import NLTK for better text processing
     try:
-        nltk.data.find('tokenizers/punkt_tab')
-    except LookupError:
-        print("📥 Downloading NLTK punkt_tab tokenizer...")
-        nltk.download('punkt_tab', quiet=True)
+        import nltk
+        from nltk.tokenize import sent_tokenize
         
-except ImportError:
-    print("⚠️ NLTK not available, using basic text cleaning")
-    NLTK_AVAILABLE = False
+        # Download required NLTK data if not present
+        try:
+            nltk.data.find('tokenizers/punkt')
+        except LookupError:
+            print("📥 Downloading NLTK punkt tokenizer...")
+            nltk.download('punkt', quiet=True)
+        
+        # Try newer punkt_tab format
+        try:
+            nltk.data.find('tokenizers/punkt_tab')
+        except LookupError:
+            print("📥 Downloading NLTK punkt_tab tokenizer...")
+            nltk.download('punkt_tab', quiet=True)
+        _sent_tokenize = sent_tokenize
+        NLTK_AVAILABLE = True
+    except ImportError:
+        print("⚠️ NLTK not available, using basic text cleaning")
+        NLTK_AVAILABLE = False
+    return _sent_tokenize
 
 # class to call AI model for generating cover letters
 # it has functions to 
 # 1.  check database and look for jobs without cover letters
 # 2.  get latest job without cover letter
 # 3.  load model temporarily for generation
-# 4.  unload model to free memory
+# 4.  release model back to the shared model registry
 # 5.  generate cover letter for job
 class SmartCoverLetterGenerator:
     """Smart cover letter generator that checks if work is needed first"""
@@ -68,7 +73,10 @@ class SmartCoverLetterGenerator:
     # 1. set model path to trained model
     # 2. set model and tokenizer to None
     # 3. set hardware device to CPU for compatibility
-    def __init__(self):
+    # 4. quantized=True (or MODEL_QUANTIZED=1) loads INT8 dynamic-quantized weights
+    # 5. assistant="distilgpt2" / "layers:N" (or COVER_LETTER_ASSISTANT_MODEL) adds a draft model
+    #    for assisted decoding of single cover letters
+    def __init__(self, quantized=None, assistant=None):
         """Initialize generator"""
         # path to trained model
         self.model_path = "ai/cover_letter_trainer/trained_models/custom_cover_letter_model/final"
@@ -76,7 +84,15 @@ class SmartCoverLetterGenerator:
         self.model = None
         self.tokenizer = None
         # set hardware device to use CPU for hardware compatibility
-        self.device = torch.device('cpu')
+        self.device = 'cpu'
+        # opt-in INT8 mode, resolved here so model server and CLI behave the same
+        self.quantized = quantized
+        # draft model for assisted decoding, loaded with the main model
+        self.assistant = assistant
+        self.assistant_model = None
+        self.assistant_from_registry = False
+        # latency budget record of the last generate call
+        self.last_budget = None
 
     # ======= 🔎💼 function to check if cover letter generation is needed ======    
     # connects to database and checks for jobs without cover letters
@@ -113,17 +129,23 @@ class SmartCoverLetterGenerator:
             print(f"❌ Error checking database: {e}")
             return False, 0
     # ======= 🔎📝💼 function to get latest job without cover letter ======
-    # 1. connect to database
-    # 2. query jobs table left join cover_letters table on job id
-    # 3. get latest job row where cover letter is null
-    # 4. return job data from database as dictionary
     def get_latest_job_without_cover_letter(self):
         """Get the most recent job without cover letter"""
+        jobs = self.get_jobs_without_cover_letter(limit=1)
+        return jobs[0] if jobs else None
+
+    # ======= 🔎📝💼 function to get pending jobs without cover letter ======
+    # 1. connect to database
+    # 2. query jobs table left join cover_letters table on job id
+    # 3. get newest job rows where cover letter is null, all of them when limit is None
+    # 4. return job data from database as list of dictionaries
+    def get_jobs_without_cover_letter(self, limit=None):
+        """Get jobs without cover letter, newest first"""
         try:
             db = JobDatabase()
             conn = sqlite3.connect(db.db_path)
             cursor = conn.cursor()
-            # query to get latest job without cover letter
+            # query to get newest jobs without cover letter (LIMIT -1 = no limit in SQLite)
             cursor.execute('''
                 SELECT j.id, j.job_title, j.job_type, j.budget, j.experience_level, 
                        j.skills, j.description, j.parsed_timestamp
@@ -131,16 +153,12 @@ class SmartCoverLetterGenerator:
                 LEFT JOIN cover_letters cl ON j.id = cl.job_id
                 WHERE cl.job_id IS NULL
                 ORDER BY j.parsed_timestamp DESC
-                LIMIT 1
-            ''')
-            # fetch first row as latest job without cover letter
-            job_row = cursor.fetchone()
+                LIMIT ?
+            ''', (limit if limit is not None else -1,))
+            job_rows = cursor.fetchall()
             conn.close()
-            # return None if no job found
-            if not job_row:
-                return None
-            # return job data as dictionary, of values and rows in database
-            return {
+            # return job data as dictionaries, of values and rows in database
+            return [{
                 'id': job_row[0],
                 'job_title': job_row[1],
                 'job_type': job_row[2],
@@ -149,36 +167,31 @@ class SmartCoverLetterGenerator:
                 'skills': job_row[5],
                 'description': job_row[6],
                 'parsed_timestamp': job_row[7]
-            }
+            } for job_row in job_rows]
             
         except Exception as e:
-            print(f"❌ Error getting job: {e}")
-            return None
+            print(f"❌ Error getting jobs: {e}")
+            return []
     # ======= 🧱🤖 function to load model temporarily ======
-    # calls trained model and tokenizer from model_path
+    # gets trained model and tokenizer for model_path from the shared model registry
     # 1. check if there is a trained model at model_path
-    # 2. load tokenizer from model_path
-    # 3. load trained model from model_path
-    # 4. if not found load base GPT-2 model and tokenizer
-    # 5. set padding token if not set
-    # 6. set model to eval mode
+    # 2. get tokenizer and model for model_path (loaded once per process)
+    # 3. if not found use base GPT-2 model and tokenizer
+    # 4. registry sets padding token, left padding and eval mode
+    # 5. load draft model when assisted decoding is configured
     def load_model_temporarily(self):
         """Load model with fallback to base GPT-2 if trained model not found"""
         try:
+            from scripts.model_quantization import quantization_enabled
+            from scripts.model_registry import get_registry
+            from scripts.assisted_generation import assistant_spec, load_assistant_model
+            quantized = quantization_enabled(self.quantized)
             # First try to load trained model
             model_path = Path(self.model_path)
             
             if model_path.exists():
                 print(f"🔄 Loading trained model...")
-                
-                # Load trained model
-                self.tokenizer = GPT2Tokenizer.from_pretrained(str(model_path))
-                self.model = GPT2LMHeadModel.from_pretrained(
-                    str(model_path),
-                    torch_dtype=torch.float32,
-                    low_cpu_mem_usage=True
-                )
-                
+                self.model, self.tokenizer = get_registry().get_gpt2(model_path, quantized=quantized, device=self.device)
                 print(f"✅ Trained model loaded")
                 
             else:
@@ -186,21 +199,14 @@ class SmartCoverLetterGenerator:
                 print(f"🔄 Falling back to base GPT-2 model...")
                 
                 # Fallback to base GPT-2
-                self.tokenizer = GPT2Tokenizer.from_pretrained("gpt2")
-                self.model = GPT2LMHeadModel.from_pretrained(
-                    "gpt2",
-                    torch_dtype=torch.float32,
-                    low_cpu_mem_usage=True
-                )
-                
+                self.model, self.tokenizer = get_registry().get_gpt2("gpt2", quantized=quantized, device=self.device)
                 print(f"✅ Base GPT-2 model loaded (fallback)")
             
-            # Common setup for both models
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
-            
-            self.tokenizer.padding_side = "left"
-            self.model.eval()
+            # optional draft model for assisted decoding
+            spec = assistant_spec(self.assistant, 'COVER_LETTER_ASSISTANT_MODEL')
+            if spec:
+                self.assistant_model, self.assistant_from_registry = load_assistant_model(
+                    spec, self.model, self.device, quantized)
             
             return True
             
@@ -209,53 +215,41 @@ class SmartCoverLetterGenerator:
             return False
 
     # ======= 🗑️🤖 function to unload model ======
-    # frees memory by deleting model and tokenizer
+    # gives model back to the registry, which frees it on LRU / idle eviction
+    # (or at process exit for the one-shot CLI)
     def unload_model(self):
-        # check if model and tokenizer are loaded and delete to free memory
-        if self.model:
-            del self.model
+        if self.model is not None:
+            from scripts.model_registry import get_registry
+            from scripts.assisted_generation import release_assistant_model
+            get_registry().release(self.model)
+            release_assistant_model(self.assistant_model, self.assistant_from_registry)
             self.model = None
-        if self.tokenizer:
-            del self.tokenizer  
             self.tokenizer = None
-        print("🗑️ Model memory freed")
+            self.assistant_model = None
+        print("🗑️ Model released")
 
     # ======= 🤖📝 function for setting up prompt for better cover letter generation ======
     # takes input job data extracts relevant fields and creates prompt
-    # 1. extract job details from get_latest_job_without_cover_letter result
+    # 1. extract job details from get_jobs_without_cover_letter result
     # 2. create compact prompt with job title, type, budget, skills
-    # 3. tokenize with minimal length
-    # 4. generate with conservative settings
-    # 5. decode response
-    # 6. extract cover letter from response
-    # 7. call function that cleans up text
-    # 8. return cleaned cover letter
-    def generate_cover_letter(self, job_data):
-        """Generate cover letter for job"""
-        # check if model and tokenizer are loaded
-        if not self.model or not self.tokenizer:
-            print("❌ Model not loaded")
-            return None
+    def _build_prompt(self, job_data):
+        # Extract job details from get_jobs_without_cover_letter result
+        job_title = job_data.get('job_title', 'Unknown Position')
+        job_type = job_data.get('job_type', 'Project')
+        budget = job_data.get('budget', 'Not specified')
+        skills = job_data.get('skills', [])
         
-        try:
-            # Extract job details from get_latest_job_without_cover_letter result
-            job_title = job_data.get('job_title', 'Unknown Position')
-            job_type = job_data.get('job_type', 'Project')
-            budget = job_data.get('budget', 'Not specified')
-            experience_level = job_data.get('experience_level', 'Not specified')
-            skills = job_data.get('skills', [])
-            
-            # Parse skills if JSON string
-            if isinstance(skills, str):
-                try:
-                    skills = json.loads(skills)
-                except:
-                    skills = []
-            # if no skills given place relevant technologies
-            skills_str = ', '.join(skills[:3]) if skills else 'relevant technologies'
-            
-            # Create compact prompt with  get_latest_job_without_cover_letter result fields
-            prompt = f"""Job: {job_title}
+        # Parse skills if JSON string
+        if isinstance(skills, str):
+            try:
+                skills = json.loads(skills)
+            except:
+                skills = []
+        # if no skills given place relevant technologies
+        skills_str = ', '.join(skills[:3]) if skills else 'relevant technologies'
+        
+        # Create compact prompt with job fields
+        return f"""Job: {job_title}
 Type: {job_type}
 Budget: {budget}
 Skills: {skills_str}
@@ -264,12 +258,41 @@ Cover Letter:
 Dear Hiring Manager,
 
 I am excited to apply for the {job_title} position."""
+
+    # ======= 🤖📝 function to generate one cover letter ======
+    def generate_cover_letter(self, job_data, budget_ms=None):
+        """Generate cover letter for job"""
+        return self.generate_cover_letters([job_data], budget_ms)[0]
+
+    # ======= 🤖📝📚 function to generate cover letters for several jobs at once ======
+    # 1. build prompt for every job
+    # 2. tokenize all prompts together, left padded so every prompt ends where generation starts
+    # 3. one generate call with conservative settings, 120 new tokens per letter
+    #    (a single job uses the draft model when assisted decoding is on, it only works on batch size 1)
+    # 4. decode every row
+    # 5. extract cover letter from response, cut at the last complete sentence when the
+    #    latency budget (budget_ms, default GENERATION_LATENCY_BUDGET_MS, 0 = none) stopped generation
+    # 6. call function that cleans up text
+    # 7. return cleaned cover letters in job order (None for failed ones), self.last_budget records the call
+    def generate_cover_letters(self, jobs_data, budget_ms=None):
+        """Generate cover letters for several jobs in one generate call"""
+        # check if model and tokenizer are loaded
+        if not self.model or not self.tokenizer:
+            print("❌ Model not loaded")
+            return [None] * len(jobs_data)
+        
+        try:
+            import torch
+            from scripts.latency_budget import GenerationBudget, trim_to_last_sentence
+            budget = GenerationBudget('cover_letter', budget_ms)
+            prompts = [self._build_prompt(job_data) for job_data in jobs_data]
             # Log prompt generation
-            print(f"🔄 Generating for: {job_title[:40]}...")
+            for job_data in jobs_data:
+                print(f"🔄 Generating for: {job_data.get('job_title', 'Unknown Position')[:40]}...")
             
-            # Tokenize with minimal length
+            # Tokenize with minimal length, tokenizer pads on the left
             inputs = self.tokenizer(
-                prompt,
+                prompts,
                 return_tensors='pt',
                 truncation=True,
                 max_length=250,  # Very compact
@@ -282,7 +305,9 @@ I am excited to apply for the {job_title} position."""
                 outputs = self.model.generate(
                     inputs['input_ids'],
                     attention_mask=inputs['attention_mask'],  # Pass attention mask
-                    max_length=inputs['input_ids'].shape[1] + 120,  # Only 120 new tokens
+                    max_new_tokens=120,  # Only 120 new tokens
+                    assistant_model=self.assistant_model if len(prompts) == 1 else None,
+                    stopping_criteria=budget.stopping_criteria(),
                     temperature=0.7,
                     do_sample=True,
                     top_p=0.8,
@@ -292,25 +317,29 @@ I am excited to apply for the {job_title} position."""
                     repetition_penalty=1.1
                 )
             
-            # Decode response
-            generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract cover letter
-            if "Cover Letter:" in generated_text:
-                cover_letter = generated_text.split("Cover Letter:")[1].strip()
-            else:
-                cover_letter = generated_text.strip()
-            
-            # after extraction call function that cleans up text
-            cover_letter = self._clean_text(cover_letter)
+            self.last_budget = budget.finish(outputs.shape[1] - inputs['input_ids'].shape[1])
+            cover_letters = []
+            for output in outputs:
+                # Decode response, padding is the eos token and is skipped
+                generated_text = self.tokenizer.decode(output, skip_special_tokens=True)
+                
+                # Extract cover letter
+                if "Cover Letter:" in generated_text:
+                    cover_letter = generated_text.split("Cover Letter:")[1].strip()
+                else:
+                    cover_letter = generated_text.strip()
+                if budget.hit:
+                    cover_letter = trim_to_last_sentence(cover_letter)
+                
+                # after extraction call function that cleans up text
+                cover_letters.append(self._clean_text(cover_letter))
             # Log cover letter generation
-            print("✅ Cover letter generated")
-            # Return the cleaned cover letter
-            return cover_letter
+            print(f"✅ {len(cover_letters)} cover letter(s) generated")
+            return cover_letters
             # error handling if generation fails
         except Exception as e:
             print(f"❌ Error generating: {e}")
-            return None
+            return [None] * len(jobs_data)
     # ======= 🧼📝 function to clean generated text with NLTK ======
     # 1. try to use NLTK to tokenize sentences
     # 2. make array for clean sentences
@@ -322,7 +351,8 @@ I am excited to apply for the {job_title} position."""
     # 8. fallback to basic cleaning if NLTK fails
     def _clean_text(self, text):
         # calls NLTK to clean text from short or meaningless sentences
-        if NLTK_AVAILABLE:
+        sent_tokenize = get_sent_tokenize()
+        if sent_tokenize:
             # Use NLTK for better sentence tokenization
             try:
                 # Tokenize text into sentences using NLTK
@@ -383,10 +413,11 @@ I am excited to apply for the {job_title} position."""
 # 2. initialize SmartCoverLetterGenerator class
 # 3. check if work is needed with check_if_cover_letter_needed
 # 4, extract job data with get_latest_job_without_cover_letter
-# 5. load model temporarily with load_model_temporarily
-# 6. generate cover letter with generate_cover_letter from job data
-# 7. unload model to free memory with unload_model
-# 8. save to database with JobDatabase class and add_cover_letter function
+# 5. ask resident model server for the cover letter (model already loaded there)
+# 6. if server is down load model temporarily with load_model_temporarily
+# 7. generate cover letter with generate_cover_letter from job data (within the latency budget)
+# 8. release model with unload_model
+# 9. save to database with JobDatabase class and add_cover_letter function
 def smart_generate_cover_letter():
     
     # log event
@@ -416,17 +447,25 @@ def smart_generate_cover_letter():
     
     print(f"🎯 Processing: {job_data['job_title']}")
     
-    # inside variable Load model
-    if not generator.load_model_temporarily():
-        print("❌ Failed to load model")
-        return False
-    
-    # inside variable call generate_cover_letter 
-    # and eval data extracted by get_latest_job_without_cover_letter
-    cover_letter = generator.generate_cover_letter(job_data)
-    
-    # Immediately unload model to free memory
-    generator.unload_model()
+    # try resident model server first
+    remote = request_model_server('/cover-letter', {'job_data': job_data})
+    if remote:
+        print(f"[MODEL SERVER] Cover letter generated in {remote['server_ms']}ms")
+        cover_letter = remote['cover_letter']
+        budget = remote.get('budget')
+    else:
+        # inside variable Load model
+        if not generator.load_model_temporarily():
+            print("❌ Failed to load model")
+            return False
+        
+        # inside variable call generate_cover_letter 
+        # and eval data extracted by get_latest_job_without_cover_letter
+        cover_letter = generator.generate_cover_letter(job_data)
+        budget = generator.last_budget
+        
+        # Immediately release model back to the registry
+        generator.unload_model()
     
     if not cover_letter:
         print("❌ Failed to generate cover letter")
@@ -440,6 +479,7 @@ def smart_generate_cover_letter():
             ai_provider="trained_gpt2_smart",
             cover_letter_text=cover_letter,
             notes=f"Smart generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                  + (" (latency budget hit)" if budget and budget['budget_hit'] else "")
         )
         
         print(f"✅ Cover letter saved (ID: {cover_letter_id})")
@@ -449,11 +489,86 @@ def smart_generate_cover_letter():
     except Exception as e:
         print(f"❌ Error saving: {e}")
         return False
+# ======= 🧠📚 batch function for the whole pending backlog ======
+# 1. get pending jobs, newest first (limit jobs or all of them)
+# 2. per batch ask resident model server first (/cover-letter-batch)
+# 3. if server is down load model once for all batches, unload at the end
+# 4. generate_cover_letters for the batch in one generate call
+# 5. save every batch to database in one transaction as soon as it is generated
+# 6. report letters per minute
+def smart_generate_cover_letters_batch(limit=None, batch_size=8):
+    print("🧠 SMART COVER LETTER GENERATOR (BATCH)")
+    print("========================================")
+
+    generator = SmartCoverLetterGenerator()
+    jobs = generator.get_jobs_without_cover_letter(limit=limit)
+    if not jobs:
+        print("✅ All jobs already have cover letters - no work needed")
+        return True
+    print(f"📋 Processing {len(jobs)} jobs in batches of {batch_size}")
+
+    db = JobDatabase()
+    started = datetime.now()
+    saved, failed = 0, 0
+    model_loaded = False
+    try:
+        for start in range(0, len(jobs), batch_size):
+            batch = jobs[start:start + batch_size]
+            # try resident model server first, a batch takes longer than one letter
+            # backlog runs outside the n8n chain, letters are not cut by the latency budget
+            remote = None if model_loaded else request_model_server('/cover-letter-batch',
+                                                                    {'jobs_data': batch, 'budget_ms': 0}, timeout=600)
+            if remote:
+                print(f"[MODEL SERVER] {len(batch)} cover letters generated in {remote['server_ms']}ms")
+                cover_letters = remote['cover_letters']
+            else:
+                if not model_loaded:
+                    if not generator.load_model_temporarily():
+                        print("❌ Failed to load model")
+                        return False
+                    model_loaded = True
+                cover_letters = generator.generate_cover_letters(batch, budget_ms=0)
+
+            notes = f"Smart generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} (batch)"
+            entries = [(job['id'], "trained_gpt2_smart", cover_letter, notes)
+                       for job, cover_letter in zip(batch, cover_letters) if cover_letter]
+            try:
+                db.add_cover_letters(entries)
+                saved += len(entries)
+                failed += len(batch) - len(entries)
+            except Exception as e:
+                print(f"❌ Error saving batch: {e}")
+                failed += len(batch)
+            print(f"✅ Batch {start // batch_size + 1}: {len(entries)}/{len(batch)} saved ({saved}/{len(jobs)} total)")
+    finally:
+        if model_loaded:
+            generator.unload_model()
+
+    minutes = (datetime.now() - started).total_seconds() / 60
+    print(f"📊 {saved} cover letters in {minutes:.1f} min "
+          f"({saved / minutes if minutes > 0 else 0:.1f} letters/min), {failed} failed")
+    return failed == 0
+
 # main function to call smart cover letter generator function
+# --batch N / --all-pending work through the backlog with one model load
 def main():
     """Main function"""
-    success = smart_generate_cover_letter()
+    import argparse
+    parser = argparse.ArgumentParser(description='Smart cover letter generator')
+    parser.add_argument('--batch', type=int, default=None, metavar='N',
+                        help='Generate cover letters for the N newest jobs without one')
+    parser.add_argument('--all-pending', action='store_true',
+                        help='Generate cover letters for every job without one')
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help='Jobs per generate call in batch mode (default: 8)')
+    args = parser.parse_args()
+
+    if args.all_pending or args.batch:
+        success = smart_generate_cover_letters_batch(
+            limit=None if args.all_pending else args.batch, batch_size=args.batch_size)
+    else:
+        success = smart_generate_cover_letter()
     sys.exit(0 if success else 1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -5,6 +5,8 @@ Separates phase detection from response generation for efficiency
 import sys
 import os
 import json
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
 
 # Set UTF-8 encoding
@@ -14,35 +16,60 @@ if sys.platform == "win32":
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from data.chat_database_manager import ChatDatabase
-from scripts.phase_detector import PhaseDetector
+from scripts.model_client import request_model_server
+from scripts.onnx_phase_detector import (load_phase_detector, resolve_phase_backend, default_model_dir,
+                                        phase_model_version, PHASE_BACKENDS)
+from scripts.cascade_phase_detector import cascade_enabled, fast_model_available
+from scripts.phase_tracker import (PhaseTracker, load_transition_matrix, fit_transition_matrix,
+                                   is_client_message, message_context, TRANSITIONS_FILE)
+
+# contexts kept in the in-process phase cache
+PHASE_LRU_SIZE = 256
 
 class StandalonePhaseDetector:
+    # in-process LRU shared by every detector in this process, keyed by (context hash, model version)
+    _phase_lru = OrderedDict()
 
-    # init database and try to load model
+    # init database, model is loaded only if the model server is down
     #1. root of database and model
     #2. path to database
     #3. path to model
     #4. put database manager in var
-    #5. put model in var
-    #6. call PhaseDetector class to load model and its functions
-    #7. print metadata info
-    def __init__(self):
+    #5. pick in-process backend: onnx (no torch import) or torch, from --backend / PHASE_DETECTOR_BACKEND
+    #6. optional TF-IDF cascade in front of the model (--cascade / PHASE_DETECTOR_CASCADE)
+    #7. model version for phase cache keys, cache counters
+    def __init__(self, backend=None, use_cache=True, cascade=None):
         # var to hold root dir
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         # var to hold db path
         db_path = os.path.join(project_root, "data", "chat_data.db")
         # initialize database
         self.db = ChatDatabase(db_path)
-        # var to hold model dir
-        model_dir = os.path.join(project_root, "ai","phase_detector_trainer", "trained_models", "phase_classifier_v1")
+        # var to hold model dir (PHASE_MODEL_DIR overrides phase_classifier_v1)
+        self.model_dir = default_model_dir()
+        self.phase_detector = None
+        self.phase_backend = resolve_phase_backend(self.model_dir, backend)
+        self.cascade = cascade_enabled(cascade) and fast_model_available(self.model_dir)
+        self.use_cache = use_cache
+        self.model_version = self._model_version()
+        self.cache_stats = {'hits': 0, 'misses': 0}
         # log
         print("\n" + "="*60)
         print("STANDALONE PHASE DETECTOR")
+        print(f"   In-process backend: {self.phase_backend}" + (" (TF-IDF cascade)" if self.cascade else ""))
+        print("="*60 + "\n")
+
+    # load model in this process (used when model server is not running)
+    #1. onnx backend uses OnnxPhaseDetector (onnxruntime, no torch)
+    #2. torch backend imports PhaseDetector only when needed
+    #3. cascade loads the fast TF-IDF model, the backend model only on first escalation
+    #4. print metadata info
+    def _load_phase_detector(self):
         print("="*60)
         # Try to load trained model, fallback to base BERT if not found
         try:
-            # call PhaseDetector class and load model (with built-in fallback)
-            self.phase_detector = PhaseDetector(model_dir)
+            # onnx / torch detector (PhaseDetector has built-in base BERT fallback)
+            self.phase_detector = load_phase_detector(self.model_dir, self.phase_backend, self.cascade)
             if hasattr(self.phase_detector, 'metadata') and self.phase_detector.metadata:
                 print("✅ TRAINED BERT PHASE DETECTOR LOADED")
                 print(f"   Accuracy: {self.phase_detector.metadata.get('accuracy')}%")
@@ -55,11 +82,91 @@ class StandalonePhaseDetector:
             print(f"❌ ERROR loading BERT model: {e}")
             print("="*60 + "\n")
             raise
+        return self.phase_detector
+
+    # predict phase on the model server, fall back to in-process model
+    def predict_phase(self, context, return_probabilities=False):
+        remote = request_model_server('/phase', {'context': context, 'return_probabilities': return_probabilities})
+        if remote:
+            print(f"[MODEL SERVER] Phase predicted in {remote['server_ms']}ms")
+            return remote, 'model_server'
+        detector = self.phase_detector or self._load_phase_detector()
+        return detector.predict(context, return_probabilities=return_probabilities), f'in_process_{self.phase_backend}'
+
+    # batched predict_phase: one /phase-batch request or one in-process predict_batch call
+    def predict_phase_batch(self, contexts, return_probabilities=False):
+        remote = request_model_server('/phase-batch', {'contexts': contexts, 'return_probabilities': return_probabilities})
+        if remote:
+            print(f"[MODEL SERVER] {len(contexts)} phases predicted in {remote['server_ms']}ms")
+            return remote['results'], 'model_server'
+        detector = self.phase_detector or self._load_phase_detector()
+        return detector.predict_batch(contexts, return_probabilities=return_probabilities), f'in_process_{self.phase_backend}'
+
+    # version of the trained model for cache keys (None = untrained fallback, nothing cached)
+    def _model_version(self):
+        return phase_model_version(self.model_dir, self.cascade)
+
+    # model server predictions are only cached when the server runs the model version of the key
+    # (it can run another model directory, quantization or cascade setting than this process)
+    def _cacheable(self, key, prediction, backend):
+        if key is None:
+            return False
+        if backend == 'model_server' and prediction.get('model_version') != key[1]:
+            print(f"[CACHE] Model server runs {prediction.get('model_version')}, not {key[1]} - result not cached")
+            return False
+        return True
+
+    # cache key for a context, None when caching is off or the model is untrained
+    def _cache_key(self, context):
+        if not self.use_cache or not self.model_version:
+            return None
+        return (hashlib.sha1(context.encode('utf-8')).hexdigest(), self.model_version)
+
+    # look key up in the in-process LRU, then in phase_cache table (copied into the LRU)
+    def _cache_lookup(self, key):
+        if key is None:
+            return None, None
+        cached = self._phase_lru.get(key)
+        if cached:
+            self._phase_lru.move_to_end(key)
+            return dict(cached), 'cache_lru'
+        cached = self.db.get_cached_phase(*key)
+        if cached:
+            self._remember_phase(key, cached)
+            return cached, 'cache_db'
+        return None, None
+
+    # predict phase with memoization on the exact context string
+    #1. in-process LRU
+    #2. phase_cache table
+    #3. on miss predict with probabilities and store in both
+    def predict_phase_cached(self, context):
+        key = self._cache_key(context)
+        cached, source = self._cache_lookup(key)
+        if cached:
+            self.cache_stats['hits'] += 1
+            return cached, source
+
+        self.cache_stats['misses'] += 1
+        phase_result, backend = self.predict_phase(context, return_probabilities=key is not None)
+        if self._cacheable(key, phase_result, backend):
+            self.db.save_cached_phase(key[0], key[1], phase_result['phase'], phase_result['confidence'],
+                                      phase_result.get('all_probabilities'))
+            self._remember_phase(key, phase_result)
+        return phase_result, backend
+
+    # add to LRU and drop the least recently used entries over PHASE_LRU_SIZE
+    def _remember_phase(self, key, phase_result):
+        self._phase_lru[key] = dict(phase_result)
+        self._phase_lru.move_to_end(key)
+        while len(self._phase_lru) > PHASE_LRU_SIZE:
+            self._phase_lru.popitem(last=False)
+
     # function to call detection and update db
     #1. get latest session from database manager
     #2. get recent messages from database manager
     #3. build context string by adding object fields into one line string for tokenization
-    #4. use predict function to get phase and confidence
+    #4. use predict_phase_cached (cache, model server or in-process) to get phase and confidence
     #5. update database with detected phase and confidence
     #6. log it
     def detect_and_update_phase(self, session_id='latest'):
@@ -96,7 +203,7 @@ class StandalonePhaseDetector:
         # log that model is analyzing
         print("[BERT] Analyzing conversation phase...")
         # use predict function that sets model to eval the input save output to var
-        phase_result = self.phase_detector.predict(context)
+        phase_result, backend = self.predict_phase_cached(context)
         # extract phase and confidence from result
         phase = phase_result['phase']
         confidence = phase_result['confidence']
@@ -117,6 +224,9 @@ class StandalonePhaseDetector:
                 'confidence': confidence,
                 'context_length': len(context),
                 'messages_count': len(messages),
+                'backend': backend,
+                'cache_hits': self.cache_stats['hits'],
+                'cache_misses': self.cache_stats['misses'],
                 'timestamp': datetime.now().isoformat()
             }
         # log failure
@@ -125,6 +235,204 @@ class StandalonePhaseDetector:
                 'success': False,
                 'error': 'Failed to update database with detected phase'
             }
+    # detect phase of every active session that got messages after its last phase update
+    #1. pending sessions and their last 10 messages from one query
+    #2. contexts already in the phase cache are answered from it
+    #3. remaining contexts go through one batched forward pass
+    #4. new predictions are cached and all phase updates written in one transaction
+    def detect_all_active(self):
+        """Detect phases for all active sessions with new messages"""
+        started = datetime.now()
+        sessions = self.db.get_sessions_pending_phase(limit=10)
+        print(f"[PHASE DETECT] {len(sessions)} active sessions with new messages")
+        if not sessions:
+            return {
+                'success': True,
+                'mode': 'all_active',
+                'updated': 0,
+                'sessions': [],
+                'cache_hits': 0,
+                'cache_misses': 0,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        contexts = ["\n".join(f"{m['sender_type']}: {m['text']}" for m in session['messages']) for session in sessions]
+        results = [None] * len(sessions)
+        sources = [None] * len(sessions)
+        keys = [self._cache_key(context) for context in contexts]
+        for i, key in enumerate(keys):
+            results[i], sources[i] = self._cache_lookup(key)
+        pending = [i for i, result in enumerate(results) if result is None]
+        self.cache_stats['hits'] += len(sessions) - len(pending)
+        self.cache_stats['misses'] += len(pending)
+
+        backend = None
+        if pending:
+            print(f"[BERT] Analyzing {len(pending)} conversations in one batch...")
+            predictions, backend = self.predict_phase_batch([contexts[i] for i in pending], return_probabilities=True)
+            cache_entries = []
+            for i, prediction in zip(pending, predictions):
+                results[i], sources[i] = prediction, backend
+                if self._cacheable(keys[i], prediction, backend):
+                    cache_entries.append((keys[i][0], keys[i][1], prediction['phase'], prediction['confidence'],
+                                          prediction.get('all_probabilities')))
+                    self._remember_phase(keys[i], prediction)
+            self.db.save_cached_phases(cache_entries)
+
+        updated = self.db.update_session_phases([
+            (session['session_id'], result['phase'], result['confidence'])
+            for session, result in zip(sessions, results)
+        ])
+
+        return {
+            'success': updated == len(sessions),
+            'mode': 'all_active',
+            'updated': updated,
+            'sessions': [
+                {
+                    'session_id': session['session_id'],
+                    'phase': result['phase'],
+                    'confidence': result['confidence'],
+                    'messages_count': len(session['messages']),
+                    'source': source
+                }
+                for session, result, source in zip(sessions, results, sources)
+            ],
+            'backend': backend,
+            'cache_hits': self.cache_stats['hits'],
+            'cache_misses': self.cache_stats['misses'],
+            'elapsed_seconds': round((datetime.now() - started).total_seconds(), 3),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    # phase labels of the model directory, None for the untrained fallback
+    def _phase_labels(self):
+        metadata_path = os.path.join(self.model_dir, 'metadata.json')
+        if not os.path.exists(metadata_path):
+            return None
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('phase_labels')
+
+    # incremental phase tracking of one session
+    #1. stored belief and last tracked message order (reset when the model version changed)
+    #2. messages after it, or the last 10 messages for a session tracked the first time
+    #3. each new client message is scored with the message before it as context,
+    #   scores already stored for this model version are reused, the rest in one batch
+    #4. HMM forward step from the stored belief over the new scores
+    #5. scores, belief and session phase saved in one transaction
+    def track_phase(self, session_id='latest'):
+        """Update session phase from new client messages only"""
+        print(f"[PHASE TRACK] Starting incremental tracking for session: {session_id}")
+        if session_id == 'latest':
+            latest = self.db.get_latest_session()
+            if not latest:
+                return {'success': False, 'error': 'No active sessions found'}
+            session_id = latest['session_id']
+            print(f"[SESSION] Using latest session: {session_id}")
+        if not session_id:
+            return {'success': False, 'error': 'No session ID provided'}
+
+        version = self.model_version or 'untrained'
+        state = self.db.get_phase_tracker_state(session_id)
+        if state and state['model_version'] != version:
+            print(f"[PHASE TRACK] Model changed, tracking restarts")
+            state = None
+        last_order = state['last_message_order'] if state else None
+        messages = self.db.get_messages_for_tracking(session_id, last_order, limit=10)
+        if not messages:
+            return {'success': False, 'error': f'No messages found for session {session_id}'}
+
+        new_indices = [i for i, m in enumerate(messages) if last_order is None or m['order'] > last_order]
+        if not new_indices:
+            result = PhaseTracker.result(state['belief'])
+            print(f"[PHASE TRACK] No new messages, phase stays {result['phase']}")
+            return {
+                'success': True,
+                'mode': 'incremental',
+                'session_id': session_id,
+                'phase': result['phase'],
+                'confidence': result['confidence'],
+                'new_messages': 0,
+                'new_client_messages': 0,
+                'scored_messages': 0,
+                'backend': None,
+                'timestamp': datetime.now().isoformat()
+            }
+        client_indices = [i for i in new_indices if is_client_message(messages[i])]
+        scores = self.db.get_message_phase_scores([messages[i]['message_id'] for i in client_indices], version) \
+            if self.model_version else {}
+        pending = [i for i in client_indices if messages[i]['message_id'] not in scores]
+
+        backend = None
+        new_scores = {}
+        if pending:
+            inputs = [message_context(messages[i], messages[i - 1] if i > 0 else None) for i in pending]
+            print(f"[BERT] Scoring {len(pending)} new client messages...")
+            predictions, backend = self.predict_phase_batch(inputs, return_probabilities=True)
+            for i, prediction in zip(pending, predictions):
+                message_id = messages[i]['message_id']
+                scores[message_id] = prediction['all_probabilities']
+                # stored under this model version only when it produced them (same rule as phase_cache)
+                if self._cacheable((message_id, version), prediction, backend):
+                    new_scores[message_id] = prediction['all_probabilities']
+
+        if client_indices:
+            phase_labels = self._phase_labels() or list(scores[messages[client_indices[0]]['message_id']])
+            tracker = PhaseTracker(phase_labels, load_transition_matrix(self.model_dir, phase_labels))
+            belief = tracker.update(state['belief'] if state else None,
+                                    [scores[messages[i]['message_id']] for i in client_indices])
+        elif state:
+            belief = state['belief']
+        else:
+            return {'success': False, 'error': f'No client messages to track in session {session_id}'}
+        result = PhaseTracker.result(belief)
+
+        success = self.db.save_phase_tracking(
+            session_id, version, messages[-1]['order'], belief, result['phase'], result['confidence'],
+            new_scores if self.model_version else None
+        )
+        print(f"[RESULT] Phase: {result['phase']} ({result['confidence']:.1%}), "
+              f"{len(client_indices)} new client messages, {len(pending)} scored")
+        return {
+            'success': success,
+            'mode': 'incremental',
+            'session_id': session_id,
+            'phase': result['phase'],
+            'confidence': result['confidence'],
+            'new_messages': len(new_indices),
+            'new_client_messages': len(client_indices),
+            'scored_messages': len(pending),
+            'backend': backend,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    # fit transition matrix from phase sequences of tracked sessions, saved next to the model
+    def fit_transitions(self):
+        """Fit phase transition matrix from tracked messages"""
+        phase_labels = self._phase_labels()
+        if not phase_labels or not self.model_version:
+            return {'success': False, 'error': 'Transitions need a trained phase model'}
+        sequences = self.db.get_message_phase_sequences(self.model_version)
+        matrix, pairs = fit_transition_matrix(sequences, phase_labels)
+        path = os.path.join(self.model_dir, TRANSITIONS_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'phase_labels': phase_labels,
+                'matrix': [[round(value, 6) for value in row] for row in matrix],
+                'sessions': len(sequences),
+                'transitions_counted': pairs,
+                'model_version': self.model_version,
+                'fitted_at': datetime.now().isoformat()
+            }, f, indent=2)
+        return {
+            'success': True,
+            'mode': 'fit_transitions',
+            'path': path,
+            'sessions': len(sequences),
+            'transitions_counted': pairs,
+            'timestamp': datetime.now().isoformat()
+        }
+
 # use argparse library for starting process from command line
 def main():
     """Command line interface"""
@@ -135,12 +443,31 @@ def main():
                        help='Session ID to analyze (default: latest)')
     parser.add_argument('--output', default='json',
                        help='Output format: json or simple (default: json)')
+    parser.add_argument('--backend', choices=PHASE_BACKENDS, default=None,
+                       help='In-process backend: auto, onnx or torch (default: PHASE_DETECTOR_BACKEND or auto)')
+    parser.add_argument('--all-active', action='store_true',
+                       help='Detect phases for every active session with new messages in one batch')
+    parser.add_argument('--cascade', action='store_true', default=None,
+                       help='Serve confident contexts with the TF-IDF fast path, escalate the rest to BERT')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Always run the phase model, ignore cached predictions')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Score only new client messages and update the tracked phase (HMM smoothing)')
+    parser.add_argument('--fit-transitions', action='store_true',
+                       help='Fit the phase transition matrix from tracked sessions and exit')
     
     args = parser.parse_args()
     
     try:
-        detector = StandalonePhaseDetector()
-        result = detector.detect_and_update_phase(args.session)
+        detector = StandalonePhaseDetector(backend=args.backend, use_cache=not args.no_cache, cascade=args.cascade)
+        if args.fit_transitions:
+            result = detector.fit_transitions()
+        elif args.all_active:
+            result = detector.detect_all_active()
+        elif args.incremental:
+            result = detector.track_phase(args.session)
+        else:
+            result = detector.detect_and_update_phase(args.session)
         
         if args.output == 'json':
             print("\n" + "="*60)
@@ -148,7 +475,13 @@ def main():
             print("="*60)
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
-            if result['success']:
+            if result.get('mode') == 'all_active':
+                for session in result['sessions']:
+                    print(f"\n✅ {session['session_id']}: {session['phase']} ({session['confidence']:.1%})")
+                print(f"\n[ALL ACTIVE] Updated {result['updated']} sessions")
+            elif result.get('mode') == 'fit_transitions':
+                print(f"\n✅ Transitions fitted from {result['transitions_counted']} message pairs: {result['path']}")
+            elif result['success']:
                 print(f"\n✅ Phase: {result['phase']} ({result['confidence']:.1%})")
             else:
                 print(f"\n❌ Error: {result['error']}")
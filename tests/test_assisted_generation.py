@@ -0,0 +1,39 @@
+"""
+Assisted Generation Tests
+A trimmed layer copy drafts for a small random GPT-2 without changing greedy output
+"""
+import os
+import sys
+import pytest
+
+torch = pytest.importorskip('torch')
+transformers = pytest.importorskip('transformers')
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.assisted_generation import trimmed_layer_copy
+
+@pytest.fixture
+def main_model():
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=128, n_positions=64, n_embd=32, n_layer=4, n_head=2)
+    return transformers.GPT2LMHeadModel(config).eval()
+
+def test_draft_blocks_are_renumbered_and_main_model_is_unchanged(main_model):
+    draft = trimmed_layer_copy(main_model, 2)
+
+    assert [block.attn.layer_idx for block in draft.transformer.h] == [0, 1]
+    assert [block.attn.layer_idx for block in main_model.transformer.h] == [0, 1, 2, 3]
+    assert main_model.config.n_layer == 4 and len(main_model.transformer.h) == 4
+    assert draft.transformer.wte is main_model.transformer.wte
+
+def test_greedy_output_is_the_same_with_the_draft(main_model):
+    draft = trimmed_layer_copy(main_model, 2)
+    input_ids = torch.tensor([[5, 17, 42, 9]])
+    kwargs = dict(max_new_tokens=20, do_sample=False, pad_token_id=0)
+
+    with torch.no_grad():
+        plain = main_model.generate(input_ids, **kwargs)
+        assisted = main_model.generate(input_ids, assistant_model=draft, **kwargs)
+
+    assert torch.equal(plain, assisted)
@@ -0,0 +1,74 @@
+"""
+Chat Parser Tests
+Incremental parsing of repeated captures of one chat into a temporary database
+"""
+import os
+import sys
+import sqlite3
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.chat_parser import ChatParser
+
+def write_capture(path, messages, attrs='data-test="message"'):
+    body = ''.join(
+        f'<div {attrs}><span class="message-author">{sender}</span><p>{text}</p></div>'
+        for sender, text in messages
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<html><head><title>Messages | Upwork</title></head><body><div>{body}</div></body></html>')
+
+def stored_messages(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('SELECT sender, message_text FROM chat_messages ORDER BY message_order').fetchall()
+    conn.close()
+    return rows
+
+def test_repeated_reply_newer_than_watermark_is_saved(tmp_path):
+    db_path = str(tmp_path / 'chat.db')
+    html_path = str(tmp_path / 'chat_raw_1.html')
+    chat_parser = ChatParser(db_path)
+    first = [('Alice', 'Hello'), ('Bob', 'Sure'), ('Alice', 'Thanks!')]
+
+    write_capture(html_path, first)
+    chat_parser.process_incremental(html_path)
+    write_capture(html_path, first + [('Bob', 'What rate?'), ('Alice', '50 per hour'), ('Alice', 'Thanks!')])
+    result = chat_parser.process_incremental(html_path)
+
+    assert result['watermark_reached']
+    assert result['new_messages_added'] == 2
+    assert [text for _, text in stored_messages(db_path)][-2:] == ['BobWhat rate?', 'Alice50 per hour']
+
+def test_message_rows_keep_participant_and_read_only_the_tail(tmp_path):
+    db_path = str(tmp_path / 'chat.db')
+    html_path = str(tmp_path / 'chat_raw_1.html')
+    chat_parser = ChatParser(db_path)
+    messages = [
+        ('Client', 'Hi, are you available for a React project?'),
+        ('Jordan', 'Yes, I am available this week'),
+        ('Client', 'Great, what is your hourly rate?')
+    ]
+
+    results = []
+    for new_message in [None, ('Jordan', 'My rate is 50 per hour'), ('Client', 'Sounds good, sending the offer')]:
+        if new_message:
+            messages.append(new_message)
+        rows = ''.join(
+            f'<div class="chat-message-row {"own" if sender == "Jordan" else "other"}">'
+            f'<span class="message-author">{sender}</span><div class="message-content">{text}</div></div>'
+            for sender, text in messages
+        )
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(f'<html><head><title>Messages | Upwork</title></head><body><div>{rows}</div></body></html>')
+        results.append(chat_parser.process_incremental(html_path))
+
+    assert results[0]['action'] == 'new_session'
+    for result in results[1:]:
+        assert result['session_id'] == results[0]['session_id']
+        assert result['watermark_reached']
+        assert result['tail_messages_extracted'] == 1
+        assert result['new_messages_added'] == 1
+    conn = sqlite3.connect(db_path)
+    participant = conn.execute('SELECT participant_name FROM chat_sessions').fetchone()[0]
+    conn.close()
+    assert participant == 'Client'
@@ -0,0 +1,61 @@
+"""
+Fast Tokenizer Tests
+Slow and fast tokenizers give the same token ids on the phase, chat and cover letter corpora,
+using small GPT-2 (byte-level BPE, with the chat trainer's special tokens) and BERT (WordPiece)
+vocabularies trained from those corpora, so no model download is needed
+"""
+import os
+import sys
+import pytest
+
+pytest.importorskip('transformers')
+tokenizers = pytest.importorskip('tokenizers')
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.convert_fast_tokenizers import load_corpus, load_slow_tokenizer, compare
+from scripts.fast_tokenizers import convert_tokenizer_dir, has_tokenizer_json
+
+# same special tokens train_chat_gpt2.py adds to the chat tokenizer
+CHAT_SPECIAL_TOKENS = ["<|client|>", "<|freelancer|>", "<|startoftext|>", "<|endoftext|>"]
+CORPORA = {'phase': 'bert', 'chat': 'gpt2', 'cover_letter': 'gpt2'}
+
+@pytest.fixture(scope='module')
+def corpora():
+    return {name: load_corpus(name) for name in CORPORA}
+
+# tokenizer folders saved by the slow tokenizers (vocab / merges files, no tokenizer.json)
+@pytest.fixture(scope='module')
+def tokenizer_dirs(tmp_path_factory, corpora):
+    texts = [text for corpus in corpora.values() for text in corpus]
+    gpt2_dir = str(tmp_path_factory.mktemp('gpt2'))
+    bpe = tokenizers.ByteLevelBPETokenizer()
+    bpe.train_from_iterator(texts, vocab_size=2000, special_tokens=['<|endoftext|>'])
+    bpe.save_model(gpt2_dir)
+    slow = load_slow_tokenizer(gpt2_dir, 'gpt2')
+    slow.add_special_tokens({'additional_special_tokens': CHAT_SPECIAL_TOKENS})
+    slow.save_pretrained(gpt2_dir)
+
+    bert_dir = str(tmp_path_factory.mktemp('bert'))
+    wordpiece = tokenizers.BertWordPieceTokenizer(lowercase=True)
+    wordpiece.train_from_iterator(texts, vocab_size=2000)
+    wordpiece.save_model(bert_dir)
+    load_slow_tokenizer(bert_dir, 'bert').save_pretrained(bert_dir)
+    return {'gpt2': gpt2_dir, 'bert': bert_dir}
+
+@pytest.mark.parametrize('name', list(CORPORA))
+def test_fast_ids_match_slow_ids(name, corpora, tokenizer_dirs):
+    report = compare(tokenizer_dirs[CORPORA[name]], CORPORA[name], corpora[name])
+    assert report['texts'] > 0
+    assert report['mismatches'] == 0, report.get('first_mismatch')
+
+@pytest.mark.parametrize('name', list(CORPORA))
+def test_converted_tokenizer_json_ids_match_slow_ids(name, corpora, tokenizer_dirs, tmp_path):
+    model_dir = str(tmp_path / name)
+    load_slow_tokenizer(tokenizer_dirs[CORPORA[name]], CORPORA[name]).save_pretrained(model_dir)
+
+    # transformers 5 saves tokenizer.json itself, then there is nothing to convert
+    convert_tokenizer_dir(model_dir, CORPORA[name])
+    assert has_tokenizer_json(model_dir)
+    report = compare(model_dir, CORPORA[name], corpora[name])
+    assert report['mismatches'] == 0, report.get('first_mismatch')